@@ -0,0 +1,380 @@
+# ssef_analysis_tool/api_server.py
+
+# Import necessary libraries for the local JSON API server
+import os
+import json
+import asyncio
+import argparse
+import ipaddress
+import threading
+import datetime as dt
+from functools import partial
+from urllib.parse import urlsplit, parse_qs, unquote
+from concurrent.futures import ProcessPoolExecutor
+
+# Import additional modules from other files within the project
+from .data_fetching import fetch_ticker_info, fetch_financial_statement, INFO_FIELDS, STATEMENT_TYPES
+from .history import history_assembler, BASE_INTERVALS, DERIVED_INTERVALS
+from .simulations import prepare_simulation, simulate_gbm_sketch, DEFAULT_SAMPLER
+from .result_store import simulation_store, SimulationRecord, DEFAULT_SIMULATION_SEED
+
+# Address the server listens on; only loopback addresses are accepted, so the API is never exposed
+API_HOST = '127.0.0.1'
+# Port of the API server; the app only starts the embedded server when SSEF_API_PORT is set
+API_PORT = int(os.environ.get('SSEF_API_PORT') or 8765)
+API_ENABLED = 'SSEF_API_PORT' in os.environ
+# Worker processes running simulations for the API
+API_PROCESS_WORKERS = os.cpu_count() or 1
+# Largest simulation a client may request, so one request cannot hold a worker for minutes
+API_MAX_PATHS = 20_000_000
+API_MAX_HORIZON = 2520
+# Largest request line and header block accepted, in bytes
+API_MAX_HEADER_BYTES = 16384
+
+# Reason phrases of the status codes the server sends
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+class ApiError(Exception):
+    """Raised by an endpoint to answer with an HTTP error status and a message."""
+
+    def __init__(self, status, message):
+        # Initialize the Exception superclass
+        super().__init__(message)
+        self.status = status  # HTTP status code of the response
+
+def frame_to_json(frame):
+    """Converts a DataFrame to {'columns', 'index', 'data'} with ISO dates and missing values as null."""
+    return json.loads(frame.to_json(orient='split', date_format='iso'))
+
+def record_to_json(record):
+    """Converts a SimulationRecord to the JSON returned by the simulations endpoint."""
+    return {
+        'S0': record.S0,
+        'estimate': record.estimate,
+        'stderr': record.stderr,
+        'num_paths': record.num_paths,
+        'quantiles': {str(level): value for level, value in record.quantiles.items()},
+        'value_at_risk': {str(level): record.value_at_risk(level) for level in (0.95, 0.99)},
+        'expected_shortfall': {str(level): value for level, value in record.shortfalls.items()},
+        'histogram': {'counts': record.histogram.tolist(), 'edges': record.bin_edges.tolist()},
+    }
+
+def _int_param(query, name, default, low, high):
+    """Reads an integer query parameter, checking it lies in [low, high]."""
+    value = query.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{name}' must be an integer")
+    if not low <= value <= high:
+        raise ApiError(400, f"'{name}' must be between {low} and {high}")
+    return value
+
+def _date_param(query, name):
+    """Reads an optional ISO date query parameter (e.g. 2020-01-31)."""
+    if name not in query:
+        return None
+    try:
+        return dt.datetime.fromisoformat(query[name])
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an ISO date, e.g. 2020-01-31")
+
+class ApiServer:
+    """Asyncio HTTP server answering GET requests with JSON from the application's shared caches.
+
+    Endpoints (all GET, tickers are case-insensitive):
+        /info/<ticker>?fields=a,b              Ticker info fields and their age in seconds
+        /statements/<ticker>[/<type>]          Financial statements (income, balance, cash_flow)
+        /bars/<ticker>?interval=&start=&end=   OHLCV bars from the bar store
+        /simulations/<ticker>?paths=&horizon=&seed=   GBM simulation summary
+        /risk/<ticker>?paths=&horizon=&seed=   Beta, Value at Risk and Expected Shortfall
+        /                                      Endpoint list and request counters
+
+    Downloads and disk reads run on threads through the same caches the GUI uses, and simulations run
+    on a process pool. Identical requests arriving while one is being answered wait for its result
+    instead of repeating the work.
+    """
+
+    def __init__(self, host=API_HOST, port=API_PORT, process_workers=API_PROCESS_WORKERS):
+        if not ipaddress.ip_address(host).is_loopback:
+            raise ValueError(f"The API server only listens on loopback addresses, not {host}")
+        self.host = host  # Loopback address to listen on
+        self.port = port  # Port to listen on (0 picks a free one)
+        self.process_workers = process_workers  # Number of simulation worker processes
+        self.process_pool = None  # Created when the server starts
+        self.server = None  # asyncio server, once started
+        self.inflight = {}  # Maps the key of each request being answered to its task
+        self.connections = set()  # Tasks serving the open client connections
+        self.requests = 0  # Number of requests answered
+        self.coalesced = 0  # Number of requests answered by joining an identical one
+        # Maps each endpoint to its handler and the number of path parts it takes after the ticker
+        self.routes = {
+            'info': (self.get_info, 0),
+            'statements': (self.get_statements, 1),
+            'bars': (self.get_bars, 0),
+            'simulations': (self.get_simulation, 0),
+            'risk': (self.get_risk, 0),
+        }
+
+    async def start(self):
+        """Starts listening; the port actually used is stored in self.port."""
+        self.process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"API server listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        """Stops listening and shuts the simulation workers down."""
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive connections would otherwise stay open until their clients leave
+            for task in list(self.connections):
+                task.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False)
+
+    async def serve_forever(self):
+        """Starts the server and answers requests until cancelled."""
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def handle_connection(self, reader, writer):
+        """Answers the requests of one connection, keeping it open between requests unless asked to close."""
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break  # The client closed the connection
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, 431, {'error': "Request headers too large"}, close=True)
+                    break
+                if len(head) > API_MAX_HEADER_BYTES:
+                    await self.send(writer, 431, {'error': "Request headers too large"}, close=True)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self.send(writer, 400, {'error': "Malformed request line"}, close=True)
+                    break
+                headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+                headers = {name.strip().lower(): value.strip() for name, value in headers.items()}
+
+                # GET requests have no body, but one sent anyway must be read past
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # Without a valid length the next request cannot be found, so the connection is closed
+                    await self.send(writer, 400, {'error': "Malformed Content-Length"}, close=True)
+                    break
+                if length:
+                    await reader.readexactly(length)
+
+                close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+                if method != 'GET':
+                    status, body = 405, {'error': "Only GET is supported"}
+                else:
+                    status, body = await self.dispatch(target)
+                await self.send(writer, status, body, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # The client went away, or the server is stopping; either way the connection just ends
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def send(self, writer, status, body, close=False):
+        """Writes a JSON response."""
+        payload = json.dumps(body, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+        payload = payload.encode('utf-8')
+        head = (f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+    async def dispatch(self, target):
+        """Routes a request target to its endpoint.
+
+        Returns:
+            tuple: The HTTP status and the JSON body.
+        """
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        self.requests += 1
+        if not parts:
+            return 200, {'endpoints': sorted(self.routes), 'requests': self.requests, 'coalesced': self.coalesced,
+                         'in_flight': len(self.inflight)}
+        endpoint, extra_parts = self.routes.get(parts[0], (None, 0))
+        if endpoint is None or not 2 <= len(parts) <= 2 + extra_parts:
+            return 404, {'error': f"Unknown endpoint {url.path}"}
+        try:
+            return 200, await endpoint(parts[1].upper(), query, *parts[2:])
+        except ApiError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            print(f"API request {target} failed: {e}")
+            return 500, {'error': str(e)}
+
+    async def coalesce(self, key, factory):
+        """Returns the result of factory(), sharing it with identical requests made while it runs.
+
+        Args:
+            key (hashable): Identifies the request (endpoint and normalized parameters).
+            factory (callable): Returns the coroutine computing the result.
+        """
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self.inflight[key] = task
+            task.add_done_callback(partial(self._finish, key))
+        else:
+            self.coalesced += 1
+        # Shielded, so a client that disconnects does not cancel the work other clients are waiting for
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        """Forgets a finished request, retrieving its error in case every client waiting for it has left."""
+        self.inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def in_thread(self, function, *args, **kwargs):
+        """Runs a blocking call (download or disk read through the shared caches) on a thread."""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(function, *args, **kwargs))
+
+    async def get_info(self, ticker, query):
+        """Returns the requested ticker info fields and their age."""
+        fields = sorted(query['fields'].split(',')) if query.get('fields') else sorted(INFO_FIELDS)
+        unknown = [field for field in fields if field not in INFO_FIELDS]
+        if unknown:
+            raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+        info = await self.coalesce(('info', ticker, tuple(fields)), lambda: self.in_thread(fetch_ticker_info, ticker, fields))
+        # Fields Yahoo lacks may be cached as None, so an unknown ticker can still return every field
+        if all(value is None for value in info.values()):
+            raise ApiError(404, f"No data found for ticker {ticker}")
+        return {'ticker': ticker, 'info': dict(info), 'age': {field: info.age(field) for field in info}}
+
+    async def get_statements(self, ticker, query, statement_type=None):
+        """Returns one or all of a ticker's financial statements."""
+        statement_types = STATEMENT_TYPES if statement_type is None else (statement_type,)
+        if statement_type is not None and statement_type not in STATEMENT_TYPES:
+            raise ApiError(404, f"Unknown statement type {statement_type}, expected one of {', '.join(STATEMENT_TYPES)}")
+        frames = await asyncio.gather(*(
+            self.coalesce(('statement', ticker, kind), partial(self.in_thread, fetch_financial_statement, ticker, kind))
+            for kind in statement_types))
+        if all(frame.empty for frame in frames):
+            raise ApiError(404, f"No statements found for ticker {ticker}")
+        return {'ticker': ticker, 'statements': {kind: frame_to_json(frame) for kind, frame in zip(statement_types, frames)}}
+
+    async def get_bars(self, ticker, query):
+        """Returns OHLCV bars for an interval and optional date range."""
+        interval = query.get('interval', '1d')
+        if interval not in BASE_INTERVALS and interval not in DERIVED_INTERVALS:
+            raise ApiError(400, f"Unsupported interval {interval}")
+        start, end = _date_param(query, 'start'), _date_param(query, 'end')
+        bars = await self.coalesce(('bars', ticker, interval, start, end),
+                                   lambda: self.in_thread(history_assembler.get_bars, ticker, interval, start, end))
+        return {'ticker': ticker, 'interval': interval, 'bars': frame_to_json(bars)}
+
+    async def simulate(self, ticker, query):
+        """Returns the SimulationRecord for the simulation parameters in the query, from the store or a worker process."""
+        paths = _int_param(query, 'paths', 10000, 1, API_MAX_PATHS)
+        horizon = _int_param(query, 'horizon', 252, 1, API_MAX_HORIZON)
+        seed = _int_param(query, 'seed', DEFAULT_SIMULATION_SEED, 0, 2 ** 63 - 1)
+
+        async def run():
+            try:
+                key, params = await self.in_thread(prepare_simulation, ticker, paths, horizon, seed)
+            except ValueError as e:
+                raise ApiError(404, str(e))
+            # The result store is shared with the GUI, so a simulation run in either is reused by the other
+            record = await self.in_thread(simulation_store.get, key)
+            if record is None:
+                # One worker process per simulation; concurrent requests for other simulations use the other workers
+                sketch = await asyncio.get_running_loop().run_in_executor(
+                    self.process_pool, partial(simulate_gbm_sketch, params['S0'], params['mu'], params['sigma'],
+                                               T=horizon, num_simulations=paths, sampler=DEFAULT_SAMPLER,
+                                               seed=seed, workers=1))
+                record = await self.in_thread(simulation_store.put, key, SimulationRecord.from_sketch(sketch, params['S0']))
+            return record
+
+        return await self.coalesce(('simulation', ticker, paths, horizon, seed), run)
+
+    async def get_simulation(self, ticker, query):
+        """Returns the summary of a GBM simulation of the ticker's price."""
+        record = await self.simulate(ticker, query)
+        return {'ticker': ticker, 'simulation': record_to_json(record)}
+
+    async def get_risk(self, ticker, query):
+        """Returns the ticker's beta with the Value at Risk and Expected Shortfall of its simulation.
+
+        An unknown ticker is answered with 404 by the simulation, which needs the ticker's price history; a
+        known ticker without a beta (e.g. an ETF) is answered with a null beta.
+        """
+        info, record = await asyncio.gather(
+            self.coalesce(('info', ticker, ('beta',)), lambda: self.in_thread(fetch_ticker_info, ticker, ['beta'])),
+            self.simulate(ticker, query))
+        return {
+            'ticker': ticker,
+            'beta': info.get('beta'),
+            'beta_age': info.age('beta'),
+            'num_paths': record.num_paths,
+            'S0': record.S0,
+            'value_at_risk': {str(level): record.value_at_risk(level) for level in (0.95, 0.99)},
+            'expected_shortfall': {str(level): value for level, value in record.shortfalls.items()},
+        }
+
+class ApiServerThread(threading.Thread):
+    """Runs an ApiServer on its own event loop in a background thread, e.g. inside the GUI."""
+
+    def __init__(self, port=API_PORT):
+        # Initialize the Thread superclass as a daemon, so it never keeps the app alive
+        super().__init__(daemon=True)
+        self.loop = asyncio.new_event_loop()  # Event loop of the server
+        self.server = ApiServer(port=port)  # The server run by the thread
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.server.start())
+        except OSError as e:
+            # E.g. the port is taken by another running instance, which then serves the clients
+            print(f"Could not start the API server on port {self.server.port}: {e}")
+            return
+        self.loop.run_forever()
+
+    def stop(self):
+        """Stops the server and its event loop from another thread."""
+        if not self.loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+if __name__ == "__main__":
+    # Run with: python -m ssef_analysis_tool.api_server --port 8765
+    parser = argparse.ArgumentParser(description="Serve ticker data, statements, bars, risk and simulations as JSON on localhost.")
+    parser.add_argument('--host', default=API_HOST, help="Loopback address to listen on")
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_PROCESS_WORKERS, help="Simulation worker processes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(ApiServer(args.host, args.port, args.workers).serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,604 @@
+# ssef_analysis_tool/backtest.py
+
+# Import necessary PyQt5 classes for GUI components
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox,
+    QTableWidget, QTableWidgetItem, QMessageBox, QFileDialog
+)
+import os
+import time
+import argparse
+import itertools
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Import additional modules from other files within the project
+from .history import history_assembler
+from .jobs import get_job_manager
+from .memory import memory_manager
+from .scenarios import parse_grid
+from .simulations import run_tasks
+from .styles import TABLE_STYLE, BUTTON_STYLE
+
+# Bars per year for each supported interval, used to annualise returns, volatility and turnover
+BARS_PER_YEAR = {
+    '1h': 252 * 7,
+    '1d': 252,
+    '1wk': 52,
+    '1mo': 12,
+}
+# Default history used for backtests (the longest daily history kept by the bar store)
+BACKTEST_LOOKBACK_DAYS = 3650
+# Bars between a signal and the trade acting on it, so no rule trades on the close it has just seen
+EXECUTION_LAG = 1
+# Default transaction cost in basis points of the value traded
+DEFAULT_COST_BPS = 10
+# Number of tickers whose bars are loaded at the same time
+PRICE_FETCH_WORKERS = 4
+# Largest (combinations x books x bars) block one task holds, which bounds the memory of each worker
+TASK_ELEMENTS = 2 ** 22
+# Total (combinations x books x bars) from which a backtest is spread across all cores
+PARALLEL_MIN_ELEMENTS = 2 ** 24
+
+def load_prices(tickers, interval='1d', start=None):
+    """Loads the closing prices of several tickers from the bar store, aligned on a common time index.
+
+    Args:
+        tickers (list): The stock ticker symbols.
+        interval (str, optional): The bar interval. Defaults to '1d'.
+        start (datetime, optional): The first time to include. Defaults to BACKTEST_LOOKBACK_DAYS ago.
+
+    Returns:
+        pd.DataFrame: One column of closes per ticker with data; NaN before a ticker's first bar,
+            and carried forward over gaps after it.
+
+    Raises:
+        ValueError: If none of the tickers has any bars.
+    """
+    start = start or dt.datetime.now() - dt.timedelta(days=BACKTEST_LOOKBACK_DAYS)
+    with ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS) as executor:
+        frames = list(executor.map(lambda ticker: history_assembler.get_bars(ticker, interval, start=start), tickers))
+    closes = {ticker: frame['Close'] for ticker, frame in zip(tickers, frames) if not frame.empty}
+    if not closes:
+        raise ValueError(f"No price history found for {', '.join(tickers)}")
+    return pd.DataFrame(closes).sort_index().ffill()
+
+def moving_averages(prices, windows):
+    """Returns the simple moving averages of prices for several windows from one cumulative sum.
+
+    Args:
+        prices (np.ndarray): Prices of shape (bars, tickers), NaN where a ticker has no price.
+        windows (list): The window lengths in bars.
+
+    Returns:
+        dict: Maps each window to its (bars, tickers) averages, NaN until a full window of prices exists.
+    """
+    valid = ~np.isnan(prices)
+    zero = np.zeros((1, prices.shape[1]))
+    sums = np.concatenate([zero, np.cumsum(np.where(valid, prices, 0.0), axis=0)])
+    counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    averages = {}
+    for window in windows:
+        average = np.full(prices.shape, np.nan)
+        if window <= len(prices):
+            full = counts[window:] - counts[:-window] == window
+            average[window - 1:] = np.where(full, (sums[window:] - sums[:-window]) / window, np.nan)
+        averages[window] = average
+    return averages
+
+def ma_crossover_targets(prices, params):
+    """Long while the fast moving average is above the slow one, flat otherwise."""
+    averages = moving_averages(prices, sorted({p[name] for p in params for name in ('fast', 'slow')}))
+    # NaN comparisons are False, so there is no position until both averages exist
+    return np.stack([averages[p['fast']] > averages[p['slow']] for p in params]).astype(np.float64)
+
+def momentum_targets(prices, params):
+    """Long while the return over the lookback is positive (time-series momentum), flat otherwise."""
+    targets = np.zeros((len(params),) + prices.shape)
+    for i, p in enumerate(params):
+        lookback = p['lookback']
+        if lookback < len(prices):
+            targets[i, lookback:] = prices[lookback:] > prices[:-lookback]
+    return targets
+
+def equal_weight_targets(prices, params):
+    """Equal weights across every ticker that has a price."""
+    valid = ~np.isnan(prices)
+    weights = valid / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+    return np.broadcast_to(weights, (len(params),) + prices.shape)
+
+# Available strategies: their label, target weight function, parameters with default grids, and whether
+# the tickers form one portfolio (True) or each ticker is traded as a separate book (False)
+STRATEGIES = {
+    'ma_crossover': {
+        'label': 'MA Crossover',
+        'targets': ma_crossover_targets,
+        'parameters': {'fast': (20, 50), 'slow': (100, 200)},
+        'portfolio': False,
+    },
+    'momentum': {
+        'label': 'Momentum',
+        'targets': momentum_targets,
+        'parameters': {'lookback': (63, 126, 252)},
+        'portfolio': False,
+    },
+    'equal_weight': {
+        'label': 'Equal Weight',
+        'targets': equal_weight_targets,
+        'parameters': {},
+        'portfolio': True,
+    },
+}
+
+def parameter_grid(strategy, values=None, periods=(1,)):
+    """Returns every combination of a strategy's parameters and the rebalancing periods.
+
+    Args:
+        strategy (str): A key of STRATEGIES.
+        values (dict, optional): Maps parameter names to lists of values. Defaults to the strategy's grid.
+        periods (list, optional): Bars between rebalances. Defaults to (1,), trading on every bar.
+
+    Returns:
+        list: One dict of parameter values (including 'period') per combination.
+
+    Raises:
+        ValueError: If the strategy or a parameter is unknown, or no valid combination remains.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    grid = dict(STRATEGIES[strategy]['parameters'])
+    for name, options in (values or {}).items():
+        if name not in grid:
+            raise ValueError(f"Unknown parameter for {strategy}: {name}")
+        grid[name] = options
+    names = list(grid)
+    combinations = [dict(zip(names, (int(v) for v in combination)), period=int(period))
+                    for combination in itertools.product(*grid.values()) for period in periods]
+    # A crossover needs a fast average shorter than its slow one
+    combinations = [c for c in combinations if c.get('fast', 0) < c.get('slow', 1) and c['period'] >= 1
+                    and all(c[name] >= 1 for name in names)]
+    if not combinations:
+        raise ValueError("No valid parameter combination")
+    return combinations
+
+def run_book(prices, available, targets, period=1, lag=EXECUTION_LAG, cost=DEFAULT_COST_BPS / 10000):
+    """Simulates books that trade to target weights every `period` bars and let holdings drift in between.
+
+    Every leading axis of `targets` is a separate book (e.g. parameter combination x ticker), and the
+    last axis holds the assets of a book; the rest of each book is cash. All books and bars are
+    computed at once: between rebalances a book's value only depends on the price changes since the
+    last rebalance, so values are products over rebalance dates.
+
+    Args:
+        prices (np.ndarray): Prices of shape (..., bars, assets) without NaN (gaps filled).
+        available (np.ndarray): True where an asset can be traded, same shape as prices.
+        targets (np.ndarray): Target weights of shape (..., bars, assets), decided at each bar's close.
+        period (int, optional): Bars between rebalances. Defaults to 1.
+        lag (int, optional): Bars between a target and the trade. Defaults to EXECUTION_LAG.
+        cost (float, optional): Cost as a fraction of the value traded. Defaults to DEFAULT_COST_BPS.
+
+    Returns:
+        tuple: The (equity, turnover) arrays of shape (..., bars); equity starts at 1 and turnover is
+            the fraction of the book traded at each bar.
+    """
+    bars = prices.shape[-2]
+    # Weights actually traded, after the execution lag and only in assets that can be traded
+    weights = np.zeros(np.broadcast_shapes(targets.shape, prices.shape))
+    weights[..., lag:, :] = targets[..., :bars - lag, :]
+    weights = np.where(available, np.nan_to_num(weights), 0.0)
+
+    # For every bar, the last rebalance strictly before it (the first bar counts as its own)
+    t = np.arange(bars)
+    rebalance = t % period == 0
+    base = np.maximum(t - 1, 0) // period * period
+
+    # Value of each book relative to its last rebalance, and the weights it has drifted to
+    held = weights[..., base, :]
+    growth = prices / prices[..., base, :]
+    value = 1 - held.sum(axis=-1) + (held * growth).sum(axis=-1)
+    drifted = held * growth / value[..., None]
+    drifted[..., 0, :] = 0.0  # Every book starts in cash
+    turnover = np.where(rebalance, np.abs(weights - drifted).sum(axis=-1), 0.0)
+
+    # Chain the values over rebalance dates, paying the costs of each rebalance
+    steps = t[rebalance]
+    at_rebalance = np.cumprod(value[..., steps] * (1 - cost * turnover[..., steps]), axis=-1)
+    equity = np.where(rebalance, at_rebalance[..., t // period], at_rebalance[..., base // period] * value)
+    return equity, turnover
+
+def _backtest_task(strategy, prices, params, lag, cost):
+    """Backtests parameter combinations of a strategy on a block of tickers; runs in a worker process.
+
+    Args:
+        strategy (str): A key of STRATEGIES.
+        prices (np.ndarray): Prices of shape (bars, tickers), NaN before a ticker's first bar.
+        params (list): Parameter combinations, each including its rebalancing 'period'.
+        lag (int): Bars between a target and the trade.
+        cost (float): Cost as a fraction of the value traded.
+
+    Returns:
+        tuple: The (equity, turnover) arrays of shape (combinations, books, bars) as float32.
+    """
+    spec = STRATEGIES[strategy]
+    available = ~np.isnan(prices)
+    # Before a ticker's first bar its price is irrelevant (its weight is zero), so back-fill it
+    filled = pd.DataFrame(prices).bfill().to_numpy()
+
+    # Target weights only depend on the signal parameters, so combinations differing in period share them
+    signals = [{name: value for name, value in p.items() if name != 'period'} for p in params]
+    unique = [dict(key) for key in dict.fromkeys(tuple(sorted(s.items())) for s in signals)]
+    targets = spec['targets'](prices, unique)
+    signal_index = [unique.index(s) for s in signals]
+
+    books = 1 if spec['portfolio'] else prices.shape[1]
+    equity = np.empty((len(params), books, len(prices)), dtype=np.float32)
+    turnover = np.empty_like(equity)
+    for period in sorted({p['period'] for p in params}):
+        rows = [i for i, p in enumerate(params) if p['period'] == period]
+        chosen = targets[[signal_index[i] for i in rows]]
+        if spec['portfolio']:
+            result = run_book(filled, available, chosen, period, lag, cost)
+            equity[rows, 0], turnover[rows, 0] = result
+        else:
+            # Each ticker is its own one-asset book: (combinations, tickers, bars, 1)
+            result = run_book(filled.T[..., None], available.T[..., None],
+                              chosen.transpose(0, 2, 1)[..., None], period, lag, cost)
+            equity[rows], turnover[rows] = result
+    return equity, turnover
+
+class BacktestResult:
+    """Equity curves, turnover and drawdowns of every parameter combination and book of a backtest."""
+
+    def __init__(self, strategy, params, books, times, equity, turnover, starts, bars_per_year):
+        self.strategy = strategy  # Key of the strategy in STRATEGIES
+        self.params = params  # Parameter combinations, including 'period'
+        self.books = books  # Ticker of each book, or ['Portfolio']
+        self.times = times  # Time index of the bars
+        self.equity = equity  # Equity curves of shape (combinations, books, bars), starting at 1
+        self.turnover = turnover  # Fraction of each book traded at each bar, same shape
+        self.starts = starts  # First bar of each book with a price
+        self.bars_per_year = bars_per_year  # Used to annualise the statistics
+
+    @property
+    def drawdowns(self):
+        """Drawdown from the running peak of every equity curve (0 at a new high, -0.2 at 20% below it)."""
+        return self.equity / np.maximum.accumulate(self.equity, axis=-1) - 1
+
+    def metrics(self):
+        """Returns the headline statistics of every combination and book.
+
+        Returns:
+            dict: Maps each statistic name to a (combinations, books) array. Returns are compounded from
+                each book's first bar with a price; volatility, Sharpe ratio and turnover are annualised.
+        """
+        equity = self.equity.astype(np.float64)
+        bars = equity.shape[-1]
+        t = np.arange(bars)
+        active = t >= self.starts[:, None]  # (books, bars)
+        years = (bars - self.starts) / self.bars_per_year
+
+        returns = np.full(equity.shape, np.nan)
+        returns[..., 1:] = equity[..., 1:] / equity[..., :-1] - 1
+        returns = np.where(active & (t > self.starts[:, None]), returns, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean, std = np.nanmean(returns, axis=-1), np.nanstd(returns, axis=-1, ddof=1)
+            final = equity[..., -1] / np.take_along_axis(equity, self.starts[None, :, None], axis=-1)[..., 0]
+            return {
+                'Total Return': final - 1,
+                'CAGR': final ** (1 / years) - 1,
+                'Volatility': std * np.sqrt(self.bars_per_year),
+                'Sharpe': mean / std * np.sqrt(self.bars_per_year),
+                'Max Drawdown': np.where(active, self.drawdowns, 0.0).min(axis=-1),
+                'Turnover p.a.': np.where(active, self.turnover, 0.0).sum(axis=-1) / years,
+            }
+
+    def summary(self):
+        """Returns one row of statistics per combination and book, with the parameters as columns."""
+        metrics = self.metrics()
+        rows = []
+        for c, b in np.ndindex(len(self.params), len(self.books)):
+            row = {'Book': self.books[b], **self.params[c]}
+            row.update({name: float(values[c, b]) for name, values in metrics.items()})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def equity_frame(self):
+        """Returns the equity curves as a frame with one column per (book, parameters) pair."""
+        columns = [f"{self.books[b]} {describe_params(self.params[c])}"
+                   for c, b in np.ndindex(len(self.params), len(self.books))]
+        return pd.DataFrame(self.equity.reshape(-1, self.equity.shape[-1]).T, index=self.times, columns=columns)
+
+    def save(self, folder):
+        """Writes the summary, equity curves, drawdowns and turnover as CSV files into a folder."""
+        os.makedirs(folder, exist_ok=True)
+        self.summary().to_csv(os.path.join(folder, 'summary.csv'), index=False)
+        equity = self.equity_frame()
+        equity.to_csv(os.path.join(folder, 'equity.csv'))
+        (equity / equity.cummax() - 1).to_csv(os.path.join(folder, 'drawdowns.csv'))
+        pd.DataFrame(self.turnover.reshape(-1, self.turnover.shape[-1]).T, index=self.times,
+                     columns=equity.columns).to_csv(os.path.join(folder, 'turnover.csv'))
+
+def describe_params(params):
+    """Returns a short label for a parameter combination (e.g. 'fast=20, slow=100, period=5')."""
+    return ", ".join(f"{name}={value}" for name, value in params.items())
+
+def run_backtest(prices, strategy, params, interval='1d', cost_bps=DEFAULT_COST_BPS, lag=EXECUTION_LAG,
+                 workers=None, progress=None):
+    """Backtests every parameter combination of a strategy on a price frame in one batched pass.
+
+    Args:
+        prices (pd.DataFrame): Closing prices, one column per ticker (as returned by load_prices).
+        strategy (str): A key of STRATEGIES.
+        params (list): Parameter combinations (as returned by parameter_grid).
+        interval (str, optional): The bar interval of the prices. Defaults to '1d'.
+        cost_bps (float, optional): Cost in basis points of the value traded. Defaults to DEFAULT_COST_BPS.
+        lag (int, optional): Bars between a signal and the trade. Defaults to EXECUTION_LAG.
+        workers (int, optional): Worker processes. Defaults to all cores for large backtests, else 1.
+        progress (callable, optional): Called with the percentage of work done as tasks finish (see run_tasks).
+
+    Returns:
+        BacktestResult: The equity curves, turnover and drawdowns.
+    """
+    if interval not in BARS_PER_YEAR:
+        raise ValueError(f"Unsupported interval for backtests: {interval}")
+    portfolio = STRATEGIES[strategy]['portfolio']
+    values = prices.to_numpy(dtype=np.float64)
+    bars, tickers = values.shape
+
+    # Split the (combinations x tickers) grid into blocks small enough for one worker's memory
+    combination_block = max(1, min(len(params), TASK_ELEMENTS // bars))
+    ticker_block = tickers if portfolio else max(1, TASK_ELEMENTS // (combination_block * bars))
+    blocks = [(c, t) for c in range(0, len(params), combination_block) for t in range(0, tickers, ticker_block)]
+    arguments = [(strategy, values[:, t:t + ticker_block], params[c:c + combination_block], lag, cost_bps / 10000)
+                 for c, t in blocks]
+    books = 1 if portfolio else tickers
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(params) * books * bars >= PARALLEL_MIN_ELEMENTS else 1
+    results = run_tasks(_backtest_task, arguments, min(workers, len(arguments)), progress)
+
+    # Put the blocks back together
+    equity = np.empty((len(params), books, bars), dtype=np.float32)
+    turnover = np.empty_like(equity)
+    for (c, t), (block_equity, block_turnover) in zip(blocks, results):
+        columns = slice(0, 1) if portfolio else slice(t, t + block_equity.shape[1])
+        equity[c:c + block_equity.shape[0], columns] = block_equity
+        turnover[c:c + block_equity.shape[0], columns] = block_turnover
+
+    available = ~np.isnan(values)
+    starts = available.argmax(axis=0)
+    if portfolio:
+        starts = np.array([starts.min()])
+    book_names = ['Portfolio'] if portfolio else list(prices.columns)
+    return BacktestResult(strategy, params, book_names, prices.index, equity, turnover, starts,
+                          BARS_PER_YEAR[interval])
+
+def backtest_tickers(tickers, strategy, values=None, periods=(1,), interval='1d', start=None,
+                     cost_bps=DEFAULT_COST_BPS, progress=None):
+    """Loads the tickers' bars and backtests a strategy's parameter grid on them; meant to run as a job.
+
+    Args:
+        tickers (list): The stock ticker symbols.
+        strategy (str): A key of STRATEGIES.
+        values (dict, optional): Maps parameter names to lists of values. Defaults to the strategy's grid.
+        periods (list, optional): Bars between rebalances. Defaults to (1,).
+        interval (str, optional): The bar interval. Defaults to '1d'.
+        start (datetime, optional): The first bar to use. Defaults to BACKTEST_LOOKBACK_DAYS ago.
+        cost_bps (float, optional): Cost in basis points of the value traded. Defaults to DEFAULT_COST_BPS.
+        progress (callable, optional): Called with the percentage done; may raise to cancel the backtest.
+
+    Returns:
+        BacktestResult: The completed backtest.
+    """
+    params = parameter_grid(strategy, values, periods)
+    prices = load_prices(tickers, interval, start)
+    if progress:
+        progress(10)
+    scaled = (lambda percent: progress(10 + int(0.9 * percent))) if progress else None
+    return run_backtest(prices, strategy, params, interval, cost_bps, progress=scaled)
+
+def parse_parameters(text):
+    """Parses parameter grids typed as 'name=v1,v2; name=v1' into a dict of value lists.
+
+    Raises:
+        ValueError: If a part is not of the form name=values.
+    """
+    values = {}
+    for part in text.split(';'):
+        if not part.strip():
+            continue
+        name, separator, grid = part.partition('=')
+        if not separator:
+            raise ValueError(f"Expected name=values, got '{part.strip()}'")
+        values[name.strip().lower()] = [int(v) for v in parse_grid(grid)]
+    return values
+
+class BacktestPanel(QWidget):
+    """Panel for backtesting a strategy's parameter grid on a list of tickers."""
+
+    def __init__(self, parent=None):
+        # Initialize the QWidget superclass
+        super().__init__(parent)
+        self.ticker = None  # Current ticker, used as the default ticker list
+        self.result = None  # Last completed backtest
+        self.job_key = None  # Job key of the backtest being run or last run
+        self.submitted_at = None  # When the current backtest was queued, to weigh its cost against its memory
+        self.init_ui()
+
+        # The equity curves count towards the memory budget; an evicted backtest has to be rerun to export it
+        memory_manager.register(self, self.evict_result, 'Backtest')
+
+        # Backtests run on the application's shared job pool
+        self.jobs = get_job_manager()
+        self.jobs.progress.connect(self.on_job_progress)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.error.connect(self.on_job_error)
+        self.jobs.cancelled.connect(self.on_job_cancelled)
+
+    def init_ui(self):
+        """Initializes the panel UI."""
+        layout = QVBoxLayout(self)
+
+        # Tickers, strategy, parameter grids, rebalancing periods and costs
+        inputs = QHBoxLayout()
+        self.tickers_entry = QLineEdit()
+        self.tickers_entry.setPlaceholderText("Tickers, comma separated")
+        self.strategy_box = QComboBox()
+        for key, spec in STRATEGIES.items():
+            self.strategy_box.addItem(spec['label'], key)
+        self.strategy_box.currentIndexChanged.connect(self.reset_parameters)
+        self.parameters_entry = QLineEdit()
+        self.periods_entry = QLineEdit("1, 5, 21")
+        self.cost_entry = QLineEdit(str(DEFAULT_COST_BPS))
+        for label, entry in (("Tickers", self.tickers_entry), ("Strategy", self.strategy_box),
+                             ("Parameters", self.parameters_entry), ("Rebalance (bars)", self.periods_entry),
+                             ("Cost (bps)", self.cost_entry)):
+            caption = QLabel(label)
+            caption.setStyleSheet("color: white;")
+            entry.setStyleSheet("background-color: white; color: black; padding: 3px;")
+            inputs.addWidget(caption)
+            inputs.addWidget(entry)
+        self.run_button = QPushButton("Run Backtest")
+        self.run_button.setStyleSheet(BUTTON_STYLE)
+        self.run_button.clicked.connect(self.run_backtest)
+        inputs.addWidget(self.run_button)
+        layout.addLayout(inputs)
+
+        # Status of the backtest and export of the full results
+        controls = QHBoxLayout()
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: white;")
+        self.export_button = QPushButton("Export CSV")
+        self.export_button.setStyleSheet(BUTTON_STYLE)
+        self.export_button.clicked.connect(self.export_results)
+        controls.addWidget(self.status_label)
+        controls.addStretch()
+        controls.addWidget(self.export_button)
+        layout.addLayout(controls)
+
+        # Summary table: one row per (parameters, book), best Sharpe ratio first
+        self.table = QTableWidget()
+        self.table.setStyleSheet(TABLE_STYLE)
+        layout.addWidget(self.table)
+        self.reset_parameters()
+
+    def reset_parameters(self):
+        """Fills the parameter entry with the default grid of the selected strategy."""
+        parameters = STRATEGIES[self.strategy_box.currentData()]['parameters']
+        self.parameters_entry.setText("; ".join(f"{name}={', '.join(str(v) for v in grid)}"
+                                                for name, grid in parameters.items()))
+
+    def set_ticker(self, ticker):
+        """Uses the current ticker as the ticker list if none has been entered."""
+        self.ticker = ticker
+        if ticker and not self.tickers_entry.text().strip():
+            self.tickers_entry.setText(ticker)
+
+    def run_backtest(self):
+        """Parses the inputs and queues the backtest on the job pool."""
+        tickers = list(dict.fromkeys(t.strip().upper() for t in self.tickers_entry.text().split(',') if t.strip()))
+        if not tickers:
+            QMessageBox.warning(self, "Warning", "Please enter at least one ticker symbol.")
+            return
+        strategy = self.strategy_box.currentData()
+        try:
+            values = parse_parameters(self.parameters_entry.text())
+            periods = [int(p) for p in parse_grid(self.periods_entry.text())]
+            cost_bps = float(self.cost_entry.text())
+            combinations = len(parameter_grid(strategy, values, periods))
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", f"Invalid backtest settings: {e}")
+            return
+
+        # Repeated clicks with the same settings join the backtest already queued or running. The job is
+        # not tagged with the workspace's ticker, so showing another ticker does not cancel it.
+        key = ('backtest', tuple(tickers), strategy, tuple(sorted((k, tuple(v)) for k, v in values.items())),
+               tuple(periods), cost_bps)
+        if self.job_key is not None and self.job_key != key:
+            self.jobs.cancel(key=self.job_key)
+        self.job_key = key
+        self.submitted_at = time.perf_counter()
+        self.status_label.setText(f"Queued {combinations} parameter combinations on {len(tickers)} tickers...")
+        self.jobs.submit(key, backtest_tickers, tickers, strategy, values, periods, cost_bps=cost_bps)
+
+    def on_job_progress(self, key, percent):
+        """Shows the progress of the current backtest."""
+        if key == self.job_key:
+            self.status_label.setText(f"Running... {percent}%")
+
+    def on_job_finished(self, key, result):
+        """Shows the result of the current backtest; results of superseded backtests are ignored."""
+        if key == self.job_key:
+            self.result = result
+            self.status_label.setText(f"{STRATEGIES[result.strategy]['label']}: {len(result.params)} combinations, "
+                                      f"{len(result.books)} books, {len(result.times)} bars")
+            self.show_summary(result)
+            memory_manager.track(self, 'result', result, cost=time.perf_counter() - self.submitted_at)
+
+    def on_job_error(self, key, error_message):
+        """Reports a failure of the current backtest."""
+        if key == self.job_key:
+            self.status_label.setText("")
+            QMessageBox.critical(self, "Error", f"Backtest failed: {error_message}")
+
+    def on_job_cancelled(self, key):
+        """Clears the status of a cancelled backtest."""
+        if key == self.job_key:
+            self.status_label.setText("Backtest cancelled.")
+
+    def evict_result(self, key):
+        """Drops the last backtest when the memory manager needs the space; the table keeps its summary."""
+        self.result = None
+
+    def show_summary(self, result):
+        """Fills the table with the summary of a backtest."""
+        summary = result.summary().sort_values('Sharpe', ascending=False)
+        percent_columns = ('Total Return', 'CAGR', 'Volatility', 'Max Drawdown')
+        self.table.setRowCount(len(summary))
+        self.table.setColumnCount(len(summary.columns))
+        self.table.setHorizontalHeaderLabels(list(summary.columns))
+        for row, values in enumerate(summary.itertuples(index=False)):
+            for column, (name, value) in enumerate(zip(summary.columns, values)):
+                if isinstance(value, str):
+                    text = value
+                elif name in percent_columns:
+                    text = f"{value:.1%}" if np.isfinite(value) else "N/A"
+                elif name in ('Sharpe', 'Turnover p.a.'):
+                    text = f"{value:.2f}" if np.isfinite(value) else "N/A"
+                else:
+                    text = str(value)
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+    def export_results(self):
+        """Saves the summary, equity curves, drawdowns and turnover of the last backtest as CSV files."""
+        # The result may be evicted by the memory manager while the dialog is open
+        result = self.result
+        if result is None:
+            QMessageBox.warning(self, "Warning", "Run a backtest first.")
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Export Backtest")
+        if folder:
+            result.save(folder)
+            self.status_label.setText(f"Saved to {folder}")
+
+if __name__ == "__main__":
+    # Run with: python -m ssef_analysis_tool.backtest AAPL MSFT --strategy ma_crossover --param fast=20,50 --output results
+    parser = argparse.ArgumentParser(description="Backtest a strategy's parameter grid on a list of tickers.")
+    parser.add_argument('tickers', nargs='+', help="Ticker symbols")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='ma_crossover')
+    parser.add_argument('--param', action='append', default=[], help="Parameter grid, e.g. fast=20,50 (repeatable)")
+    parser.add_argument('--period', default='1', help="Bars between rebalances, e.g. 1,5,21")
+    parser.add_argument('--interval', choices=list(BARS_PER_YEAR), default='1d')
+    parser.add_argument('--start', type=dt.datetime.fromisoformat, default=None, help="First date, e.g. 2015-01-01")
+    parser.add_argument('--cost', type=float, default=DEFAULT_COST_BPS, help="Cost in basis points of the value traded")
+    parser.add_argument('--output', default=None, help="Folder to write the CSV results to")
+    args = parser.parse_args()
+
+    result = backtest_tickers([t.upper() for t in args.tickers], args.strategy, parse_parameters(';'.join(args.param)),
+                              [int(p) for p in parse_grid(args.period)], args.interval, args.start, args.cost)
+    print(result.summary().to_string(index=False))
+    if args.output:
+        result.save(args.output)
+        print(f"Saved results to {args.output}")
@@ -0,0 +1,374 @@
+# ssef_analysis_tool/bar_store.py
+
+# Import necessary libraries for the memory-mapped columnar bar store
+import os
+import json
+import time
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from dateutil import tz
+
+# Import additional modules from other files within the project
+from .utils import DATA_DIR
+
+# Columns held by the store and the dtype each one is written with
+BAR_COLUMNS = {
+    'time': np.int64,  # Bar opening time in nanoseconds since the epoch (UTC)
+    'Open': np.float64,
+    'High': np.float64,
+    'Low': np.float64,
+    'Close': np.float64,
+    'Volume': np.float64,
+}
+
+# Timezone in which naive datetimes (such as datetime.now()) are interpreted, following its daylight saving changes
+LOCAL_TIMEZONE = tz.tzlocal()
+
+def to_epoch_ns(timestamp):
+    """Converts a datetime or timestamp into nanoseconds since the epoch (UTC).
+
+    Args:
+        timestamp (datetime or pd.Timestamp): The time to convert. Naive times are treated as local time.
+
+    Returns:
+        int: The time in nanoseconds since the epoch.
+    """
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(LOCAL_TIMEZONE)
+    return timestamp.value
+
+def index_to_epoch_ns(index):
+    """Converts a DatetimeIndex into an int64 array of nanoseconds since the epoch (UTC).
+
+    Args:
+        index (pd.DatetimeIndex): The index to convert. Naive indexes are treated as local time.
+
+    Returns:
+        np.ndarray: The times in nanoseconds since the epoch.
+    """
+    if index.tz is None:
+        index = index.tz_localize(LOCAL_TIMEZONE)
+    # Go through datetime64[ns] explicitly, since the index may be stored at another resolution
+    return np.asarray(index.tz_convert('UTC').tz_localize(None), dtype='datetime64[ns]').view(np.int64)
+
+def from_epoch_ns(value):
+    """Converts nanoseconds since the epoch into a naive local datetime."""
+    return pd.Timestamp(value, tz='UTC').tz_convert(LOCAL_TIMEZONE).tz_localize(None).to_pydatetime()
+
+class BarSeries:
+    """Memory-mapped columns of one ticker's bars at one interval."""
+
+    def __init__(self, folder):
+        self.folder = folder  # Folder holding one binary file per column plus meta.json
+        self.meta = {}  # Timezone (or whether the bars had none), coverage and file version
+        self.columns = {}  # Maps each column name to its read-only memory map
+        self.reload()
+
+    def reload(self):
+        """Re-opens the column files, picking up bars appended since the last load."""
+        meta_path = os.path.join(self.folder, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+        for column, dtype in BAR_COLUMNS.items():
+            path = self._column_path(column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            # A zero-length file cannot be memory-mapped, so use an empty array instead
+            if size == 0:
+                self.columns[column] = np.empty(0, dtype=dtype)
+            else:
+                self.columns[column] = np.memmap(path, dtype=dtype, mode='r')
+
+    def _column_path(self, column, version=None):
+        """Returns the path of the file holding a column, in the current version unless another is given."""
+        # Every rewrite moves the series to new files; the first version keeps the original names
+        version = self.meta.get('version', 0) if version is None else version
+        name = f"{column}.bin" if version == 0 else f"{column}.v{version}.bin"
+        return os.path.join(self.folder, name)
+
+    @property
+    def naive(self):
+        """Whether the bars had no timezone (as yfinance's daily and longer bars); they are stored as UTC wall-clock times."""
+        return bool(self.meta.get('naive'))
+
+    def to_ns(self, timestamp):
+        """Converts a datetime into the series' stored time, keeping the wall-clock time of naive ones for naive series."""
+        timestamp = pd.Timestamp(timestamp)
+        if self.naive and timestamp.tzinfo is None:
+            return timestamp.tz_localize('UTC').value
+        return to_epoch_ns(timestamp)
+
+    def from_ns(self, value):
+        """Converts a stored time into a naive datetime comparable with those passed to to_ns."""
+        if self.naive:
+            return pd.Timestamp(value).to_pydatetime()
+        return from_epoch_ns(value)
+
+    def index_to_ns(self, index):
+        """Converts a DatetimeIndex into stored times; see to_ns."""
+        if self.naive:
+            # Only the calendar date and wall-clock time are kept, so they come back unchanged
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            return index_to_epoch_ns(index.tz_localize('UTC'))
+        if index.tz is None and self.meta.get('timezone'):
+            index = index.tz_localize(self.meta['timezone'])
+        return index_to_epoch_ns(index)
+
+    def __len__(self):
+        # Use the shortest column so a partially written append is never read
+        return min(len(values) for values in self.columns.values())
+
+    @property
+    def times(self):
+        """Bar opening times in nanoseconds since the epoch."""
+        return self.columns['time'][:len(self)]
+
+    def first_time(self):
+        """Returns the opening time of the first stored bar in nanoseconds, or None if the series is empty."""
+        return int(self.times[0]) if len(self) else None
+
+    def last_time(self):
+        """Returns the opening time of the last stored bar in nanoseconds, or None if the series is empty."""
+        return int(self.times[-1]) if len(self) else None
+
+    def index_range(self, start=None, end=None):
+        """Finds the rows whose times fall inside a range using binary search.
+
+        Args:
+            start (int, optional): The first time to include, in nanoseconds since the epoch.
+            end (int, optional): The last time to include, in nanoseconds since the epoch.
+
+        Returns:
+            tuple: The (first, stop) row positions of the range.
+        """
+        times = self.times
+        first = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        stop = len(times) if end is None else int(np.searchsorted(times, end, side='right'))
+        return first, stop
+
+    def view(self, start=None, end=None):
+        """Returns zero-copy views of every column for a time range.
+
+        Args:
+            start (int, optional): The first time to include, in nanoseconds since the epoch.
+            end (int, optional): The last time to include, in nanoseconds since the epoch.
+
+        Returns:
+            dict: Maps each column name to a read-only array view.
+        """
+        first, stop = self.index_range(start, end)
+        return {column: values[first:stop] for column, values in self.columns.items()}
+
+    def to_frame(self, start=None, end=None):
+        """Returns the bars in a time range as an OHLCV DataFrame backed by the memory-mapped columns."""
+        columns = self.view(start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(columns.pop('time')), utc=True))
+        # Show the bars in the exchange's timezone, or without one if they came without, as yfinance does
+        timezone = self.meta.get('timezone')
+        if self.naive:
+            index = index.tz_localize(None)
+        elif timezone:
+            index = index.tz_convert(timezone)
+        return pd.DataFrame(columns, index=index, copy=False)
+
+class BarStore:
+    """Append-only, memory-mapped columnar store of OHLCV bars per ticker and interval."""
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(DATA_DIR, 'bars')  # Folder holding every series
+        self.series = {}  # Open BarSeries, keyed by (ticker, interval)
+        self.lock = threading.RLock()  # Serializes writers and the series cache
+
+    def _folder(self, ticker, interval):
+        """Returns the folder holding a ticker's bars at an interval."""
+        return os.path.join(self.root, ticker.upper(), interval)
+
+    def open(self, ticker, interval):
+        """Returns the memory-mapped series for a ticker and interval (empty if nothing is stored yet)."""
+        key = (ticker.upper(), interval)
+        with self.lock:
+            if key not in self.series:
+                series = BarSeries(self._folder(ticker, interval))
+                if len(series) and 'timezone' not in series.meta and 'naive' not in series.meta:
+                    # Bars without a timezone used to be stored as local time, which shifted their dates;
+                    # such series are emptied once so the history is downloaded again
+                    series.meta = {'naive': True, 'version': series.meta.get('version', 0)}
+                    self._rewrite(series, pd.DataFrame(columns=list(BAR_COLUMNS)[1:], index=pd.DatetimeIndex([])))
+                self.series[key] = series
+            return self.series[key]
+
+    def read(self, ticker, interval, start=None, end=None):
+        """Returns the stored bars in a time range as a DataFrame.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            interval (str): The bar interval.
+            start (datetime, optional): The first time to include. Naive times are treated as local time,
+                or as wall-clock times for bars without a timezone.
+            end (datetime, optional): The last time to include, treated like start.
+
+        Returns:
+            pd.DataFrame: The OHLCV bars, indexed by timestamp (naive if they were written without a timezone).
+        """
+        series = self.open(ticker, interval)
+        start_ns = None if start is None else series.to_ns(start)
+        end_ns = None if end is None else series.to_ns(end)
+        return series.to_frame(start_ns, end_ns)
+
+    def write(self, ticker, interval, data, covered_from=None):
+        """Merges new bars into the store.
+
+        Bars newer than the last stored bar are appended, a bar with the same time as the last stored
+        bar replaces it (it may have been incomplete), and bars older than the first stored bar
+        trigger a one-off rewrite of the series with the older history in front. Bars written without a
+        timezone to a new series are stored as UTC wall-clock times and read back without one, so their
+        calendar dates do not depend on the machine's timezone.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            interval (str): The bar interval.
+            data (pd.DataFrame): The OHLCV bars to merge, indexed by timestamp.
+            covered_from (datetime, optional): The start of the range that was requested from the provider,
+                recorded so ranges before the first listed bar are not requested again.
+        """
+        with self.lock:
+            series = self.open(ticker, interval)
+            folder = self._folder(ticker, interval)
+            os.makedirs(folder, exist_ok=True)
+
+            if not data.empty:
+                if not len(series) and 'timezone' not in series.meta and 'naive' not in series.meta:
+                    series.meta['naive'] = data.index.tz is None
+                if data.index.tz is not None and not series.naive:
+                    series.meta.setdefault('timezone', str(data.index.tz))
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+                times = series.index_to_ns(data.index)
+                first, last = series.first_time(), series.last_time()
+
+                if first is not None and times[0] < first:
+                    # Backfill: rebuild the series with the older bars in front
+                    self._rewrite(series, pd.concat([data[times < first], series.to_frame()]))
+                    data, times = data[times >= first], times[times >= first]
+                    last = series.last_time()
+
+                if last is not None and len(times) and times[0] <= last:
+                    # Replace the last stored bar if it was resent, and skip anything older
+                    if last in times:
+                        self._overwrite_last(series, data[times == last])
+                    data, times = data[times > last], times[times > last]
+
+                if len(times):
+                    self._append(series, data, times)
+
+            # Remember how far back the provider has been asked, so empty history before listing is not refetched
+            if covered_from is not None:
+                covered_ns = series.to_ns(covered_from)
+                series.meta['covered_from'] = min(series.meta.get('covered_from', covered_ns), covered_ns)
+            self._write_meta(series)
+            series.reload()
+
+    def covered_from(self, ticker, interval):
+        """Returns the earliest time already requested from the provider (ns since the epoch), or None."""
+        series = self.open(ticker, interval)
+        covered = series.meta.get('covered_from')
+        first = series.first_time()
+        if covered is None:
+            return first
+        return covered if first is None else min(covered, first)
+
+    def _column_arrays(self, data, times):
+        """Returns the arrays to write for each column, cast to the store's dtypes."""
+        arrays = {'time': np.asarray(times, dtype=BAR_COLUMNS['time'])}
+        for column, dtype in BAR_COLUMNS.items():
+            if column != 'time':
+                values = data[column] if column in data.columns else np.zeros(len(data))
+                arrays[column] = np.asarray(values, dtype=dtype)
+        return arrays
+
+    def _append(self, series, data, times):
+        """Appends bars to the end of every column file."""
+        for column, values in self._column_arrays(data, times).items():
+            with open(series._column_path(column), 'ab') as f:
+                f.write(values.tobytes())
+
+    def _overwrite_last(self, series, row):
+        """Replaces the last stored bar in place."""
+        position = len(series) - 1
+        for column, values in self._column_arrays(row, series.index_to_ns(row.index)).items():
+            column_map = np.memmap(series._column_path(column), dtype=BAR_COLUMNS[column], mode='r+')
+            column_map[position] = values[-1]
+            column_map.flush()
+            del column_map
+
+    def _write_meta(self, series):
+        """Saves a series' meta.json, replacing the old file in one step."""
+        path = os.path.join(series.folder, 'meta.json')
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(series.meta, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _rewrite(self, series, data):
+        """Rewrites every column file from a complete frame.
+
+        The bars go to files of a new version and meta.json is switched to them, so files that frames
+        handed out earlier still map are never replaced (which Windows does not allow).
+        """
+        version = series.meta.get('version', 0) + 1
+        for column, values in self._column_arrays(data, series.index_to_ns(data.index)).items():
+            with open(series._column_path(column, version), 'wb') as f:
+                f.write(values.tobytes())
+        series.meta['version'] = version
+        self._write_meta(series)
+        series.reload()
+
+        # Remove the files of older versions; those still mapped are left for a later rewrite to remove
+        current = {os.path.basename(series._column_path(column)) for column in BAR_COLUMNS}
+        for name in os.listdir(series.folder):
+            if name.endswith('.bin') and name not in current:
+                try:
+                    os.remove(os.path.join(series.folder, name))
+                except OSError:
+                    pass
+
+# Shared store used by the history assembler, charts and simulations
+bar_store = BarStore()
+
+def check_timezone_round_trip(timezone='Europe/London'):
+    """Checks that daily bars without a timezone come back on the same dates when the machine runs in another timezone.
+
+    Args:
+        timezone (str, optional): The IANA timezone to run the check in. Defaults to 'Europe/London'.
+
+    Raises:
+        AssertionError: If a bar comes back on another date or a weekly bar lands in the wrong week.
+    """
+    # Switch the process to the timezone; the store must not depend on it for bars without one
+    os.environ['TZ'] = timezone
+    if hasattr(time, 'tzset'):
+        time.tzset()
+
+    # Daily bars in winter and summer, including Monday 2026-06-01, without a timezone as yfinance returns them
+    index = pd.DatetimeIndex(['2026-01-05', '2026-01-06', '2026-05-29', '2026-06-01', '2026-06-02'])
+    data = pd.DataFrame({column: np.arange(len(index), dtype=np.float64) for column in list(BAR_COLUMNS)[1:]},
+                        index=index)
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(root)
+        store.write('TEST', '1d', data.iloc[2:])
+        # Older bars trigger a rewrite, which must keep the dates as well
+        store.write('TEST', '1d', data.iloc[:2])
+        read = BarStore(root).read('TEST', '1d')
+        assert read.index.equals(index), f"Dates changed in {timezone}: {list(read.index)}"
+        assert read.loc['2026-06-01', 'Close'] == 3.0
+        # The Monday must open its own week
+        weeks = read.resample('W-MON', label='left', closed='left')['Close'].first().dropna()
+        assert pd.Timestamp('2026-06-01') in weeks.index, f"Monday 2026-06-01 fell in another week: {list(weeks.index)}"
+    print(f"Daily bars keep their dates in {timezone}")
+
+if __name__ == "__main__":
+    # Run with: python -m ssef_analysis_tool.bar_store [timezone]
+    import sys
+    check_timezone_round_trip(*sys.argv[1:2])
@@ -6,9 +6,9 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtChart import QChartView, QChart, QLineSeries, QAreaSeries, QValueAxis
 from PyQt5.QtGui import QPen, QColor, QBrush, QLinearGradient, QPainter
 from lightweight_charts.widgets import QtChart
-import yfinance as yf
-import datetime as dt
 import numpy as np
+import pandas as pd
+import time
 
 # Import additional styles used for charts from other files within the project
 from .styles import (
@@ -16,6 +16,13 @@ from .styles import (
     CHART_AXIS_LINE_COLOR, CHART_GRID_LINE_COLOR, CHART_SERIES_COLOR,
     CHART_SERIES_PEN_WIDTH, CHART_TITLE_FONT, CHART_LABEL_FONT, PDF_SERIES_COLOR, CDF_SERIES_COLOR
 )
+from .history import history_assembler
+from .live_quotes import get_quote_poller
+from .density import kde, kde_from_histogram, empirical_cdf, histogram_cdf
+from .memory import memory_manager
+
+# Seconds after which a cached chart frame is refreshed from the store instead of reused
+CHART_CACHE_TTL_SECONDS = 60
 
 class LightweightChartWidget(QWidget):
     """Widget for displaying financial charts using lightweight-charts."""
@@ -23,8 +30,13 @@ class LightweightChartWidget(QWidget):
     def __init__(self, parent=None):
         # Initialize the QWidget superclass
         super().__init__(parent)
+        self.is_live = False  # Whether the chart is receiving live quote updates
+        self.live_key = None  # The (ticker, timeframe) currently subscribed to the quote poller
         self.init_ui()  # Initialize the user interface components
         self.data_cache = {}  # Cache for storing fetched data to avoid redundant API calls
+        self.cache_times = {}  # Time at which each cache entry was fetched
+        # Frames evicted for memory are read back from the bar store when shown again
+        memory_manager.register(self, self.evict_cached_frame, 'Chart data')
 
     def init_ui(self):
         """Initializes the chart widget UI."""
@@ -38,7 +50,7 @@ class LightweightChartWidget(QWidget):
 
         # Create buttons for different timeframes to view chart data
         bottom_bar_layout = QHBoxLayout()
-        timeframes = ['1m', '5m', '30m', '1wk']
+        timeframes = ['1m', '5m', '15m', '30m', '1h', '1d', '1wk', '1mo']
         self.buttons = {}
         for tf in timeframes:
             button = QPushButton(tf)  # Create a button for each timeframe
@@ -46,6 +58,12 @@ class LightweightChartWidget(QWidget):
             bottom_bar_layout.addWidget(button)  # Add button to bottom bar layout
             self.buttons[tf] = button  # Store button in a dictionary for easy access
 
+        # Toggle button for live quote streaming
+        self.live_button = QPushButton('Live')
+        self.live_button.setCheckable(True)
+        self.live_button.toggled.connect(self.set_live_mode)
+        bottom_bar_layout.addWidget(self.live_button)
+
         layout.addLayout(bottom_bar_layout)  # Add the bottom bar with buttons to the main layout
 
         # Set default values for the current timeframe and ticker
@@ -66,30 +84,120 @@ class LightweightChartWidget(QWidget):
         print(f"Fetching data for ticker: {ticker}, timeframe: {timeframe}")
         cache_key = f"{ticker}_{timeframe}"  # Create a unique key for caching data
         
-        # Check if data is already cached to avoid redundant API calls
-        if cache_key in self.data_cache:
-            data = self.data_cache[cache_key]
+        # Check if data is already cached (and still fresh) to avoid redundant API calls
+        # (entries may be evicted by the memory manager from another thread, hence the single get)
+        is_fresh = time.time() - self.cache_times.get(cache_key, 0) < CHART_CACHE_TTL_SECONDS
+        data = self.data_cache.get(cache_key) if is_fresh else None
+        if data is not None:
+            memory_manager.touch(self, cache_key)
             print("Using cached data")
         else:
-            # Determine the start date based on the selected timeframe
-            if timeframe in ('1m', '5m', '30m'):
-                days = 7 if timeframe == '1m' else 60
-                start = dt.datetime.now() - dt.timedelta(days=days)
-            else:
-                start = None
-
-            # Fetch data using yfinance
-            data = yf.download(ticker, start=start, interval=timeframe)
+            # Assemble the history from the persistent store, downloading only missing windows
+            # (higher timeframes are resampled locally from their base bars)
+            start = time.perf_counter()
+            data = history_assembler.get_bars(ticker, timeframe)
             if data.empty:
                 print(f"No data found for {ticker}")  # Log if no data is found
                 return False
 
-            self.data_cache[cache_key] = data  # Cache the fetched data
+            self.cache_frame(cache_key, data, time.perf_counter() - start)
+
+        self.show_bars(ticker, timeframe, data)
+        return True
+
+    def show_stored(self, ticker, timeframe=None):
+        """Shows the bars already in the bar store without any download, e.g. when restoring a session.
+
+        Returns:
+            bool: False if nothing is stored for the ticker and timeframe.
+        """
+        self.current_ticker = ticker.upper()
+        if timeframe is not None:
+            self.current_timeframe = timeframe
+            self.update_button_styles()
+        data = history_assembler.get_stored_bars(self.current_ticker, self.current_timeframe)
+        if data.empty:
+            return False
+        # Not cached, so the next update_chart brings the bars up to date
+        self.show_bars(self.current_ticker, self.current_timeframe, data)
+        return True
+
+    def cache_frame(self, cache_key, data, cost=None):
+        """Caches a fresh frame and reports its size to the memory manager."""
+        self.data_cache[cache_key] = data
+        self.cache_times[cache_key] = time.time()
+        memory_manager.track(self, cache_key, data, cost=cost)
 
+    def show_bars(self, ticker, timeframe, data):
+        """Puts bars on the chart, following them with live updates when streaming."""
         # Update the chart with the new data
         self.chart.set(data)
         print(f"Chart updated for ticker: {ticker}")
-        return True
+
+        # Follow the newly displayed ticker and timeframe when streaming
+        if self.is_live:
+            self.subscribe_live(ticker, timeframe, data)
+
+    def set_live_mode(self, enabled):
+        """Turns live quote streaming on or off."""
+        self.is_live = enabled
+        poller = get_quote_poller()
+        if enabled:
+            poller.bar_updated.connect(self.on_live_bar)
+            data = self.data_cache.get(f"{self.current_ticker}_{self.current_timeframe}")
+            if data is not None:
+                self.subscribe_live(self.current_ticker, self.current_timeframe, data)
+        else:
+            poller.bar_updated.disconnect(self.on_live_bar)
+            self.unsubscribe_live()
+        self.update_button_styles()
+
+    def subscribe_live(self, ticker, timeframe, data):
+        """Subscribes the chart to live bars for a ticker and timeframe, continuing from the last bar shown."""
+        self.unsubscribe_live()
+        last = data.iloc[-1]
+        last_bar = {
+            'time': data.index[-1],
+            'open': float(last['Open']),
+            'high': float(last['High']),
+            'low': float(last['Low']),
+            'close': float(last['Close']),
+            'volume': float(last.get('Volume', 0)),
+        }
+        get_quote_poller().subscribe(ticker, timeframe, last_bar)
+        self.live_key = (ticker.upper(), timeframe)
+
+    def unsubscribe_live(self):
+        """Removes the chart's current live subscription, if any."""
+        if self.live_key is not None:
+            get_quote_poller().unsubscribe(*self.live_key)
+            self.live_key = None
+
+    def on_live_bar(self, ticker, timeframe, bar):
+        """Pushes an aggregated live bar to the chart as an incremental update."""
+        # The poller is shared, so ignore bars for other views
+        if (ticker, timeframe) != self.live_key:
+            return
+
+        # Keep the cached frame in step so switching timeframes back does not show stale data
+        cache_key = f"{ticker}_{timeframe}"
+        data = self.data_cache.get(cache_key)
+        if data is not None:
+            row = pd.DataFrame(
+                [[bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']]],
+                columns=['Open', 'High', 'Low', 'Close', 'Volume'], index=[bar['time']]
+            )
+            data = pd.concat([data[data.index != bar['time']], row])
+            self.data_cache[cache_key] = data
+            memory_manager.track(self, cache_key, data)
+
+        # Only the changed bar is sent to the chart
+        self.chart.update(pd.Series(bar))
+
+    def evict_cached_frame(self, cache_key):
+        """Drops a cached frame when the memory manager needs the space."""
+        self.data_cache.pop(cache_key, None)
+        self.cache_times.pop(cache_key, None)
 
     def on_timeframe_selection(self, timeframe):
         """Handles timeframe selection when a button is clicked."""
@@ -100,8 +208,8 @@ class LightweightChartWidget(QWidget):
 
     def update_button_styles(self):
         """Updates the styles of the timeframe buttons."""
-        for tf, button in self.buttons.items():
-            if tf == self.current_timeframe:
+        for tf, button in list(self.buttons.items()) + [('Live', self.live_button)]:
+            if tf == self.current_timeframe or (tf == 'Live' and self.is_live):
                 # Apply active button style for the selected timeframe
                 button.setStyleSheet("""
                     QPushButton {
@@ -144,28 +252,33 @@ class QtChartsWidget(QWidget):
         self.layout.addWidget(self.pdf_chart_view)
         self.layout.addWidget(self.cdf_chart_view)
 
-    def plot_simulation_results(self, final_prices, ticker, currency):
-        """Plots the simulation results using PDF and CDF charts."""
-        # Calculate histogram data for PDF and CDF
-        hist, bins = np.histogram(final_prices, bins=50)
-        pdf = hist / sum(hist)  # Calculate probability density function (PDF)
-        cdf = np.cumsum(pdf)  # Calculate cumulative distribution function (CDF)
-        pdf_smooth = np.convolve(pdf, np.ones(5)/5, mode='same')  # Smooth the PDF for better visualization
+    def plot_simulation_results(self, final_prices, ticker, currency, summary=None):
+        """Plots the simulation results using PDF and CDF charts, with an optional summary line in the PDF title."""
+        # Estimate the density with an FFT kernel density estimate and evaluate the exact empirical CDF on its grid
+        grid, pdf = kde(final_prices)
+        cdf = empirical_cdf(final_prices, grid)
 
         stock_name = ticker.upper()  # Get the stock name in uppercase
+        self.plot_pdf(grid, pdf, stock_name, currency, summary)
+        self.plot_cdf(grid, cdf, stock_name, currency)
 
-        # Plot PDF chart
-        self.plot_pdf(bins[:-1], pdf_smooth, stock_name, currency)
+    def plot_histogram(self, hist, bins, ticker, currency, summary=None):
+        """Plots PDF and CDF charts from a precomputed histogram of simulated prices."""
+        # Smooth the binned prices with an FFT kernel density estimate; the CDF is exact at the bin edges
+        grid, pdf = kde_from_histogram(hist, bins)
+        edges, cdf = histogram_cdf(hist, bins)
 
-        # Plot CDF chart
-        self.plot_cdf(bins[:-1], cdf, stock_name, currency)
+        stock_name = ticker.upper()  # Get the stock name in uppercase
+        self.plot_pdf(grid, pdf, stock_name, currency, summary)
+        self.plot_cdf(edges, cdf, stock_name, currency)
 
-    def plot_pdf(self, bins, pdf_smooth, stock_name, currency):
+    def plot_pdf(self, bins, pdf, stock_name, currency, summary=None):
         """Plots the Probability Density Function (PDF)."""
         # Clear previous chart
         pdf_chart = QChart()
         pdf_chart.legend().hide()  # Hide legend for PDF
-        pdf_chart.setTitle(f"{stock_name} - PDF of Simulated Prices")
+        title = f"{stock_name} - PDF of Simulated Prices"
+        pdf_chart.setTitle(f"{title}<br>{summary}" if summary else title)
         pdf_chart.setTitleFont(CHART_TITLE_FONT)
         pdf_chart.setTitleBrush(QColor(CHART_TITLE_COLOR))
         pdf_chart.setBackgroundBrush(QColor(CHART_BACKGROUND_COLOR))
@@ -177,7 +290,7 @@ class QtChartsWidget(QWidget):
         pdf_series.setPen(pen)
 
         # Add data points to the PDF series
-        for x, y in zip(bins, pdf_smooth):
+        for x, y in zip(bins, pdf):
             pdf_series.append(x, y)
 
         # Add the series to the chart
@@ -192,14 +305,14 @@ class QtChartsWidget(QWidget):
 
         # Set axes labels and fonts
         axis_x.setTitleText(f"Price ({currency})")
-        axis_y.setTitleText("Probability")
+        axis_y.setTitleText("Probability Density")
         axis_x.setTitleFont(CHART_LABEL_FONT)
         axis_y.setTitleFont(CHART_LABEL_FONT)
         axis_x.setLabelsFont(CHART_LABEL_FONT)
         axis_y.setLabelsFont(CHART_LABEL_FONT)
 
         # Set the updated chart to the chart view
-        self.pdf_chart_view.setChart(pdf_chart)
+        self.replace_chart(self.pdf_chart_view, pdf_chart)
         self.pdf_chart_view.setRenderHint(QPainter.Antialiasing)
 
     def plot_cdf(self, bins, cdf, stock_name, currency):
@@ -241,9 +354,17 @@ class QtChartsWidget(QWidget):
         axis_y.setLabelsFont(CHART_LABEL_FONT)
 
         # Set the updated chart to the chart view
-        self.cdf_chart_view.setChart(cdf_chart)
+        self.replace_chart(self.cdf_chart_view, cdf_chart)
         self.cdf_chart_view.setRenderHint(QPainter.Antialiasing)
 
+    @staticmethod
+    def replace_chart(view, chart):
+        """Shows a new chart in a view and deletes the previous one, which the view does not delete itself."""
+        previous = view.chart()
+        view.setChart(chart)
+        if previous is not None:
+            previous.deleteLater()
+
     def customize_axis(self, axis):
         """Customizes the appearance of an axis."""
         # Set axis line color
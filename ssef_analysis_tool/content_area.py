@@ -4,21 +4,37 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QStackedWidget, QTextEdit, QTableWidget, QMessageBox
 )
-from PyQt5.QtCore import QThread
 
 # Import additional modules from other files within the project
 from .chart_widgets import LightweightChartWidget, QtChartsWidget
-from .simulations import SimulationWorker
+from .jobs import get_job_manager
+from .simulations import simulate_ticker
+from .kernels import simulate_ticker_path_risk
+from .ratios import RatioPanel
+from .scenarios import ScenarioSweepPanel
+from .backtest import BacktestPanel
+from .watchlist import WatchlistDashboard
+from .memory import memory_manager
 from .styles import CONTENT_AREA_STYLE, TEXT_EDIT_STYLE, TABLE_STYLE
 
 class ContentArea(QWidget):
-    """Main content area that displays different widgets."""
+    """Main content area that displays different widgets.
 
-    def __init__(self, parent=None):
+    Each workspace tab of the main window is a content area with its own ticker and view, while the
+    data caches, the job pool and the simulation results are shared by all of them.
+    """
+
+    def __init__(self, parent=None, last_simulations=None, last_path_risk=None):
         # Initialize the QWidget superclass
         super().__init__(parent)
         self.parent = parent  # Reference to MainWindow
 
+        # Ticker, currency symbol and view shown in this workspace
+        self.current_ticker = None
+        self.currency = "$"
+        self.current_view = "Information"
+        self.requested_simulation = None  # Ticker whose simulation this workspace is waiting for
+
         # Initialize the user interface and apply styles
         self.init_ui()
         self.apply_styles()
@@ -26,9 +42,16 @@ class ContentArea(QWidget):
         # Attribute to store current stock information text
         self.stock_info_text = ""
 
-        # Attributes for managing threading during simulations
-        self.simulation_thread = None
-        self.simulation_worker = None
+        # Simulations run on the application's shared job pool; results arrive through its signals
+        self.jobs = get_job_manager()
+        self.jobs.progress.connect(self.on_job_progress)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.error.connect(self.on_job_error)
+
+        # Last simulation run for each ticker, shared by the workspaces and reused by the risk report
+        self.last_simulations = last_simulations if last_simulations is not None else {}
+        # Drawdown and stop-loss statistics of each ticker's simulated paths, shared like the simulations
+        self.last_path_risk = last_path_risk if last_path_risk is not None else {}
 
     def init_ui(self):
         """Initializes the content area UI components."""
@@ -50,6 +73,18 @@ class ContentArea(QWidget):
         self.financial_table = QTableWidget()  # Widget for displaying financial data tables
         self.stack.addWidget(self.financial_table)  # Add table widget to the stack
 
+        self.ratio_panel = RatioPanel()  # Panel of financial ratios for the ticker and its peers
+        self.stack.addWidget(self.ratio_panel)  # Add the ratio panel to the stack
+
+        self.scenario_panel = ScenarioSweepPanel()  # Panel for sweeping drift, volatility and horizon scenarios
+        self.stack.addWidget(self.scenario_panel)  # Add the scenario panel to the stack
+
+        self.backtest_panel = BacktestPanel()  # Panel for backtesting strategies over parameter grids
+        self.stack.addWidget(self.backtest_panel)  # Add the backtest panel to the stack
+
+        self.watchlist = WatchlistDashboard()  # Dashboard of live sparklines for many tickers
+        self.stack.addWidget(self.watchlist)  # Add the watchlist to the stack
+
         self.simulation_chart = None  # Placeholder for simulation chart (initialized later)
 
     def apply_styles(self):
@@ -73,6 +108,7 @@ class ContentArea(QWidget):
 
     def display_widget(self, widget_name):
         """Displays the specified widget in the content area."""
+        self.current_view = widget_name
         # Display the corresponding widget based on the widget name
         if widget_name == "Information":
             self.info_text.setText(self.stock_info_text)
@@ -88,26 +124,79 @@ class ContentArea(QWidget):
         elif widget_name == "Cash Flow":
             self.display_financial_statement('cash_flow')
             self.stack.setCurrentWidget(self.financial_table)
+        elif widget_name == "Ratios":
+            if not self.current_ticker:
+                QMessageBox.warning(self, "Warning", "Please enter a valid ticker symbol.")
+                return
+            self.ratio_panel.set_ticker(self.current_ticker)
+            self.stack.setCurrentWidget(self.ratio_panel)
         elif widget_name == "Risk Statistics":
             self.display_risk_statistics()
         elif widget_name == "Simulate Prices":
             self.run_simulation()
+        elif widget_name == "Scenario Sweep":
+            # The sweep runs for the ticker currently selected in the main window
+            self.scenario_panel.set_ticker(self.current_ticker, self.currency)
+            self.stack.setCurrentWidget(self.scenario_panel)
+        elif widget_name == "Backtest":
+            # The current ticker is only a default; any list of tickers can be backtested
+            self.backtest_panel.set_ticker(self.current_ticker)
+            self.stack.setCurrentWidget(self.backtest_panel)
+        elif widget_name == "Watchlist":
+            self.stack.setCurrentWidget(self.watchlist)
         else:
             # Handle other widgets or show a default view (not implemented)
             pass
 
-    def display_financial_statement(self, statement_type):
-        """Displays the financial statement in the table widget."""
+    def restore_view(self, widget_name):
+        """Shows a view from cached data only, as left at the end of the previous session.
+
+        Views whose data is not cached fall back to the information view until the user opens them again.
+        """
+        self.current_view = widget_name
+        statement_types = {'Income Statement': 'income', 'Balance Sheet': 'balance', 'Cash Flow': 'cash_flow'}
+        if widget_name in statement_types:
+            if not self.display_financial_statement(statement_types[widget_name], cached_only=True):
+                self.stack.setCurrentWidget(self.info_text)
+        elif widget_name == "Risk Statistics":
+            self.display_risk_statistics(cached_only=True)
+        elif widget_name == "Simulate Prices":
+            record = self.last_simulations.get(self.current_ticker)
+            if record is not None:
+                self.on_simulation_complete(self.current_ticker, record)
+            else:
+                self.stack.setCurrentWidget(self.info_text)
+        elif widget_name == "Ratios":
+            # Ratios are computed in the background from the cached statements
+            self.display_widget(widget_name)
+        elif widget_name in ("Graphs", "Scenario Sweep", "Backtest", "Watchlist", "Information"):
+            self.display_widget(widget_name)
+
+    def display_financial_statement(self, statement_type, cached_only=False):
+        """Displays the financial statement in the table widget.
+
+        Args:
+            statement_type (str): 'income', 'balance' or 'cash_flow'.
+            cached_only (bool, optional): Show the cached statement whatever its age, without downloading.
+
+        Returns:
+            bool: True if a statement was shown.
+        """
         # Retrieve the current ticker from the parent MainWindow
-        ticker = self.parent.current_ticker
+        ticker = self.current_ticker
         if not ticker:
             # Display warning if no ticker is selected
             QMessageBox.warning(self, "Warning", "Please enter a valid ticker symbol.")
-            return
+            return False
 
         # Fetch financial data for the specified statement type
-        from .data_fetching import fetch_financial_statement
-        dataframe = fetch_financial_statement(ticker, statement_type)
+        from .data_fetching import fetch_financial_statement, statement_cache
+        if cached_only:
+            dataframe = statement_cache.peek(ticker, statement_type)
+            if dataframe is None or dataframe.empty:
+                return False
+        else:
+            dataframe = fetch_financial_statement(ticker, statement_type)
 
         # Display warning if the dataframe is empty (no data found)
         if dataframe.empty:
@@ -116,41 +205,70 @@ class ContentArea(QWidget):
                 "Warning",
                 f"No data available for {statement_type.replace('_', ' ').title()}.",
             )
-            return
+            return False
 
         # Update the table widget with the fetched financial data
         from .financial_data_display import display_financial_data
-        display_financial_data(self.financial_table, dataframe, currency=self.parent.currency)
+        display_financial_data(self.financial_table, dataframe, currency=self.currency)
 
         # Re-apply the stylesheet to ensure correct styles after updating the table
         self.financial_table.setStyleSheet(TABLE_STYLE)
 
         # Switch to the table view to display financial data
         self.stack.setCurrentWidget(self.financial_table)
+        return True
 
-    def display_risk_statistics(self):
-        """Displays risk statistics in the info text widget."""
+    def display_risk_statistics(self, cached_only=False):
+        """Displays risk statistics in the info text widget, from cached ticker info only if cached_only is set."""
         # Retrieve the current ticker from the parent MainWindow
-        ticker = self.parent.current_ticker
+        ticker = self.current_ticker
         if not ticker:
             # Display warning if no ticker is selected
             QMessageBox.warning(self, "Warning", "Please enter a valid ticker symbol.")
             return
 
-        # Fetch risk data such as beta value
-        from .data_fetching import fetch_ticker_info
-        info = fetch_ticker_info(ticker)
+        # Fetch only the beta, which is usually served from the ticker info cache
+        from .data_fetching import fetch_ticker_info, ticker_info_cache
+        from .utils import format_age
+        info = ticker_info_cache.peek(ticker, ['beta']) if cached_only else fetch_ticker_info(ticker, ['beta'])
 
         # Format and display the risk statistics
         beta = info.get('beta', 'N/A')
-        risk_message = f"Beta for {ticker}: {beta}"
+        risk_message = f"Beta for {ticker}: {beta}{format_age(info.age('beta'))}"
+
+        # Report the value at risk from the same simulation the analyst last looked at
+        record = self.last_simulations.get(ticker)
+        if record is not None:
+            currency = self.currency
+            risk_message += f"\n\nFrom the last price simulation ({record.num_paths} paths, start {currency}{record.S0:.2f}):"
+            for level in (0.95, 0.99):
+                risk_message += f"\n{level:.0%} Value at Risk (per share): {currency}{record.value_at_risk(level):.2f}"
+            shortfall = record.expected_shortfall(0.95)
+            if shortfall is not None:
+                risk_message += f"\n95% Expected Shortfall (per share): {currency}{shortfall:.2f}"
+
+        # Path-dependent statistics come from their own simulation, run in the background on first request
+        # (also for a report restored from cached data, since the job does not hold up the window)
+        path_risk = self.last_path_risk.get(ticker)
+        if path_risk is not None:
+            currency = self.currency
+            risk_message += (f"\n\nFrom {path_risk['num_paths']} simulated one-year price paths:"
+                             f"\nMedian maximum drawdown: {path_risk['median_drawdown']:.1%}"
+                             f"\n95th percentile maximum drawdown: {path_risk['drawdown_95']:.1%}"
+                             f"\nChance of touching a stop-loss at {currency}{path_risk['stop_loss']:.2f}: "
+                             f"{path_risk['stop_probability']:.1%}"
+                             f"\nMean price with / without the stop-loss: {currency}{path_risk['mean_exit']:.2f}"
+                             f" / {currency}{path_risk['mean_terminal']:.2f}")
+        else:
+            risk_message += "\n\nSimulating drawdowns and stop-loss exits..."
+            self.jobs.submit(('path_risk', ticker), simulate_ticker_path_risk, ticker, tag=ticker)
         self.update_info_text(risk_message)
         self.stack.setCurrentWidget(self.info_text)
 
     def run_simulation(self):
         """Runs the GBM (Geometric Brownian Motion) simulation and displays the results."""
         # Retrieve the current ticker from the parent MainWindow
-        ticker = self.parent.current_ticker
+        ticker = self.current_ticker
         if not ticker:
             # Display warning if no ticker is selected
             QMessageBox.warning(self, "Warning", "Please enter a valid ticker symbol.")
@@ -160,33 +278,91 @@ class ContentArea(QWidget):
         self.update_info_text("Running simulation...")
         self.stack.setCurrentWidget(self.info_text)
 
-        # Start the simulation in a new thread to avoid blocking the UI
-        self.simulation_thread = QThread()
-        self.simulation_worker = SimulationWorker(ticker)
-        self.simulation_worker.moveToThread(self.simulation_thread)
-
-        # Connect signals to manage thread start, completion, and error handling
-        self.simulation_thread.started.connect(self.simulation_worker.run)
-        self.simulation_worker.finished.connect(self.on_simulation_complete)
-        self.simulation_worker.error.connect(self.on_simulation_error)
-        self.simulation_worker.finished.connect(self.simulation_thread.quit)
-        self.simulation_worker.finished.connect(self.simulation_worker.deleteLater)
-        self.simulation_thread.finished.connect(self.simulation_thread.deleteLater)
+        # Queue the simulation on the job pool; repeated clicks (from any workspace) join the job already queued or running
+        self.requested_simulation = ticker
+        self.jobs.submit(('simulate', ticker), simulate_ticker, ticker, tag=ticker)
+
+    def set_ticker(self, ticker, currency):
+        """Shows a new ticker in this workspace and cancels the background jobs no workspace needs any more.
+
+        Args:
+            ticker (str): The ticker symbol.
+            currency (str): The currency symbol its prices are shown in.
+        """
+        self.current_ticker = ticker
+        self.currency = currency
+        self.requested_simulation = None
+        # Jobs for tickers still open in another workspace keep running
+        self.jobs.cancel(keep_tags=self.parent.workspace_tickers())
+
+    def session_state(self):
+        """Returns the workspace's view state for the session snapshot."""
+        return {
+            'ticker': self.current_ticker,
+            'currency': self.currency,
+            'view': self.current_view,
+            'timeframe': self.chart_widget.current_timeframe,
+            'watchlist': list(self.watchlist.tiles),
+            'peers': self.ratio_panel.peers_entry.text(),
+            'backtest_tickers': self.backtest_panel.tickers_entry.text(),
+        }
+
+    def close_workspace(self):
+        """Releases the workspace's live subscriptions, cached memory and jobs before it is deleted."""
+        self.current_ticker = None
+        self.chart_widget.live_button.setChecked(False)
+        self.watchlist.set_tickers([])
+        for owner in (self.chart_widget, self.scenario_panel, self.backtest_panel):
+            memory_manager.unregister(owner)
+        # The backtest is not tied to a ticker, so it is cancelled by its key
+        if self.backtest_panel.job_key is not None:
+            self.jobs.cancel(key=self.backtest_panel.job_key)
+        self.jobs.cancel(keep_tags=self.parent.workspace_tickers())
+
+    def on_job_progress(self, key, percent):
+        """Shows the progress of the simulation this workspace is waiting for."""
+        if key == ('simulate', self.requested_simulation) and self.stack.currentWidget() is self.info_text:
+            self.update_info_text(f"Running simulation... {percent}%")
+
+    def on_job_finished(self, key, result):
+        """Handles a finished simulation job."""
+        if key[0] == 'simulate':
+            # Every workspace keeps the result, but only those that asked for it switch to the chart
+            self.last_simulations[key[1]] = result
+            if key[1] == self.requested_simulation:
+                self.requested_simulation = None
+                self.on_simulation_complete(key[1], result)
+        elif key[0] == 'path_risk':
+            self.last_path_risk[key[1]] = result
+            # Refresh the risk report if it is still showing this ticker
+            if key[1] == self.current_ticker and self.current_view == "Risk Statistics":
+                self.display_risk_statistics(cached_only=True)
+
+    def on_job_error(self, key, error_message):
+        """Handles a failed simulation job this workspace is waiting for."""
+        if key == ('simulate', self.requested_simulation):
+            self.requested_simulation = None
+            self.on_simulation_error(error_message)
+        elif key[0] == 'path_risk':
+            print(f"Error simulating path risk for {key[1]}: {error_message}")
+
+    def on_simulation_complete(self, ticker, record):
+        """Callback function when simulation is complete."""
+        # Remember the run so the risk report uses the same simulation
+        self.last_simulations[ticker] = record
 
-        # Start the simulation thread
-        self.simulation_thread.start()
+        # Results for a ticker that is no longer selected are kept but not shown
+        if ticker != self.current_ticker:
+            return
 
-    def on_simulation_complete(self, final_prices):
-        """Callback function when simulation is complete."""
         # Initialize the simulation chart if it hasn't been created yet
         if self.simulation_chart is None:
             self.simulation_chart = QtChartsWidget()
             self.stack.addWidget(self.simulation_chart)
 
-        # Plot the simulation results on the chart widget
-        self.simulation_chart.plot_simulation_results(
-            final_prices, self.parent.current_ticker, self.parent.currency
-        )
+        # Plot the simulation results on the chart widget, with the precision of the mean price estimate
+        summary = f"Mean {self.currency}{record.estimate:.2f} \u00b1 {record.stderr:.2f} (SE, {record.num_paths} paths)"
+        self.simulation_chart.plot_histogram(record.histogram, record.bin_edges, ticker, self.currency, summary)
         # Switch to the simulation chart view
         self.stack.setCurrentWidget(self.simulation_chart)
 
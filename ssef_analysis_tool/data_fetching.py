@@ -1,29 +1,72 @@
 # ssef_analysis_tool/data_fetching.py
 
 # Import necessary libraries for data fetching
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
 import pandas as pd
 
-def fetch_ticker_info(ticker):
-    """Fetches ticker information from Yahoo Finance.
+# Import additional modules from other files within the project
+from .utils import DATA_DIR, KeyedLock
+from .memory import memory_manager
+
+# Statement types that can be fetched
+STATEMENT_TYPES = ('income', 'balance', 'cash_flow')
+# Seconds a fetched statement is reused before it is checked for a new period (statements change quarterly)
+STATEMENT_TTL_SECONDS = 24 * 3600
+# Number of parallel downloads when statements for many tickers are fetched at once
+STATEMENT_FETCH_WORKERS = 8
+
+# Seconds ticker info fields are reused: descriptive fields rarely change, market-driven ones quickly do
+SLOW_FIELD_TTL_SECONDS = 7 * 24 * 3600
+DAILY_FIELD_TTL_SECONDS = 24 * 3600
+MARKET_FIELD_TTL_SECONDS = 15 * 60
+# Ticker info fields used by the UI: name -> (source, TTL). 'fast' fields come from the light
+# fast_info request, 'info' fields need the full (slow) info request.
+INFO_FIELDS = {
+    'longName': ('info', SLOW_FIELD_TTL_SECONDS),
+    'sector': ('info', SLOW_FIELD_TTL_SECONDS),
+    'fullTimeEmployees': ('info', SLOW_FIELD_TTL_SECONDS),
+    'longBusinessSummary': ('info', SLOW_FIELD_TTL_SECONDS),
+    'website': ('info', SLOW_FIELD_TTL_SECONDS),
+    'currency': ('fast', SLOW_FIELD_TTL_SECONDS),
+    'bookValue': ('info', DAILY_FIELD_TTL_SECONDS),
+    'marketCap': ('fast', MARKET_FIELD_TTL_SECONDS),
+    'forwardPE': ('info', MARKET_FIELD_TTL_SECONDS),
+    'beta': ('info', MARKET_FIELD_TTL_SECONDS),
+    'dividendYield': ('info', MARKET_FIELD_TTL_SECONDS),
+}
+
+def fetch_ticker_info(ticker, fields=None):
+    """Fetches ticker information from Yahoo Finance through the shared ticker info cache.
     
     Args:
         ticker (str): The stock ticker symbol to fetch information for.
+        fields (list, optional): The fields needed (keys of INFO_FIELDS). Defaults to all of them.
         
     Returns:
-        dict: A dictionary containing the stock's information, such as its name, market cap, sector, etc.
+        TickerInfo: A dictionary of the stock's information, such as its name, market cap, sector, etc.,
+            which also records how old each field is.
     """
-    # Create an instance of the Ticker class from yfinance for the given ticker symbol
-    stock = yf.Ticker(ticker)
-    
-    # Get the stock information in the form of a dictionary
-    info = stock.info
-    
-    # Return the stock information
-    return info
+    return ticker_info_cache.get(ticker, fields)
 
 def fetch_financial_statement(ticker, statement_type):
-    """Fetches financial statements (income, balance sheet, cash flow) and reorders columns.
+    """Fetches financial statements (income, balance sheet, cash flow) through the shared statement cache.
+    
+    Args:
+        ticker (str): The stock ticker symbol to fetch financial data for.
+        statement_type (str): The type of financial statement to fetch ('income', 'balance', 'cash_flow').
+        
+    Returns:
+        pd.DataFrame: A DataFrame containing the financial statement data, with columns arranged from oldest to newest.
+    """
+    return statement_cache.get(ticker, statement_type)
+
+def download_financial_statement(ticker, statement_type):
+    """Downloads financial statements (income, balance sheet, cash flow) and reorders columns.
     
     Args:
         ticker (str): The stock ticker symbol to fetch financial data for.
@@ -53,4 +96,286 @@ def fetch_financial_statement(ticker, statement_type):
     dataframe = dataframe.iloc[:, ::-1]
     
     # Return the processed DataFrame
-    return dataframe
\ No newline at end of file
+    return dataframe
+
+class StatementCache:
+    """Financial statements kept in memory and on disk, refreshed once they are older than a TTL."""
+
+    def __init__(self, folder=None, ttl=STATEMENT_TTL_SECONDS):
+        self.folder = folder or os.path.join(DATA_DIR, 'statements')  # Folder of the on-disk copies
+        self.ttl = ttl  # Seconds before a statement is downloaded again
+        self.frames = {}  # Maps (ticker, statement type) to (fetch time, DataFrame)
+        self.lock = threading.Lock()  # Statements may be fetched from several worker threads
+        self.fetch_lock = KeyedLock()  # Concurrent requests for the same statement download it once
+        # Statements evicted for memory are read back from their files
+        memory_manager.register(self, self._evict, 'Financial statements')
+
+    def _path(self, ticker, statement_type):
+        """Returns the file holding a statement on disk."""
+        return os.path.join(self.folder, f"{ticker.upper()}_{statement_type}.pkl")
+
+    def get(self, ticker, statement_type):
+        """Returns a statement from memory or disk while it is fresh, downloading it otherwise.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            statement_type (str): 'income', 'balance' or 'cash_flow'.
+
+        Returns:
+            pd.DataFrame: The statement with columns from oldest to newest (empty if unavailable).
+        """
+        key = (ticker.upper(), statement_type)
+        with self.lock:
+            cached = self.frames.get(key)
+        if cached is not None and time.time() - cached[0] < self.ttl:
+            memory_manager.touch(self, key)
+            return cached[1]
+
+        # Only one thread loads a given statement; the others wait and then read it from memory
+        with self.fetch_lock(key):
+            with self.lock:
+                cached = self.frames.get(key)
+            if cached is not None and time.time() - cached[0] < self.ttl:
+                return cached[1]
+            return self._fetch(ticker, statement_type, key, cached)
+
+    def _fetch(self, ticker, statement_type, key, cached):
+        """Loads a statement that is missing or stale in memory from disk, or downloads it."""
+        # Fall back to the copy on disk, which survives restarts
+        path = self._path(ticker, statement_type)
+        stale = cached
+        start = time.perf_counter()
+        if cached is None and os.path.exists(path):
+            try:
+                stale = (os.path.getmtime(path), pd.read_pickle(path))
+            except Exception as e:
+                print(f"Discarding unreadable statement file {path}: {e}")
+            if stale is not None and time.time() - stale[0] < self.ttl:
+                with self.lock:
+                    self.frames[key] = stale
+                memory_manager.track(self, key, stale[1], cost=time.perf_counter() - start)
+                return stale[1]
+
+        try:
+            dataframe = download_financial_statement(ticker, statement_type)
+        except Exception as e:
+            # Keep serving the old statement if the download fails
+            if stale is not None:
+                print(f"Using cached {statement_type} statement for {ticker}: {e}")
+                return stale[1]
+            raise
+
+        os.makedirs(self.folder, exist_ok=True)
+        dataframe.to_pickle(path)
+        with self.lock:
+            self.frames[key] = (time.time(), dataframe)
+        memory_manager.track(self, key, dataframe, cost=time.perf_counter() - start)
+        return dataframe
+
+    def _evict(self, key):
+        """Drops a statement from memory when the memory manager needs the space."""
+        with self.lock:
+            self.frames.pop(key, None)
+
+    def peek(self, ticker, statement_type):
+        """Returns a statement from memory or disk whatever its age, without downloading it.
+
+        Returns:
+            pd.DataFrame: The cached statement, or None if it was never fetched.
+        """
+        key = (ticker.upper(), statement_type)
+        with self.lock:
+            cached = self.frames.get(key)
+        if cached is not None:
+            memory_manager.touch(self, key)
+            return cached[1]
+        path = self._path(ticker, statement_type)
+        if not os.path.exists(path):
+            return None
+        try:
+            cached = (os.path.getmtime(path), pd.read_pickle(path))
+        except Exception as e:
+            print(f"Discarding unreadable statement file {path}: {e}")
+            return None
+        with self.lock:
+            self.frames.setdefault(key, cached)
+        memory_manager.track(self, key, cached[1])
+        return cached[1]
+
+    def get_all(self, ticker):
+        """Returns all three statements of a ticker as a dict keyed by statement type."""
+        return {statement_type: self.get(ticker, statement_type) for statement_type in STATEMENT_TYPES}
+
+    def get_many(self, tickers, max_workers=STATEMENT_FETCH_WORKERS):
+        """Fetches the statements of many tickers in parallel.
+
+        Args:
+            tickers (list): The ticker symbols.
+            max_workers (int, optional): Number of parallel downloads.
+
+        Returns:
+            dict: Maps each ticker to its statements; tickers whose download failed are left out.
+        """
+        def fetch(ticker):
+            try:
+                return ticker, self.get_all(ticker)
+            except Exception as e:
+                print(f"Failed to fetch statements for {ticker}: {e}")
+                return ticker, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(fetch, tickers)
+        return {ticker: statements for ticker, statements in results if statements is not None}
+
+# Shared statement cache used by the statement views and the ratio engine
+statement_cache = StatementCache()
+
+class TickerInfo(dict):
+    """Ticker info fields, each stamped with the time it was fetched."""
+
+    def __init__(self, values, fetched_at):
+        # Initialize the dict superclass with the field values
+        super().__init__(values)
+        self.fetched_at = fetched_at  # Maps each field to the time it was fetched (seconds since the epoch)
+
+    def age(self, field):
+        """Returns how many seconds ago a field was fetched, or None if it is missing."""
+        fetched_at = self.fetched_at.get(field)
+        return None if fetched_at is None else time.time() - fetched_at
+
+class TickerInfoCache:
+    """Per-field cache of ticker info that only requests the fields that are missing or too old."""
+
+    def __init__(self, folder=None):
+        self.folder = folder or os.path.join(DATA_DIR, 'info')  # Folder of the on-disk copies
+        self.fields = {}  # Maps each ticker to {field: (value, fetch time)}
+        self.lock = threading.Lock()  # Info may be requested from several worker threads
+        self.fetch_lock = KeyedLock()  # Concurrent requests for the same ticker download its fields once
+        # Fields evicted for memory are read back from their files
+        memory_manager.register(self, self._evict, 'Ticker info')
+
+    def _path(self, ticker):
+        """Returns the file holding a ticker's fields on disk."""
+        return os.path.join(self.folder, f"{ticker}.json")
+
+    def _load(self, ticker):
+        """Returns a ticker's cached fields, reading them from disk the first time."""
+        with self.lock:
+            cached = self.fields.get(ticker)
+        if cached is not None:
+            memory_manager.touch(self, ticker)
+            return cached
+        cached = {}
+        path = self._path(ticker)
+        if os.path.exists(path):
+            try:
+                with open(path) as file:
+                    cached = {field: tuple(entry) for field, entry in json.load(file).items()}
+            except Exception as e:
+                print(f"Discarding unreadable info file {path}: {e}")
+        with self.lock:
+            cached = self.fields.setdefault(ticker, cached)
+        memory_manager.track(self, ticker, cached)
+        return cached
+
+    def _evict(self, ticker):
+        """Drops a ticker's fields from memory when the memory manager needs the space."""
+        with self.lock:
+            self.fields.pop(ticker, None)
+
+    @staticmethod
+    def _download(ticker, source, fields):
+        """Requests fields from one source; fields Yahoo does not provide come back as None.
+
+        Missing fields are cached like any other (as a None value with its fetch time), so instruments
+        without them (e.g. the dividend yield of a non-dividend payer) are not requested again until the
+        field's TTL has passed.
+        """
+        stock = yf.Ticker(ticker)
+        values = {}
+        if source == 'fast':
+            fast_info = stock.fast_info
+            for field in fields:
+                try:
+                    values[field] = fast_info[field]
+                except Exception:
+                    # Some fields are missing for some instruments (e.g. market cap of an index)
+                    values[field] = None
+        else:
+            info = stock.info
+            values = {field: info.get(field) for field in fields}
+        return values
+
+    def peek(self, ticker, fields=None):
+        """Returns the cached fields of a ticker whatever their age, without any network request.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            fields (list, optional): The fields wanted. Defaults to all of them.
+
+        Returns:
+            TickerInfo: The cached fields, each with its fetch time (empty if none were ever fetched).
+        """
+        ticker = ticker.upper()
+        cached = self._load(ticker)
+        with self.lock:
+            # Fields known to be missing are left out
+            present = {field: cached[field] for field in (fields or INFO_FIELDS)
+                       if field in cached and cached[field][0] is not None}
+        return TickerInfo({field: entry[0] for field, entry in present.items()},
+                          {field: entry[1] for field, entry in present.items()})
+
+    def get(self, ticker, fields=None, max_age=None):
+        """Returns the requested fields, fetching only those that are missing or older than their TTL.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            fields (list, optional): The fields needed (keys of INFO_FIELDS). Defaults to all of them.
+            max_age (float, optional): Seconds after which any field is refetched, overriding the TTLs.
+
+        Returns:
+            TickerInfo: The fields that are available, each with its fetch time.
+        """
+        ticker = ticker.upper()
+        fields = list(fields or INFO_FIELDS)
+        cached = self._load(ticker)
+        # Only one thread refreshes a ticker at a time; the others wait and then find its fields fresh
+        with self.fetch_lock(ticker):
+            now = time.time()
+
+            # Group the stale fields by the request that provides them
+            stale = {}
+            for field in fields:
+                source, ttl = INFO_FIELDS[field]
+                entry = cached.get(field)
+                if entry is None or now - entry[1] >= (ttl if max_age is None else max_age):
+                    stale.setdefault(source, []).append(field)
+
+            if stale:
+                # Fields served by the full info request are refreshed together, since it returns them all anyway
+                if 'info' in stale:
+                    stale['info'] = [field for field, (source, _) in INFO_FIELDS.items() if source == 'info']
+                fetched = {}
+                for source, source_fields in stale.items():
+                    try:
+                        fetched.update(self._download(ticker, source, source_fields))
+                    except Exception as e:
+                        # Serve the old values (if any) when a request fails
+                        print(f"Failed to fetch {source} fields for {ticker}: {e}")
+                with self.lock:
+                    cached.update({field: (value, now) for field, value in fetched.items()})
+                    snapshot = dict(cached)
+                if fetched:
+                    os.makedirs(self.folder, exist_ok=True)
+                    with open(self._path(ticker), 'w') as file:
+                        # NumPy scalars from fast_info are stored as plain numbers
+                        json.dump({field: list(entry) for field, entry in snapshot.items()}, file,
+                                  default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+        with self.lock:
+            present = {field: cached[field] for field in fields if field in cached and cached[field][0] is not None}
+        return TickerInfo({field: entry[0] for field, entry in present.items()},
+                          {field: entry[1] for field, entry in present.items()})
+
+# Shared ticker info cache used by the ticker views and the risk report
+ticker_info_cache = TickerInfoCache()
\ No newline at end of file
@@ -0,0 +1,167 @@
+# ssef_analysis_tool/density.py
+
+# Import necessary libraries for fast kernel density estimation
+import numpy as np
+from scipy.fft import next_fast_len
+
+# Number of grid points the density is evaluated on
+DEFAULT_GRID_SIZE = 1024
+# Number of bandwidths the kernel (and the grid beyond the data) extends on each side
+KERNEL_TAIL_BANDWIDTHS = 5
+# Bandwidth of samples with no spread (e.g. a constant price), relative to their value, so they show as a narrow peak
+POINT_MASS_BANDWIDTH = 1e-3
+
+def linear_binning(samples, lower, upper, size):
+    """Spreads each sample over its two nearest grid points in proportion to its distance from them.
+
+    Args:
+        samples (np.ndarray): The sample values.
+        lower (float): The first grid point.
+        upper (float): The last grid point.
+        size (int): Number of grid points.
+
+    Returns:
+        np.ndarray: The weight on each grid point; the weights sum to the number of samples.
+    """
+    delta = (upper - lower) / (size - 1)
+    position = np.clip((np.asarray(samples, dtype=np.float64) - lower) / delta, 0, size - 1)
+    left = np.minimum(position.astype(np.int64), size - 2)
+    fraction = position - left
+    return (np.bincount(left, weights=1 - fraction, minlength=size) +
+            np.bincount(left + 1, weights=fraction, minlength=size))
+
+def _weighted_quantile(points, weights, q):
+    """Returns the quantile q of grid points carrying the given weights."""
+    cumulative = np.cumsum(weights) / weights.sum()
+    return points[min(int(np.searchsorted(cumulative, q)), len(points) - 1)]
+
+def silverman_bandwidth(points, weights):
+    """Returns Silverman's rule-of-thumb bandwidth for weighted points.
+
+    The spread is the smaller of the standard deviation and IQR / 1.34, which keeps heavy or
+    skewed tails (such as those of simulated prices) from oversmoothing the centre.
+
+    Args:
+        points (np.ndarray): The point locations (samples or grid points).
+        weights (np.ndarray): The weight of each point (ones for raw samples).
+
+    Returns:
+        float: The Gaussian kernel bandwidth.
+    """
+    n = weights.sum()
+    mean = np.sum(weights * points) / n
+    std = np.sqrt(np.sum(weights * (points - mean) ** 2) / n)
+    iqr = _weighted_quantile(points, weights, 0.75) - _weighted_quantile(points, weights, 0.25)
+    spread = min(std, iqr / 1.34) if iqr > 0 else std
+    return 0.9 * spread * n ** -0.2
+
+def fft_convolve_gaussian(weights, delta, bandwidth):
+    """Convolves grid weights with a Gaussian kernel using the FFT.
+
+    Args:
+        weights (np.ndarray): Weight on each grid point.
+        delta (float): Spacing of the grid.
+        bandwidth (float): Standard deviation of the Gaussian kernel.
+
+    Returns:
+        np.ndarray: The density at each grid point, integrating to one over the grid.
+    """
+    size = len(weights)
+    # Kernel values at the grid offsets it reaches, truncated where it is negligible
+    reach = min(int(np.ceil(KERNEL_TAIL_BANDWIDTHS * bandwidth / delta)), size - 1)
+    offsets = np.arange(-reach, reach + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+
+    # Zero-pad so the circular FFT convolution equals the linear one
+    length = next_fast_len(size + len(kernel) - 1)
+    convolved = np.fft.irfft(np.fft.rfft(weights, length) * np.fft.rfft(kernel, length), length)
+    density = convolved[reach:reach + size] / weights.sum()
+    # Round-off can leave tiny negative values far in the tails
+    return np.maximum(density, 0.0)
+
+def kde(samples, grid_size=DEFAULT_GRID_SIZE, bandwidth=None):
+    """Gaussian kernel density estimate of samples in O(n + G log G).
+
+    Args:
+        samples (array-like): The sample values.
+        grid_size (int, optional): Number of grid points. Defaults to DEFAULT_GRID_SIZE.
+        bandwidth (float, optional): Kernel bandwidth. Defaults to Silverman's rule.
+
+    Returns:
+        tuple: The (grid, density) arrays.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if bandwidth is None:
+        # The rule of thumb is applied to the binned data, so the bandwidth costs no sort of the samples
+        lower, upper = samples.min(), samples.max()
+        if upper == lower:
+            upper = lower + 1.0
+        bandwidth = silverman_bandwidth(np.linspace(lower, upper, grid_size),
+                                        linear_binning(samples, lower, upper, grid_size))
+    if not bandwidth > 0:
+        # All samples are equal, so the density is a point mass drawn as a narrow Gaussian
+        bandwidth = POINT_MASS_BANDWIDTH * max(abs(samples.max()), 1.0)
+
+    # Extend the grid beyond the data so the tails of the kernel are not cut off
+    lower = samples.min() - KERNEL_TAIL_BANDWIDTHS * bandwidth
+    upper = samples.max() + KERNEL_TAIL_BANDWIDTHS * bandwidth
+    grid = np.linspace(lower, upper, grid_size)
+    weights = linear_binning(samples, lower, upper, grid_size)
+    return grid, fft_convolve_gaussian(weights, grid[1] - grid[0], bandwidth)
+
+def kde_from_histogram(counts, edges, bandwidth=None):
+    """Gaussian kernel density estimate from an equal-width histogram, such as a simulation sketch's.
+
+    The bin centres act as the grid, so the estimate is as fine as the histogram. The bandwidth is
+    kept at least one bin wide so the curve stays smooth between grid points.
+
+    Args:
+        counts (np.ndarray): Counts per bin.
+        edges (np.ndarray): Bin edges, equally spaced.
+        bandwidth (float, optional): Kernel bandwidth. Defaults to Silverman's rule.
+
+    Returns:
+        tuple: The (grid, density) arrays.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.float64)
+    delta = edges[1] - edges[0]
+    if not delta > 0:
+        # A zero-width histogram holds a single value, shown like any other point mass
+        return kde(edges[:1], bandwidth=bandwidth)
+    centres = (edges[:-1] + edges[1:]) / 2
+    if bandwidth is None:
+        bandwidth = silverman_bandwidth(centres, counts)
+    bandwidth = max(bandwidth, delta)
+
+    # Add empty bins on both sides for the kernel tails
+    padding = int(np.ceil(KERNEL_TAIL_BANDWIDTHS * bandwidth / delta))
+    grid = centres[0] + delta * np.arange(-padding, len(centres) + padding)
+    weights = np.concatenate([np.zeros(padding), counts, np.zeros(padding)])
+    return grid, fft_convolve_gaussian(weights, delta, bandwidth)
+
+def empirical_cdf(samples, points):
+    """Returns the exact empirical CDF of samples at the given points.
+
+    Args:
+        samples (array-like): The sample values.
+        points (array-like): Where to evaluate the CDF.
+
+    Returns:
+        np.ndarray: The fraction of samples at or below each point.
+    """
+    ordered = np.sort(np.asarray(samples, dtype=np.float64))
+    return np.searchsorted(ordered, points, side='right') / len(ordered)
+
+def histogram_cdf(counts, edges):
+    """Returns the empirical CDF of binned samples, exact at the bin edges.
+
+    Args:
+        counts (np.ndarray): Counts per bin.
+        edges (np.ndarray): Bin edges.
+
+    Returns:
+        tuple: The (edges, cumulative probability) arrays.
+    """
+    cumulative = np.concatenate([[0.0], np.cumsum(counts, dtype=np.float64)])
+    return np.asarray(edges, dtype=np.float64), cumulative / cumulative[-1]
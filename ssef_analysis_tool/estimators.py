@@ -0,0 +1,319 @@
+# ssef_analysis_tool/estimators.py
+
+# Import necessary libraries for rolling, incrementally updated return statistics
+import time
+import threading
+import datetime as dt
+from collections import deque
+import numpy as np
+
+# Import additional modules from other files within the project
+from .history import history_assembler
+from .bar_store import bar_store
+from .memory import memory_manager
+from .utils import KeyedLock
+
+# Default number of daily returns used to estimate drift and volatility (one trading year)
+DEFAULT_WINDOW = 252
+# Decay factor of the EWMA volatility (the RiskMetrics daily value)
+EWMA_LAMBDA = 0.94
+# Days of daily history loaded the first time a ticker is estimated
+HISTORY_DAYS = 365
+
+def merge_moments(a, b):
+    """Combines the (count, mean, M2) moments of two samples (Chan et al. parallel update).
+
+    Args:
+        a (tuple): The (count, mean, M2) of the first sample.
+        b (tuple): The (count, mean, M2) of the second sample.
+
+    Returns:
+        tuple: The (count, mean, M2) of the combined sample.
+    """
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    return n, mean, m2
+
+def remove_moments(total, part):
+    """Removes the (count, mean, M2) moments of a sub-sample from those of the whole sample.
+
+    Args:
+        total (tuple): The (count, mean, M2) of the whole sample.
+        part (tuple): The (count, mean, M2) of the sub-sample to remove.
+
+    Returns:
+        tuple: The (count, mean, M2) of the remaining sample.
+    """
+    n, mean, m2 = total
+    n_b, mean_b, m2_b = part
+    n_a = n - n_b
+    if n_a <= 0:
+        return 0, 0.0, 0.0
+    mean_a = (n * mean - n_b * mean_b) / n_a
+    delta = mean_b - mean_a
+    m2_a = m2 - m2_b - delta ** 2 * n_a * n_b / n
+    return n_a, mean_a, max(m2_a, 0.0)
+
+def batch_moments(values):
+    """Returns the (count, mean, M2) moments of an array of values."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return 0, 0.0, 0.0
+    mean = float(values.mean())
+    return len(values), mean, float(((values - mean) ** 2).sum())
+
+class RollingMoments:
+    """Welford-style mean and variance over the most recent `window` values."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window  # Number of values kept in the window
+        self.values = deque()  # Values currently in the window, oldest first
+        self.moments = (0, 0.0, 0.0)  # (count, mean, M2) of the window
+
+    def update(self, new_values):
+        """Adds new values and drops the ones that fall out of the window, in O(len(new_values)).
+
+        Args:
+            new_values (array-like): The values to add, oldest first.
+        """
+        new_values = np.asarray(new_values, dtype=np.float64)[-self.window:]
+        if len(new_values) == 0:
+            return
+        self.moments = merge_moments(self.moments, batch_moments(new_values))
+        self.values.extend(new_values.tolist())
+
+        # Remove the values pushed out of the window in one batch
+        overflow = len(self.values) - self.window
+        if overflow > 0:
+            removed = [self.values.popleft() for _ in range(overflow)]
+            self.moments = remove_moments(self.moments, batch_moments(removed))
+
+    def with_value(self, value):
+        """Returns the (count, mean, M2) the window would have after adding one value, without changing it."""
+        moments = merge_moments(self.moments, (1, float(value), 0.0))
+        if len(self.values) >= self.window:
+            moments = remove_moments(moments, (1, self.values[0], 0.0))
+        return moments
+
+    @property
+    def mean(self):
+        return self.moments[1]
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1) of the window."""
+        n, _, m2 = self.moments
+        return m2 / (n - 1) if n > 1 else float('nan')
+
+class EWMAVolatility:
+    """Exponentially weighted moving average of squared returns."""
+
+    def __init__(self, lam=EWMA_LAMBDA):
+        self.lam = lam  # Decay factor applied to the previous variance
+        self.variance = None  # Current EWMA variance, None until the first return arrives
+
+    def update(self, returns):
+        """Folds new returns into the EWMA variance, oldest first."""
+        for r in np.asarray(returns, dtype=np.float64):
+            if self.variance is None:
+                self.variance = r * r
+            else:
+                self.variance = self.lam * self.variance + (1 - self.lam) * r * r
+
+    def with_value(self, r):
+        """Returns the variance after one more return, without changing the state."""
+        if self.variance is None:
+            return r * r
+        return self.lam * self.variance + (1 - self.lam) * r * r
+
+class RollingCovariance:
+    """Rolling covariance of two aligned return series over the most recent `window` pairs."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window  # Number of pairs kept in the window
+        self.pairs = deque()  # (x, y) pairs currently in the window, oldest first
+        self.n = 0  # Number of pairs in the window
+        self.mean_x = 0.0  # Running mean of x
+        self.mean_y = 0.0  # Running mean of y
+        self.c = 0.0  # Running co-moment sum((x - mean_x) * (y - mean_y))
+
+    def _add(self, x, y):
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        self.mean_y += (y - self.mean_y) / self.n
+        self.c += dx * (y - self.mean_y)
+
+    def _remove(self, x, y):
+        if self.n <= 1:
+            self.n, self.mean_x, self.mean_y, self.c = 0, 0.0, 0.0, 0.0
+            return
+        self.n -= 1
+        dx = x - self.mean_x
+        self.mean_x -= dx / self.n
+        self.mean_y -= (y - self.mean_y) / self.n
+        self.c -= dx * (y - self.mean_y)
+
+    def update(self, xs, ys):
+        """Adds new aligned pairs and drops the ones that fall out of the window."""
+        for x, y in zip(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)):
+            self._add(x, y)
+            self.pairs.append((x, y))
+            if len(self.pairs) > self.window:
+                self._remove(*self.pairs.popleft())
+
+    @property
+    def covariance(self):
+        """Sample covariance (ddof=1) of the window."""
+        return self.c / (self.n - 1) if self.n > 1 else float('nan')
+
+class _TickerState:
+    """Incremental statistics of one ticker's daily log returns for one window length."""
+
+    def __init__(self, window):
+        self.moments = RollingMoments(window)  # Rolling mean and variance of committed returns
+        self.ewma = EWMAVolatility()  # EWMA variance of committed returns
+        self.last_time = None  # Time of the last committed bar (ns since the epoch)
+        self.last_close = None  # Close of the last committed bar
+
+class EstimatorService:
+    """Keeps rolling GBM parameter estimates per ticker, updated only with bars that are new."""
+
+    def __init__(self, store=None):
+        self.store = store or bar_store  # Bar store the daily closes are read from
+        self.states = {}  # Maps (ticker, window) to its _TickerState
+        self.cache = {}  # Memoized estimates keyed by (ticker, window, as-of date)
+        self.pair_states = {}  # Maps (ticker_a, ticker_b, window) to (RollingCovariance, last common time)
+        self.lock = threading.RLock()  # Guards the dicts, since estimates may be requested from several worker threads
+        self.update_lock = KeyedLock()  # One ticker (or pair) is fetched and estimated at a time; others run in parallel
+        # Evicted estimates are recomputed from the bar store on the next request
+        memory_manager.register(self, self._evict, 'Estimates')
+
+    def _closes(self, ticker):
+        """Brings the ticker's daily bars up to date and returns zero-copy (times, closes) views."""
+        history_assembler.get_bars(ticker, '1d', start=dt.datetime.now() - dt.timedelta(days=HISTORY_DAYS))
+        view = self.store.open(ticker, '1d').view()
+        closes = view['Close']
+        valid = ~np.isnan(closes)
+        return view['time'][valid], closes[valid]
+
+    def get_gbm_parameters(self, ticker, window=DEFAULT_WINDOW, as_of=None):
+        """Returns the GBM starting price, drift and volatility for a ticker.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            window (int, optional): Number of daily log returns to estimate from. Defaults to 252.
+            as_of (date, optional): The date the estimate is for. Defaults to today.
+
+        Returns:
+            dict: 'S0', 'mu' and 'sigma' (daily, as used by GBM), 'ewma_sigma', the number of returns used and 'as_of_time' (the last bar's time in ns).
+
+        Raises:
+            ValueError: If there is not enough historical data for the ticker.
+        """
+        ticker = ticker.upper()
+        as_of = as_of or dt.date.today()
+        key = (ticker, window, as_of)
+        with self.lock:
+            # Repeat requests for the same day skip both the history fetch and the estimation
+            if key in self.cache:
+                memory_manager.touch(self, key)
+                return self.cache[key]
+
+        # The history may be downloaded, so only requests for the same ticker wait for each other
+        with self.update_lock(ticker):
+            with self.lock:
+                # A request that waited for the lock finds the estimate the other one made
+                if key in self.cache:
+                    memory_manager.touch(self, key)
+                    return self.cache[key]
+                state = self.states.setdefault((ticker, window), _TickerState(window))
+
+            start = time.perf_counter()
+            times, closes = self._closes(ticker)
+            if len(closes) < 3:
+                raise ValueError(f"No historical data found for {ticker}")
+
+            # Commit every bar except the last, which may still be forming and can be revised
+            if state.last_time is None:
+                new = slice(max(len(closes) - window - 2, 0), len(closes) - 1)
+            else:
+                new = slice(int(np.searchsorted(times, state.last_time, side='right')), len(closes) - 1)
+            new_closes = closes[new]
+            if len(new_closes):
+                previous = [state.last_close] if state.last_close is not None else []
+                series = np.concatenate([previous, new_closes])
+                returns = np.log(series[1:] / series[:-1])
+                state.moments.update(returns)
+                state.ewma.update(returns)
+                state.last_time = int(times[new][-1])
+                state.last_close = float(new_closes[-1])
+
+            # Fold in the latest bar's return without committing it
+            latest_return = float(np.log(closes[-1] / state.last_close))
+            n, mean, m2 = state.moments.with_value(latest_return)
+            sigma = float(np.sqrt(m2 / (n - 1))) if n > 1 else float('nan')
+            estimate = {
+                'S0': float(closes[-1]),
+                'mu': mean + sigma ** 2 / 2,
+                'sigma': sigma,
+                'ewma_sigma': float(np.sqrt(state.ewma.with_value(latest_return))),
+                'observations': n,
+                'as_of_time': int(times[-1]),
+            }
+            with self.lock:
+                self.cache[key] = estimate
+        # Tracked outside the lock, since the manager may call back to evict other estimates
+        memory_manager.track(self, key, estimate, cost=time.perf_counter() - start)
+        return estimate
+
+    def _evict(self, key):
+        """Drops a memoized estimate when the memory manager needs the space."""
+        with self.lock:
+            self.cache.pop(key, None)
+
+    def get_covariance(self, ticker_a, ticker_b, window=DEFAULT_WINDOW):
+        """Returns the rolling covariance of two tickers' completed daily log returns on their common dates.
+
+        Args:
+            ticker_a (str): The first ticker symbol.
+            ticker_b (str): The second ticker symbol.
+            window (int, optional): Number of common daily returns to use. Defaults to 252.
+
+        Returns:
+            float: The sample covariance of the daily log returns.
+        """
+        key = (ticker_a.upper(), ticker_b.upper(), window)
+        # Histories are fetched outside the locks; the pair's state is updated by one request at a time
+        times_a, closes_a = self._closes(ticker_a)
+        times_b, closes_b = self._closes(ticker_b)
+        with self.update_lock(key):
+            # Align both series on the dates they share
+            common, index_a, index_b = np.intersect1d(times_a, times_b, return_indices=True)
+            returns_a = np.diff(np.log(closes_a[index_a]))
+            returns_b = np.diff(np.log(closes_b[index_b]))
+            return_times = common[1:]
+
+            # Only feed the completed pairs that arrived since the last call (the latest bar may still change)
+            with self.lock:
+                covariance, last_time = self.pair_states.get(key, (RollingCovariance(window), None))
+            end = len(return_times) - 1
+            if last_time is None:
+                start = max(end - window, 0)
+            else:
+                start = int(np.searchsorted(return_times, last_time, side='right'))
+            if start < end:
+                covariance.update(returns_a[start:end], returns_b[start:end])
+                last_time = int(return_times[end - 1])
+            with self.lock:
+                self.pair_states[key] = (covariance, last_time)
+            return covariance.covariance
+
+# Shared estimator service used by the simulations and the risk views
+estimator_service = EstimatorService()
@@ -0,0 +1,238 @@
+# ssef_analysis_tool/history.py
+
+# Import necessary libraries for downloading, stitching and resampling bar history
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+
+# Import additional modules from other files within the project
+from .bar_store import bar_store
+from .utils import KeyedLock
+
+# Columns kept for every bar frame, in the order the chart expects them
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Intervals that are downloaded from Yahoo Finance. For each one we record the largest window
+# a single request may cover and how far back the provider keeps data (None means unlimited).
+BASE_INTERVALS = {
+    '1m': {'window_days': 7, 'max_lookback_days': 29},
+    '5m': {'window_days': 30, 'max_lookback_days': 59},
+    '1h': {'window_days': 180, 'max_lookback_days': 729},
+    '1d': {'window_days': 3650, 'max_lookback_days': None},
+}
+
+# Intervals that are built locally by resampling a base interval, mapped to (base interval, pandas rule)
+DERIVED_INTERVALS = {
+    '15m': ('5m', '15min'),
+    '30m': ('5m', '30min'),
+    '1wk': ('1d', 'W-MON'),
+    '1mo': ('1d', 'MS'),
+}
+
+# Default lookback used when the caller does not ask for a specific start date
+DEFAULT_LOOKBACK_DAYS = {
+    '1m': 29,
+    '5m': 59,
+    '1h': 729,
+    '1d': 365 * 10,
+}
+
+# Aggregation applied to each column when resampling base bars into a higher timeframe
+RESAMPLE_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+}
+
+def normalize_bars(data):
+    """Normalizes a yfinance download into a plain OHLCV frame.
+
+    Args:
+        data (pd.DataFrame): The raw frame returned by yf.download for a single ticker.
+
+    Returns:
+        pd.DataFrame: A frame with the OHLCV columns only, sorted by time and without duplicate timestamps.
+    """
+    # Return an empty OHLCV frame if nothing was downloaded
+    if data is None or data.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    # Newer versions of yfinance return (field, ticker) column pairs even for one ticker
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+
+    # Keep only the OHLCV columns that are present
+    data = data[[column for column in OHLCV_COLUMNS if column in data.columns]]
+
+    # Sort by time and keep the latest copy of any repeated bar (windows may overlap)
+    data = data[~data.index.duplicated(keep='last')].sort_index()
+    return data
+
+def resample_bars(data, rule):
+    """Builds higher-timeframe bars from lower-timeframe bars.
+
+    Args:
+        data (pd.DataFrame): The base OHLCV frame indexed by timestamp.
+        rule (str): The pandas offset alias of the target timeframe (e.g. '15min', 'W-MON').
+
+    Returns:
+        pd.DataFrame: The resampled OHLCV frame, with empty periods removed.
+    """
+    # Nothing to resample if the base frame is empty
+    if data.empty:
+        return data
+
+    # Aggregate every column in one vectorized pass, labelling each bar with its opening time
+    aggregation = {column: how for column, how in RESAMPLE_AGGREGATION.items() if column in data.columns}
+    resampled = data.resample(rule, label='left', closed='left').agg(aggregation)
+
+    # Drop periods without any trades (nights, weekends, holidays)
+    return resampled.dropna(subset=['Close'])
+
+def split_into_windows(start, end, window_days):
+    """Splits a date range into consecutive provider-sized windows.
+
+    Args:
+        start (datetime): The start of the range.
+        end (datetime): The end of the range.
+        window_days (int): The largest number of days a single request may cover.
+
+    Returns:
+        list: A list of (window_start, window_end) tuples covering the whole range.
+    """
+    windows = []
+    window_start = start
+    step = dt.timedelta(days=window_days)
+    # Walk forward through the range one window at a time
+    while window_start < end:
+        window_end = min(window_start + step, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+class HistoryAssembler:
+    """Assembles long bar histories from chunked, parallel downloads and a persistent store."""
+
+    def __init__(self, max_workers=4, store=None):
+        # Number of windows downloaded at the same time
+        self.max_workers = max_workers
+        # Memory-mapped store holding the stitched histories between sessions
+        self.store = store or bar_store
+        # Serializes updates of the same series, so concurrent requests download the missing bars once
+        self.update_lock = KeyedLock()
+
+    def get_bars(self, ticker, interval, start=None, end=None):
+        """Returns OHLCV bars for a ticker and interval, downloading only what is missing.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            interval (str): The bar interval, either a base interval or a derived one (e.g. '15m', '1mo').
+            start (datetime, optional): The first time to include. Defaults to the interval's default lookback.
+            end (datetime, optional): The last time to include. Defaults to now.
+
+        Returns:
+            pd.DataFrame: The OHLCV bars covering the requested range (possibly empty).
+        """
+        # Derived intervals are built from the bars of their base interval
+        if interval in DERIVED_INTERVALS:
+            base_interval, rule = DERIVED_INTERVALS[interval]
+            base = self.get_bars(ticker, base_interval, start, end)
+            return resample_bars(base, rule)
+
+        if interval not in BASE_INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+
+        # Work out the requested range, clamped to what the provider still keeps
+        end = end or dt.datetime.now()
+        start = start or end - dt.timedelta(days=DEFAULT_LOOKBACK_DAYS[interval])
+        max_lookback = BASE_INTERVALS[interval]['max_lookback_days']
+        if max_lookback is not None:
+            start = max(start, dt.datetime.now() - dt.timedelta(days=max_lookback))
+
+        # Bring the stored history up to date and read the requested range straight from the store
+        self.update(ticker, interval, start, end)
+        return self.store.read(ticker, interval, start, end)
+
+    def get_stored_bars(self, ticker, interval, start=None, end=None):
+        """Returns the bars already in the store without downloading anything, e.g. to show a view at once.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            interval (str): The bar interval, either a base interval or a derived one.
+            start (datetime, optional): The first time to include. Defaults to the interval's default lookback.
+            end (datetime, optional): The last time to include. Defaults to everything stored.
+
+        Returns:
+            pd.DataFrame: The stored OHLCV bars in the range (possibly empty or out of date).
+        """
+        if interval in DERIVED_INTERVALS:
+            base_interval, rule = DERIVED_INTERVALS[interval]
+            return resample_bars(self.get_stored_bars(ticker, base_interval, start, end), rule)
+        if interval not in BASE_INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        start = start or dt.datetime.now() - dt.timedelta(days=DEFAULT_LOOKBACK_DAYS[interval])
+        return self.store.read(ticker, interval, start, end)
+
+    def update(self, ticker, interval, start, end):
+        """Fetches any bars missing from the store for the given range and merges them in.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            interval (str): The base interval to update.
+            start (datetime): The start of the range that must be covered.
+            end (datetime): The end of the range that must be covered.
+        """
+        # A request arriving while the same series is being updated waits, then finds the bars stored
+        with self.update_lock((ticker.upper(), interval)):
+            self._update(ticker, interval, start, end)
+
+    def _update(self, ticker, interval, start, end):
+        """Performs update() while holding the series' update lock."""
+        series = self.store.open(ticker, interval)
+        covered_from, last = self.store.covered_from(ticker, interval), series.last_time()
+
+        # Only download the parts of the range the store does not cover yet
+        ranges = []
+        if last is None:
+            ranges.append((start, end))
+        else:
+            first = series.from_ns(covered_from)
+            if start < first:
+                ranges.append((start, first))
+            # Always refetch from the last stored bar, which may have been incomplete when saved
+            last = series.from_ns(last)
+            if last < end:
+                ranges.append((last, end))
+
+        if not ranges:
+            return
+
+        # Split every missing range into provider-sized windows and fetch them concurrently
+        window_days = BASE_INTERVALS[interval]['window_days']
+        windows = [window for rng in ranges for window in split_into_windows(rng[0], rng[1], window_days)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            chunks = list(executor.map(lambda window: self._download_window(ticker, interval, *window), windows))
+
+        # Stitch the chunks together, drop duplicate bars and merge them into the store
+        frames = [frame for frame in chunks if frame is not None and not frame.empty]
+        merged = normalize_bars(pd.concat(frames)) if frames else pd.DataFrame(columns=OHLCV_COLUMNS)
+        # Only mark the range as covered if every window was actually downloaded
+        complete = all(frame is not None for frame in chunks)
+        self.store.write(ticker, interval, merged, covered_from=start if complete else None)
+
+    def _download_window(self, ticker, interval, start, end):
+        """Downloads a single window of bars from Yahoo Finance, returning None if the request failed."""
+        try:
+            data = yf.download(ticker, start=start, end=end, interval=interval, progress=False)
+        except Exception as e:
+            # A failed window should not throw away the rest of the history
+            print(f"Failed to download {ticker} {interval} bars from {start} to {end}: {e}")
+            return None
+        return normalize_bars(data)
+
+# Shared assembler used by the widgets so every view reads from the same store
+history_assembler = HistoryAssembler()
@@ -0,0 +1,206 @@
+# ssef_analysis_tool/jobs.py
+
+# Import necessary PyQt5 classes for running background jobs on a fixed thread pool
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QCoreApplication, pyqtSignal
+import threading
+
+# Number of worker threads shared by all background jobs
+JOB_POOL_SIZE = 2
+# Queue priorities: jobs for the visible workspace's ticker run before those of the other workspaces
+FOREGROUND_PRIORITY = 1
+BACKGROUND_PRIORITY = 0
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+class Job:
+    """A queued or running background job."""
+
+    def __init__(self, manager, key, tag, function, args, kwargs):
+        self.manager = manager  # JobManager running the job
+        self.key = key  # Identifies the job; requests with the same key share it
+        self.tag = tag  # Groups jobs for cancellation (e.g. the ticker they are for)
+        self.function = function  # Function called with the arguments and a progress callback
+        self.args = args  # Positional arguments of the function
+        self.kwargs = kwargs  # Keyword arguments of the function
+        self.priority = BACKGROUND_PRIORITY  # Queue priority, raised while its tag is in the foreground
+        self.cancel_event = threading.Event()  # Set when the job should stop
+        self.runnable = None  # QRunnable queued on the pool
+
+    @property
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report_progress(self, percent):
+        """Reports progress from inside the job and stops it if it has been cancelled.
+
+        Args:
+            percent (int): Percentage of the work done.
+
+        Raises:
+            JobCancelled: If the job has been cancelled.
+        """
+        if self.is_cancelled:
+            raise JobCancelled()
+        self.manager.progress.emit(self.key, int(percent))
+
+class _JobRunnable(QRunnable):
+    """Runs one job on the pool, always releasing it whether it succeeds, fails or is cancelled."""
+
+    def __init__(self, job):
+        # Initialize the QRunnable superclass
+        super().__init__()
+        self.job = job  # The job to run
+        self.setAutoDelete(True)
+
+    def run(self):
+        job, manager = self.job, self.job.manager
+        try:
+            if job.is_cancelled:
+                raise JobCancelled()
+            result = job.function(*job.args, progress=job.report_progress, **job.kwargs)
+        except JobCancelled:
+            manager._release(job)
+            manager.cancelled.emit(job.key)
+        except Exception as e:
+            manager._release(job)
+            manager.error.emit(job.key, str(e))
+        else:
+            # Release the job before announcing the result, so a handler may submit the same key again
+            manager._release(job)
+            if job.is_cancelled:
+                manager.cancelled.emit(job.key)
+            else:
+                manager.finished.emit(job.key, result)
+        finally:
+            # Releasing twice is harmless, and this also covers anything that escaped the handlers above
+            manager._release(job)
+
+class JobManager(QObject):
+    """Runs background jobs on a fixed thread pool with queueing, de-duplication and cancellation."""
+    # Signals are emitted from the pool threads and delivered on the receivers' (GUI) thread
+    progress = pyqtSignal(object, int)  # Emits the job key and the percentage done
+    finished = pyqtSignal(object, object)  # Emits the job key and its result
+    error = pyqtSignal(object, str)  # Emits the job key and an error message
+    cancelled = pyqtSignal(object)  # Emits the key of a cancelled job
+
+    def __init__(self, pool_size=JOB_POOL_SIZE, parent=None):
+        # Initialize the QObject superclass
+        super().__init__(parent)
+        self.pool = QThreadPool(self)  # Fixed pool; jobs beyond its size wait in its queue
+        self.pool.setMaxThreadCount(pool_size)
+        self.jobs = {}  # Maps the key of each queued or running job to the job
+        self.foreground_tag = None  # Tag whose jobs are queued ahead of the others (the visible ticker)
+        self.lock = threading.Lock()  # Jobs are released from the pool threads
+
+    def submit(self, key, function, *args, tag=None, **kwargs):
+        """Queues a job, or returns the queued or running job with the same key.
+
+        Args:
+            key (hashable): Identifies the job; repeat requests while it is pending are merged into it.
+            function (callable): Called as function(*args, progress=callback, **kwargs) on a pool thread.
+                It should call the callback with a percentage now and then, which also raises
+                JobCancelled once the job is cancelled.
+            tag (hashable, optional): Group the job belongs to, for cancel().
+
+        Returns:
+            Job: The job handling the request.
+        """
+        priority = self._priority(tag)
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and not job.is_cancelled:
+                # A request from the foreground moves a job queued for a background workspace ahead
+                if priority > job.priority:
+                    self._requeue(job, priority)
+                return job
+            job = Job(self, key, tag, function, args, kwargs)
+            job.priority = priority
+            job.runnable = _JobRunnable(job)
+            self.jobs[key] = job
+        self.pool.start(job.runnable, job.priority)
+        return job
+
+    def _priority(self, tag):
+        """Returns the queue priority of a job with the given tag."""
+        if tag is not None and tag == self.foreground_tag:
+            return FOREGROUND_PRIORITY
+        return BACKGROUND_PRIORITY
+
+    def _requeue(self, job, priority):
+        """Moves a job that is still waiting in the queue to another priority; running jobs are left alone."""
+        if self.pool.tryTake(job.runnable):
+            job.priority = priority
+            self.pool.start(job.runnable, priority)
+
+    def set_foreground(self, tag):
+        """Queues the jobs with this tag (e.g. the ticker of the visible workspace) ahead of all others.
+
+        Args:
+            tag (hashable): The foreground tag, or None for no preference.
+        """
+        with self.lock:
+            self.foreground_tag = tag
+            for job in self.jobs.values():
+                priority = self._priority(job.tag)
+                if priority != job.priority and not job.is_cancelled:
+                    self._requeue(job, priority)
+
+    def cancel(self, key=None, tag=None, keep_tag=None, keep_tags=None):
+        """Cancels matching jobs: queued ones are dropped, running ones stop at their next progress report.
+
+        Args:
+            key (hashable, optional): Cancel the job with this key.
+            tag (hashable, optional): Cancel every job with this tag.
+            keep_tag (hashable, optional): Cancel every job except those with this tag.
+            keep_tags (collection, optional): Cancel every tagged job except those with one of these tags
+                (e.g. the tickers still open in a workspace). Untagged jobs are left running.
+        """
+        with self.lock:
+            matches = [job for job in self.jobs.values()
+                       if (key is not None and job.key == key) or (tag is not None and job.tag == tag)
+                       or (keep_tag is not None and job.tag != keep_tag)
+                       or (keep_tags is not None and job.tag is not None and job.tag not in keep_tags)]
+        for job in matches:
+            job.cancel_event.set()
+            # A job still waiting in the queue is removed without ever running
+            if self.pool.tryTake(job.runnable):
+                self._release(job)
+                self.cancelled.emit(job.key)
+
+    def cancel_all(self):
+        """Cancels every job."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            self.cancel(key=job.key)
+
+    def is_pending(self, key):
+        """Returns True if a job with the key is queued or running and not cancelled."""
+        with self.lock:
+            job = self.jobs.get(key)
+            return job is not None and not job.is_cancelled
+
+    def _release(self, job):
+        """Forgets a job that has ended, unless its key was already taken by a newer job."""
+        with self.lock:
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+
+    def shutdown(self):
+        """Cancels all jobs and waits for the running ones to stop."""
+        self.cancel_all()
+        self.pool.waitForDone()
+
+# Shared job manager, created on first use
+_job_manager = None
+
+def get_job_manager():
+    """Returns the application's shared job manager, shutting it down cleanly when the app quits."""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_job_manager.shutdown)
+    return _job_manager
@@ -0,0 +1,221 @@
+# ssef_analysis_tool/kernels.py
+
+# Import necessary libraries for the path-dependent simulation kernels
+import time
+import numpy as np
+
+# Import additional modules from other files within the project
+from .simulations import generate_brownian_paths, DEFAULT_SAMPLER
+from .estimators import estimator_service
+from .result_store import DEFAULT_SIMULATION_SEED
+
+# Numba is optional: without it every kernel falls back to its NumPy implementation
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Number of paths handed to a kernel at once, which bounds the memory used by the Brownian paths
+KERNEL_CHUNK_SIZE = 50000
+# Number of paths simulated for the risk report's drawdown and stop-loss statistics
+PATH_RISK_PATHS = 10000
+# Stop-loss level of the risk report, as a fraction of the starting price
+STOP_LOSS_FRACTION = 0.9
+
+def _path_metrics_numpy(S0, drift_step, sigma, W, barrier, stop_loss):
+    """NumPy implementation of the per-path risk metrics (see path_metrics)."""
+    steps = np.arange(1, W.shape[1] + 1)
+    prices = S0 * np.exp(drift_step * steps + sigma * W)
+
+    # Drawdowns are measured from the running peak, which starts at the initial price
+    peaks = np.maximum(np.maximum.accumulate(prices, axis=1), S0)
+    max_drawdown = (1 - prices / peaks).max(axis=1)
+    min_price = np.minimum(prices.min(axis=1), S0)
+    barrier_hit = min_price <= barrier
+
+    # The position is sold at the first price at or below the stop-loss level, otherwise held to the end
+    stopped = prices <= stop_loss
+    any_stop = stopped.any(axis=1)
+    first_stop = stopped.argmax(axis=1)
+    exit_price = np.where(any_stop, prices[np.arange(len(prices)), first_stop], prices[:, -1])
+
+    return prices[:, -1], min_price, max_drawdown, barrier_hit, exit_price
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _path_metrics_numba(S0, drift_step, sigma, W, barrier, stop_loss):
+        """Numba implementation of the per-path risk metrics, parallel over paths (see path_metrics)."""
+        num_paths, N = W.shape
+        terminal = np.empty(num_paths)
+        min_price = np.empty(num_paths)
+        max_drawdown = np.empty(num_paths)
+        barrier_hit = np.empty(num_paths, dtype=np.bool_)
+        exit_price = np.empty(num_paths)
+        for i in prange(num_paths):
+            peak = S0
+            lowest = S0
+            drawdown = 0.0
+            exit_value = -1.0
+            price = S0
+            # Walk the path once, updating every metric step by step
+            for j in range(N):
+                price = S0 * np.exp(drift_step * (j + 1) + sigma * W[i, j])
+                if price > peak:
+                    peak = price
+                if price < lowest:
+                    lowest = price
+                if 1.0 - price / peak > drawdown:
+                    drawdown = 1.0 - price / peak
+                if exit_value < 0.0 and price <= stop_loss:
+                    exit_value = price
+            terminal[i] = price
+            min_price[i] = lowest
+            max_drawdown[i] = drawdown
+            barrier_hit[i] = lowest <= barrier
+            exit_price[i] = exit_value if exit_value >= 0.0 else price
+        return terminal, min_price, max_drawdown, barrier_hit, exit_price
+
+def path_metrics(S0, mu, sigma, W, barrier=None, stop_loss=None, backend='auto'):
+    """Computes path-dependent risk metrics for each simulated GBM path.
+
+    Args:
+        S0 (float): The initial stock price.
+        mu (float): The expected return per time step.
+        sigma (float): The volatility per time step.
+        W (np.ndarray): Brownian motion values at each step, of shape (num_paths, N).
+        barrier (float, optional): Price level whose touching is recorded (e.g. a knock-in level).
+        stop_loss (float, optional): Price at or below which the position is sold.
+        backend (str, optional): 'numba', 'numpy' or 'auto' (Numba when installed). Defaults to 'auto'.
+
+    Returns:
+        dict: Per-path arrays 'terminal', 'min_price', 'max_drawdown', 'barrier_hit' and 'exit_price'.
+    """
+    if backend == 'auto':
+        backend = 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("The numba backend requires the optional 'numba' package")
+
+    # A level of zero can never be reached by a GBM price, which disables the feature
+    barrier = 0.0 if barrier is None else float(barrier)
+    stop_loss = 0.0 if stop_loss is None else float(stop_loss)
+    drift_step = mu - 0.5 * sigma ** 2
+    kernel = _path_metrics_numba if backend == 'numba' else _path_metrics_numpy
+    results = kernel(float(S0), drift_step, float(sigma), np.ascontiguousarray(W, dtype=np.float64), barrier, stop_loss)
+    return dict(zip(('terminal', 'min_price', 'max_drawdown', 'barrier_hit', 'exit_price'), results))
+
+def simulate_path_metrics(S0, mu, sigma, T=252, num_paths=10000, barrier=None, stop_loss=None,
+                          sampler=DEFAULT_SAMPLER, seed=None, backend='auto', progress=None):
+    """Simulates GBM paths with one step per time unit and returns their path-dependent risk metrics.
+
+    Args:
+        S0 (float): The initial stock price.
+        mu (float): The expected return of the stock per time unit.
+        sigma (float): The volatility of the stock per time unit.
+        T (int, optional): Number of time steps to simulate (default is 252, one trading year of days).
+        num_paths (int, optional): Number of paths to simulate (default is 10,000).
+        barrier (float, optional): Price level whose touching is recorded.
+        stop_loss (float, optional): Price at or below which the position is sold.
+        sampler (str, optional): The sampler used to draw the Brownian paths.
+        seed (int, optional): Seed for reproducible results.
+        backend (str, optional): 'numba', 'numpy' or 'auto'.
+        progress (callable, optional): Called with the percentage done after each chunk; may raise to cancel.
+
+    Returns:
+        dict: Per-path arrays as returned by path_metrics, for all paths.
+    """
+    rng = np.random.default_rng(seed)
+    chunks = []
+    # Process the paths in chunks so only one chunk of Brownian paths is held at a time
+    for start in range(0, num_paths, KERNEL_CHUNK_SIZE):
+        size = min(KERNEL_CHUNK_SIZE, num_paths - start)
+        W = generate_brownian_paths(size, T, T, sampler=sampler, seed=rng)
+        chunks.append(path_metrics(S0, mu, sigma, W, barrier, stop_loss, backend))
+        if progress:
+            progress((start + size) * 100 / num_paths)
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+def simulate_ticker_path_risk(ticker, num_paths=PATH_RISK_PATHS, horizon=252, stop_loss_fraction=STOP_LOSS_FRACTION,
+                              seed=DEFAULT_SIMULATION_SEED, progress=None):
+    """Summarizes the drawdowns and stop-loss exits of a ticker's simulated price paths for the risk report.
+
+    Meant to run as a background job (see jobs.JobManager).
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        num_paths (int, optional): Number of paths to simulate (default is PATH_RISK_PATHS).
+        horizon (int, optional): Simulation horizon in trading days (default is 252).
+        stop_loss_fraction (float, optional): Stop-loss level as a fraction of the starting price.
+        seed (int, optional): Random seed, fixed so repeat views give the same answer.
+        progress (callable, optional): Called with the percentage done; may raise to cancel the run.
+
+    Returns:
+        dict: 'S0', 'stop_loss', 'num_paths', the 'median_drawdown' and 95th percentile 'drawdown_95' of the
+            maximum drawdowns, the 'stop_probability' of touching the stop-loss and the 'mean_exit' and
+            'mean_terminal' prices with and without the stop-loss.
+
+    Raises:
+        ValueError: If no historical data is found for the ticker.
+    """
+    params = estimator_service.get_gbm_parameters(ticker)
+    S0 = params['S0']
+    stop_loss = S0 * stop_loss_fraction
+    metrics = simulate_path_metrics(S0, params['mu'], params['sigma'], T=horizon, num_paths=num_paths,
+                                    barrier=stop_loss, stop_loss=stop_loss, seed=seed, progress=progress)
+    return {
+        'S0': S0,
+        'stop_loss': stop_loss,
+        'num_paths': num_paths,
+        'median_drawdown': float(np.median(metrics['max_drawdown'])),
+        'drawdown_95': float(np.quantile(metrics['max_drawdown'], 0.95)),
+        'stop_probability': float(metrics['barrier_hit'].mean()),
+        'mean_exit': float(metrics['exit_price'].mean()),
+        'mean_terminal': float(metrics['terminal'].mean()),
+    }
+
+def benchmark(path_counts=(100, 1000, 10000, 100000), N=252, repeats=3):
+    """Times the NumPy and Numba kernels over a range of path counts and reports the crossover point.
+
+    Args:
+        path_counts (tuple, optional): The numbers of paths to time.
+        N (int, optional): Number of steps per path (default is 252).
+        repeats (int, optional): Number of timed runs per measurement; the best is kept.
+
+    Returns:
+        list: One (num_paths, numpy_seconds, numba_seconds or None) tuple per path count.
+    """
+    backends = ['numpy'] + (['numba'] if NUMBA_AVAILABLE else [])
+    rng = np.random.default_rng(0)
+
+    # Compile (or load from the on-disk cache) before timing anything
+    if NUMBA_AVAILABLE:
+        path_metrics(100.0, 0.0003, 0.02, rng.standard_normal((2, 4)), backend='numba')
+
+    rows = []
+    for num_paths in path_counts:
+        W = np.cumsum(rng.standard_normal((num_paths, N)), axis=1)
+        timings = {}
+        for backend in backends:
+            best = float('inf')
+            for _ in range(repeats):
+                started = time.perf_counter()
+                path_metrics(100.0, 0.0003, 0.02, W, barrier=80.0, stop_loss=85.0, backend=backend)
+                best = min(best, time.perf_counter() - started)
+            timings[backend] = best
+        rows.append((num_paths, timings['numpy'], timings.get('numba')))
+
+    # Print a small table and the first path count at which Numba wins
+    print(f"{'paths':>10} {'numpy (s)':>12} {'numba (s)':>12}")
+    for num_paths, numpy_time, numba_time in rows:
+        numba_text = f"{numba_time:12.4f}" if numba_time is not None else f"{'n/a':>12}"
+        print(f"{num_paths:>10} {numpy_time:12.4f} {numba_text}")
+    if NUMBA_AVAILABLE:
+        faster = [num_paths for num_paths, numpy_time, numba_time in rows if numba_time < numpy_time]
+        print(f"Numba is faster from {faster[0]} paths" if faster else "Numba was not faster at any tested size")
+    else:
+        print("Numba is not installed; only the NumPy kernel was timed")
+    return rows
+
+if __name__ == "__main__":
+    # Run with: python -m ssef_analysis_tool.kernels
+    benchmark()
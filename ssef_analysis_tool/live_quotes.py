@@ -0,0 +1,295 @@
+# ssef_analysis_tool/live_quotes.py
+
+# Import necessary libraries for polling quotes and aggregating them into bars
+import os
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot, QCoreApplication
+
+# How often the shared poller asks the quote feed for new prices (milliseconds)
+LIVE_POLL_INTERVAL_MS = 15000
+
+# Pandas frequencies used to find the start of the bar a tick belongs to, for intraday timeframes
+INTRADAY_FREQUENCIES = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1h',
+}
+
+def bar_start(timestamp, timeframe):
+    """Returns the opening time of the bar that contains a timestamp.
+
+    Args:
+        timestamp (pd.Timestamp): The (timezone-aware) time of the tick.
+        timeframe (str): The chart timeframe (e.g. '1m', '1h', '1d', '1wk', '1mo').
+
+    Returns:
+        pd.Timestamp: The opening time of the bar in the same timezone as the timestamp.
+    """
+    if timeframe in INTRADAY_FREQUENCIES:
+        return timestamp.floor(INTRADAY_FREQUENCIES[timeframe])
+    # Daily and longer bars open at midnight of their first day
+    day = timestamp.normalize()
+    if timeframe == '1d':
+        return day
+    if timeframe == '1wk':
+        return day - pd.Timedelta(days=day.weekday())
+    if timeframe == '1mo':
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+class BarAggregator:
+    """Aggregates individual ticks into the current OHLCV bar of a timeframe."""
+
+    def __init__(self, timeframe, last_bar=None):
+        self.timeframe = timeframe  # Timeframe of the bars being built
+        self.bar = None  # The bar currently being built, as a dict
+        self.timezone = 'UTC'  # Timezone in which bar boundaries are computed
+        if last_bar is not None:
+            self.seed(last_bar)
+
+    def seed(self, last_bar):
+        """Continues from the last historical bar so early ticks update it instead of opening a new one.
+
+        Args:
+            last_bar (dict): The last bar already on the chart, with 'time', 'open', 'high', 'low', 'close' and 'volume'.
+        """
+        self.bar = dict(last_bar)
+        time = pd.Timestamp(self.bar['time'])
+        if time.tzinfo is not None:
+            # Use the chart's own timezone so live bars line up with the historical ones
+            self.timezone = time.tzinfo
+        else:
+            # A naive time is taken to be in the aggregator's timezone, so it compares with the tick times
+            time = time.tz_localize(self.timezone)
+        self.bar['time'] = time
+
+    def add_tick(self, timestamp, price, size=0):
+        """Adds a tick and returns the updated bar.
+
+        Args:
+            timestamp (pd.Timestamp): The time of the tick.
+            price (float): The traded price.
+            size (float, optional): The traded volume since the previous tick. Defaults to 0.
+
+        Returns:
+            dict: A copy of the bar the tick was aggregated into.
+        """
+        start = bar_start(timestamp.tz_convert(self.timezone), self.timeframe)
+
+        if self.bar is None or start > self.bar['time']:
+            # The tick opens a new bar
+            self.bar = {'time': start, 'open': price, 'high': price, 'low': price, 'close': price, 'volume': size}
+        elif start == self.bar['time']:
+            # The tick falls inside the current bar
+            self.bar['high'] = max(self.bar['high'], price)
+            self.bar['low'] = min(self.bar['low'], price)
+            self.bar['close'] = price
+            self.bar['volume'] += size
+        # Late ticks for bars that are already closed are ignored
+
+        return dict(self.bar)
+
+class YahooQuoteFeed:
+    """Quote feed that fetches the latest prices of many tickers with one batched Yahoo Finance request."""
+
+    def __init__(self):
+        # Cumulative day volume seen at the previous poll, used to turn totals into per-tick sizes
+        self.last_volume = {}
+
+    def fetch_quotes(self, tickers):
+        """Fetches the latest quote for every ticker in one request.
+
+        Args:
+            tickers (list): The ticker symbols to fetch.
+
+        Returns:
+            dict: Maps each ticker to a (timestamp, price, size) tuple. Tickers without data are left out.
+        """
+        if not tickers:
+            return {}
+
+        # One grouped download for all tickers instead of one request each
+        data = yf.download(
+            list(tickers), period='1d', interval='1m', group_by='ticker', progress=False, threads=False
+        )
+        quotes = {}
+        for ticker in tickers:
+            try:
+                frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+                frame = frame.dropna(subset=['Close'])
+            except KeyError:
+                continue
+            if frame.empty:
+                continue
+
+            # The latest minute bar gives the last price; the day's total volume gives the traded size
+            timestamp = frame.index[-1]
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.tz_localize('UTC')
+            total_volume = float(frame['Volume'].sum())
+            size = max(total_volume - self.last_volume.get(ticker, total_volume), 0.0)
+            self.last_volume[ticker] = total_volume
+            quotes[ticker] = (timestamp, float(frame['Close'].iloc[-1]), size)
+        return quotes
+
+class LocalQuoteFeed:
+    """Stand-in quote feed producing prices locally, for testing live mode without the network."""
+
+    def __init__(self, start_prices=None, volatility=0.0005, seed=None):
+        self.prices = dict(start_prices or {})  # Last price produced for each ticker
+        self.volatility = volatility  # Standard deviation of the per-poll log return
+        self.rng = np.random.default_rng(seed)  # Random generator for the price walk
+        self.scripted = {}  # Queued (price, size) ticks per ticker, served before the random walk
+        self.lock = threading.Lock()
+
+    def seed_price(self, ticker, price):
+        """Starts the random walk for a ticker from a known price (e.g. the last bar on the chart)."""
+        with self.lock:
+            self.prices.setdefault(ticker, price)
+
+    def push(self, ticker, price, size=0):
+        """Queues a scripted tick to be returned by the next poll for a ticker."""
+        with self.lock:
+            self.scripted.setdefault(ticker, []).append((price, size))
+
+    def fetch_quotes(self, tickers):
+        """Returns one tick per ticker, from the scripted queue if available and otherwise a random walk.
+
+        Args:
+            tickers (list): The ticker symbols to fetch.
+
+        Returns:
+            dict: Maps each ticker to a (timestamp, price, size) tuple.
+        """
+        now = pd.Timestamp.now(tz='UTC')
+        quotes = {}
+        with self.lock:
+            for ticker in tickers:
+                if self.scripted.get(ticker):
+                    price, size = self.scripted[ticker].pop(0)
+                else:
+                    # Move the previous price by a small random log return
+                    previous = self.prices.get(ticker, 100.0)
+                    price = previous * float(np.exp(self.volatility * self.rng.standard_normal()))
+                    size = float(self.rng.integers(1, 1000))
+                self.prices[ticker] = price
+                quotes[ticker] = (now, price, size)
+        return quotes
+
+def create_quote_feed():
+    """Creates the quote feed selected by the SSEF_QUOTE_FEED environment variable ('yahoo' or 'local')."""
+    if os.environ.get('SSEF_QUOTE_FEED', 'yahoo').lower() == 'local':
+        return LocalQuoteFeed()
+    return YahooQuoteFeed()
+
+class QuotePoller(QObject):
+    """Polls the quote feed for every subscribed ticker in one batched request and emits updated bars."""
+    # Emits (ticker, timeframe, bar) whenever a subscribed bar changes
+    bar_updated = pyqtSignal(str, str, dict)
+    # Emits an error message if a poll fails
+    error = pyqtSignal(str)
+
+    def __init__(self, feed=None, interval_ms=LIVE_POLL_INTERVAL_MS):
+        # Initialize the QObject superclass
+        super().__init__()
+        self.feed = feed or create_quote_feed()  # Source of the quotes
+        self.interval_ms = interval_ms  # Time between polls
+        self.subscriptions = {}  # Maps (ticker, timeframe) to the number of subscribers
+        self.aggregators = {}  # Maps (ticker, timeframe) to the BarAggregator building its bar
+        self.lock = threading.Lock()  # Guards the subscriptions, which are changed from the GUI thread
+        self.timer = None  # Created on the poller's own thread in start()
+
+    def subscribe(self, ticker, timeframe, last_bar=None):
+        """Starts receiving live bars for a ticker and timeframe.
+
+        Args:
+            ticker (str): The stock ticker symbol.
+            timeframe (str): The chart timeframe to aggregate ticks into.
+            last_bar (dict, optional): The last historical bar, so live ticks continue it.
+        """
+        key = (ticker.upper(), timeframe)
+        with self.lock:
+            self.subscriptions[key] = self.subscriptions.get(key, 0) + 1
+            if key not in self.aggregators or last_bar is not None:
+                self.aggregators[key] = BarAggregator(timeframe, last_bar)
+        # Let a local stand-in feed start from the chart's last price rather than an arbitrary one
+        if last_bar is not None and hasattr(self.feed, 'seed_price'):
+            self.feed.seed_price(key[0], last_bar['close'])
+
+    def unsubscribe(self, ticker, timeframe):
+        """Stops receiving live bars for a ticker and timeframe once its last subscriber leaves."""
+        key = (ticker.upper(), timeframe)
+        with self.lock:
+            count = self.subscriptions.get(key, 0) - 1
+            if count > 0:
+                self.subscriptions[key] = count
+            else:
+                self.subscriptions.pop(key, None)
+                self.aggregators.pop(key, None)
+
+    @pyqtSlot()
+    def start(self):
+        """Starts the polling timer; must run on the poller's thread."""
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(self.interval_ms)
+
+    @pyqtSlot()
+    def stop(self):
+        """Stops the polling timer."""
+        if self.timer is not None:
+            self.timer.stop()
+
+    @pyqtSlot()
+    def poll(self):
+        """Fetches quotes for all subscribed tickers at once and pushes the updated bars."""
+        with self.lock:
+            keys = list(self.aggregators.keys())
+        if not keys:
+            return
+
+        # Coalesce every open chart and tile into a single request
+        tickers = sorted({ticker for ticker, _ in keys})
+        try:
+            quotes = self.feed.fetch_quotes(tickers)
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+
+        for key in keys:
+            ticker, timeframe = key
+            if ticker not in quotes:
+                continue
+            with self.lock:
+                aggregator = self.aggregators.get(key)
+            if aggregator is None:
+                continue
+            timestamp, price, size = quotes[ticker]
+            self.bar_updated.emit(ticker, timeframe, aggregator.add_tick(timestamp, price, size))
+
+# Single poller and thread shared by every live view in the application
+_shared_poller = None
+_shared_thread = None
+
+def get_quote_poller():
+    """Returns the application-wide QuotePoller, starting it on a background thread on first use."""
+    global _shared_poller, _shared_thread
+    if _shared_poller is None:
+        _shared_thread = QThread()
+        _shared_poller = QuotePoller()
+        _shared_poller.moveToThread(_shared_thread)
+        _shared_thread.started.connect(_shared_poller.start)
+
+        # Shut the polling thread down cleanly when the application exits
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_shared_thread.quit)
+            app.aboutToQuit.connect(_shared_thread.wait)
+
+        _shared_thread.start()
+    return _shared_poller
@@ -2,20 +2,30 @@
 
 # Import necessary PyQt5 classes for GUI components
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QHBoxLayout, QMessageBox
+    QMainWindow, QWidget, QHBoxLayout, QMessageBox, QLabel, QTabWidget, QPushButton
 )
+from PyQt5.QtCore import QTimer
 
 # Import additional modules from other files within the project
 from .sidebar import Sidebar
 from .content_area import ContentArea
-from .data_fetching import fetch_ticker_info
-from .utils import format_number, currency_symbols
-from .styles import MAIN_WINDOW_STYLE
+from .data_fetching import fetch_ticker_info, ticker_info_cache
+from .jobs import get_job_manager
+from .result_store import simulation_store
+from .session import save_snapshot, load_snapshot, revalidate_ticker
+from .api_server import ApiServerThread, API_ENABLED
+from .symbols import symbol_index
+from .memory import memory_manager, format_bytes
+from .utils import format_number, format_age, currency_symbols
+from .styles import MAIN_WINDOW_STYLE, WORKSPACE_TABS_STYLE, BUTTON_STYLE
 import logging
 
 # Configure logging to record error messages
 logging.basicConfig(level=logging.ERROR)
 
+# Milliseconds between refreshes of the memory usage shown in the status bar
+MEMORY_REFRESH_MS = 2000
+
 class MainWindow(QMainWindow):
     """Main application window for the SSEF Analysis Tool."""
 
@@ -30,14 +40,26 @@ class MainWindow(QMainWindow):
         # Initialize various attributes to be used throughout the application
         self.is_sidebar_expanded = True  # Sidebar starts as expanded
         self.active_button = None  # Keeps track of the currently active button in the sidebar
-        self.currency = "$"  # Default currency symbol to use
+        self.last_simulations = {}  # Last simulation of each ticker, shared by all workspaces
+        self.last_path_risk = {}  # Drawdown and stop-loss statistics of each ticker, shared by all workspaces
+        self.revalidation_keys = set()  # Job keys of the background refreshes of a restored session
+
+        # All workspaces share one job pool, which runs the visible workspace's jobs first
+        self.jobs = get_job_manager()
+        self.jobs.finished.connect(self.on_job_finished)
+
+        # Optional local JSON API, serving other tools from this process's caches (set SSEF_API_PORT to enable)
+        self.api_thread = None
+        if API_ENABLED:
+            self.api_thread = ApiServerThread()
+            self.api_thread.start()
 
         # Initialize the user interface and apply styles
         self.init_ui()
         self.apply_styles()
 
-        # Variable to keep track of the currently selected stock ticker
-        self.current_ticker = None
+        # Restore the last session once the window is up, from cached data only
+        QTimer.singleShot(0, self.restore_session)
 
     def init_ui(self):
         """Initializes the UI components."""
@@ -48,19 +70,104 @@ class MainWindow(QMainWindow):
         # Use a horizontal box layout to organize the components of the main window
         self.main_layout = QHBoxLayout(self.central_widget)
 
-        # Initialize Sidebar and Content Area, which are defined in separate files
+        # Initialize Sidebar and the workspace tabs, each holding its own Content Area
         self.sidebar = Sidebar(self)  # Sidebar contains buttons for navigation
-        self.content_area = ContentArea(self)  # ContentArea contains dynamic content widgets
+        self.workspaces = QTabWidget()  # One tab per workspace, each with its own ticker and view
+        self.workspaces.setTabsClosable(True)
+        self.workspaces.setMovable(True)
+        self.workspaces.tabCloseRequested.connect(self.close_workspace)
+        self.workspaces.currentChanged.connect(self.on_workspace_changed)
 
-        # Add Sidebar and Content Area to the main layout
+        # Button opening a new workspace, e.g. to compare another company side by side
+        new_workspace_button = QPushButton("+")
+        new_workspace_button.setToolTip("New workspace")
+        new_workspace_button.setStyleSheet(BUTTON_STYLE)
+        new_workspace_button.clicked.connect(lambda: self.add_workspace())
+        self.workspaces.setCornerWidget(new_workspace_button)
+        self.add_workspace()
+
+        # Add Sidebar and the workspaces to the main layout
         self.main_layout.addWidget(self.sidebar)
-        self.main_layout.addWidget(self.content_area)
+        self.main_layout.addWidget(self.workspaces)
+
+        # Status bar showing the memory held by the caches, with a per-cache breakdown in its tooltip
+        self.memory_label = QLabel()
+        self.memory_label.setStyleSheet("color: white;")
+        self.statusBar().addPermanentWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.update_memory_usage)
+        self.memory_timer.start(MEMORY_REFRESH_MS)
+        self.update_memory_usage()
 
     def apply_styles(self):
         """Applies styles to the main window."""
         # Apply the specified stylesheet to the main window and the central widget
         self.setStyleSheet(MAIN_WINDOW_STYLE)
         self.central_widget.setStyleSheet(MAIN_WINDOW_STYLE)
+        self.workspaces.setStyleSheet(WORKSPACE_TABS_STYLE)
+
+    @property
+    def content_area(self):
+        """The Content Area of the visible workspace."""
+        return self.workspaces.currentWidget()
+
+    @property
+    def current_ticker(self):
+        """The ticker of the visible workspace."""
+        return self.content_area.current_ticker
+
+    @property
+    def currency(self):
+        """The currency symbol of the visible workspace."""
+        return self.content_area.currency
+
+    def add_workspace(self):
+        """Opens a new, empty workspace and shows it.
+
+        Returns:
+            ContentArea: The new workspace.
+        """
+        workspace = ContentArea(self, self.last_simulations, self.last_path_risk)
+        self.workspaces.setCurrentIndex(self.workspaces.addTab(workspace, "New Workspace"))
+        return workspace
+
+    def close_workspace(self, index):
+        """Closes a workspace tab, keeping at least one open."""
+        if self.workspaces.count() == 1:
+            return
+        workspace = self.workspaces.widget(index)
+        self.workspaces.removeTab(index)
+        workspace.close_workspace()
+        workspace.deleteLater()
+
+    def workspace_tickers(self):
+        """Returns the tickers open in any workspace."""
+        tickers = (self.workspaces.widget(index).current_ticker for index in range(self.workspaces.count()))
+        return {ticker for ticker in tickers if ticker}
+
+    def on_workspace_changed(self, index):
+        """Shows the state of the workspace brought to the front and moves its jobs ahead in the queue."""
+        workspace = self.workspaces.widget(index)
+        if workspace is None:
+            return
+        self.sidebar.ticker_entry.setText(workspace.current_ticker or "")
+        self.sidebar.highlight_active_button(workspace.current_view if workspace.current_ticker else None)
+        self.update_workspace_title(workspace)
+        self.jobs.set_foreground(workspace.current_ticker)
+
+    def update_workspace_title(self, workspace):
+        """Names a workspace's tab after its ticker, and the window after the visible workspace's ticker."""
+        ticker = workspace.current_ticker
+        self.workspaces.setTabText(self.workspaces.indexOf(workspace), ticker or "New Workspace")
+        if workspace is self.content_area:
+            self.setWindowTitle(f"SSEF - Analysis Tool: {ticker}" if ticker else "SSEF - Analysis Tool")
+
+    def update_memory_usage(self):
+        """Refreshes the cache memory shown in the status bar."""
+        self.memory_label.setText(memory_manager.describe())
+        breakdown = [f"{label}: {format_bytes(size)}" for label, size in memory_manager.usage().items()]
+        breakdown.append(f"Evicted entries: {memory_manager.evictions}")
+        self.memory_label.setToolTip("\n".join(breakdown))
 
     def change_right_widget(self, widget_name):
         """Switches the main content area to display the selected widget."""
@@ -76,6 +183,17 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", "Ticker box is empty")
             return
 
+        # Reject symbols missing from the local symbol index before going to the network. The index
+        # may lag new listings, so the user can still choose to look the symbol up online.
+        entry = symbol_index.lookup(ticker)
+        if entry is None and symbol_index.is_available:
+            answer = QMessageBox.question(
+                self, "Unknown Ticker",
+                f"{ticker} is not in the local symbol index. Look it up online anyway?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                return
+
         try:
             # Fetch ticker information using the data_fetching module
             info = fetch_ticker_info(ticker)
@@ -85,15 +203,15 @@ class MainWindow(QMainWindow):
                 QMessageBox.critical(self, "Error", f"No data found for ticker {ticker}")
                 return
 
-            # Set the current ticker attribute
-            self.current_ticker = ticker
+            # Work out the currency symbol, preferring the symbol index over the ticker information
+            currency_code = (entry and entry['currency']) or info.get('currency', 'USD')
 
-            # Update the window title to include the ticker symbol
-            self.setWindowTitle(f"SSEF - Analysis Tool: {ticker}")
+            # Show the ticker in the visible workspace and stop background work nobody needs any more
+            self.content_area.set_ticker(ticker, currency_symbols.get(currency_code, currency_code))
+            self.jobs.set_foreground(ticker)
 
-            # Update currency symbol based on ticker information
-            currency_code = info.get('currency', 'USD')
-            self.currency = currency_symbols.get(currency_code, currency_code)
+            # Update the tab and window titles to include the ticker symbol
+            self.update_workspace_title(self.content_area)
 
             # Display the fetched ticker information in the content area
             self.display_ticker_info(info)
@@ -111,24 +229,130 @@ class MainWindow(QMainWindow):
 
     def display_ticker_info(self, info):
         """Displays the ticker information in the info text widget."""
+        # Update the stock information in the content area with the formatted details
+        self.content_area.update_stock_info(self.format_ticker_info(info, self.currency))
+
+    def format_ticker_info(self, info, currency):
+        """Formats the ticker information for the info text widget, with prices in the given currency symbol."""
         # Format the retrieved ticker information for display in the content area
         details = f"Name: {info.get('longName', 'N/A')}\n"
         details += f"Sector: {info.get('sector', 'N/A')}\n"
         details += f"Full Time Employees: {format_number(info.get('fullTimeEmployees', 'N/A'))}\n"
         details += f"Business Summary: {info.get('longBusinessSummary', 'N/A')}\n"
         details += f"Website: {info.get('website', 'N/A')}\n"
-        details += f"Market Cap: {format_number(info.get('marketCap', 'N/A'), self.currency)}\n"
-        details += f"PE Ratio: {info.get('forwardPE', 'N/A')}\n"
+        # Market-driven fields note their age when they come from the cache
+        details += f"Market Cap: {format_number(info.get('marketCap', 'N/A'), currency)}{format_age(info.age('marketCap'))}\n"
+        details += f"PE Ratio: {info.get('forwardPE', 'N/A')}{format_age(info.age('forwardPE'))}\n"
         
         # Format dividend yield if available, else display "N/A"
         dividend_yield = info.get('dividendYield')
         if dividend_yield:
-            details += f"Dividend Yield: {dividend_yield * 100:.2f}%\n"
+            details += f"Dividend Yield: {dividend_yield * 100:.2f}%{format_age(info.age('dividendYield'))}\n"
         else:
             details += "Dividend Yield: N/A\n"
         
         # Format book value if available
-        details += f"Book Value: {format_number(info.get('bookValue', 'N/A'), self.currency)}\n"
+        details += f"Book Value: {format_number(info.get('bookValue', 'N/A'), currency)}\n"
 
-        # Update the stock information in the content area with the formatted details
-        self.content_area.update_stock_info(details)
\ No newline at end of file
+        return details
+
+    def session_state(self):
+        """Returns the state saved with the session: every workspace's view plus references to the cached data."""
+        workspaces = [self.workspaces.widget(index) for index in range(self.workspaces.count())]
+        return {
+            'workspaces': [workspace.session_state() for workspace in workspaces],
+            'active': self.workspaces.currentIndex(),
+            # Simulation results are referenced by their key in the result store
+            'simulations': {ticker: record.key for ticker, record in self.last_simulations.items()
+                            if record.key is not None},
+        }
+
+    def restore_session(self):
+        """Restores the last session's workspaces from its snapshot and cached data, then refreshes stale data in the background."""
+        snapshot = load_snapshot()
+        if snapshot is None:
+            return
+
+        # Simulation results are read back from the result store
+        for ticker, key in snapshot['simulations'].items():
+            record = simulation_store.get(key)
+            if record is not None:
+                self.last_simulations[ticker] = record
+
+        # The first workspace is already open; the others are opened as they are restored
+        for index, state in enumerate(snapshot.get('workspaces') or []):
+            workspace = self.content_area if index == 0 else self.add_workspace()
+            self.restore_workspace(workspace, state)
+        self.workspaces.setCurrentIndex(min(snapshot.get('active', 0), self.workspaces.count() - 1))
+        self.on_workspace_changed(self.workspaces.currentIndex())
+
+    def restore_workspace(self, workspace, state):
+        """Restores one workspace from the cached data only and queues a refresh of its ticker's data."""
+        workspace.ratio_panel.peers_entry.setText(state.get('peers', ''))
+        workspace.backtest_panel.tickers_entry.setText(state.get('backtest_tickers', ''))
+        watchlist = state.get('watchlist') or []
+        if watchlist:
+            # The watchlist downloads its recent bars in the background and fills its tiles when they arrive
+            workspace.watchlist.ticker_entry.setText(", ".join(watchlist))
+            workspace.watchlist.set_tickers(watchlist)
+
+        ticker = state.get('ticker')
+        if not ticker:
+            return
+        info = ticker_info_cache.peek(ticker)
+        if not info:
+            # Nothing cached for the ticker (e.g. the data folder was cleared), so load it as usual
+            self.workspaces.setCurrentWidget(workspace)
+            self.confirm_ticker(ticker)
+            return
+
+        # Show the last view at once from the cached info, stored bars and stored statements
+        workspace.set_ticker(ticker, state.get('currency', workspace.currency))
+        workspace.update_stock_info(self.format_ticker_info(info, workspace.currency))
+        workspace.chart_widget.show_stored(ticker, state.get('timeframe'))
+        workspace.restore_view(state.get('view', "Information"))
+        self.update_workspace_title(workspace)
+
+        # Then bring the ticker's info, bars and statements up to date in the background; workspaces
+        # showing the same ticker and timeframe share the job
+        timeframe = workspace.chart_widget.current_timeframe
+        key = ('revalidate', ticker, timeframe)
+        self.revalidation_keys.add(key)
+        self.jobs.submit(key, revalidate_ticker, ticker, timeframe, tag=ticker)
+
+    def on_job_finished(self, key, result):
+        """Shows the refreshed data of a restored ticker in the workspaces that still show it."""
+        if key not in self.revalidation_keys:
+            return
+        self.revalidation_keys.discard(key)
+        ticker, timeframe = key[1], key[2]
+
+        for index in range(self.workspaces.count()):
+            workspace = self.workspaces.widget(index)
+            if workspace.current_ticker != ticker:
+                continue
+
+            # Refresh the information text, without replacing another view that uses the same text widget
+            details = self.format_ticker_info(result['info'], workspace.currency)
+            if workspace.current_view == "Information":
+                workspace.update_stock_info(details)
+            else:
+                workspace.stock_info_text = details
+
+            # Put the updated bars on the chart if it still shows the same series
+            chart = workspace.chart_widget
+            bars = result['bars']
+            if not bars.empty and chart.current_ticker == ticker and chart.current_timeframe == timeframe:
+                chart.cache_frame(f"{ticker}_{timeframe}", bars)
+                chart.show_bars(ticker, timeframe, bars)
+
+    def closeEvent(self, event):
+        """Saves a snapshot of the session before the window closes."""
+        try:
+            save_snapshot(self.session_state())
+        except Exception:
+            # A failed snapshot only costs a cold start next time
+            logging.exception("Failed to save the session snapshot")
+        if self.api_thread is not None:
+            self.api_thread.stop()
+        super().closeEvent(event)
\ No newline at end of file
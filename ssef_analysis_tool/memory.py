@@ -0,0 +1,204 @@
+# ssef_analysis_tool/memory.py
+
+# Import necessary libraries for tracking and bounding the memory held by caches
+import mmap
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+# Total bytes the registered caches may hold, configurable with SSEF_MEMORY_BUDGET_MB
+MEMORY_BUDGET_BYTES = int(float(os.environ.get('SSEF_MEMORY_BUDGET_MB', 1024)) * 2 ** 20)
+# Seconds assumed to recreate an entry when its owner does not measure it
+DEFAULT_RECREATE_COST = 0.1
+
+def estimate_size(obj, seen=None):
+    """Returns the approximate number of bytes an object holds, following its contents.
+
+    DataFrames and Series are measured with memory_usage(deep=True) and arrays with nbytes. Memory-mapped
+    arrays count as zero, since the operating system pages them in and out of their files by itself; so do
+    the columns of DataFrames that are views of them (such as the bar store's frames), leaving their index.
+    Objects reached more than once are counted once.
+
+    Args:
+        obj (object): The object to measure.
+        seen (set, optional): Ids of objects already counted.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        usage = obj.memory_usage(deep=True)
+        # Columns that are zero-copy views of memory-mapped files hold no memory of their own
+        mapped = [column for column in obj.columns if _is_memory_mapped(obj[column].values)]
+        return int(usage.drop(mapped).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return 0 if _is_memory_mapped(obj.values) else int(obj.memory_usage(deep=True))
+    if _is_memory_mapped(obj):
+        return 0
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            return obj.nbytes + sum(estimate_size(item, seen) for item in obj.flat)
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(key, seen) + estimate_size(value, seen)
+                                        for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + estimate_size(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+def _is_memory_mapped(array):
+    """Returns whether an array is a memory-mapped file or a view of one."""
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+def format_bytes(size):
+    """Formats a byte count for display (e.g. '12.3 MB')."""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+class _Entry:
+    """Bookkeeping for one tracked cache entry."""
+
+    def __init__(self, size, cost, priority):
+        self.size = size  # Estimated bytes held by the entry
+        self.cost = cost  # Seconds it takes to recreate the entry
+        self.priority = priority  # Greedy-Dual-Size priority; the lowest is evicted first
+
+class MemoryManager:
+    """Accounts for the memory of every registered cache and evicts entries to stay within a budget.
+
+    Caches register an eviction callback and report their entries with track(). When the total
+    exceeds the budget, entries are evicted with the Greedy-Dual-Size policy: each entry's priority is
+    its recreation cost per byte plus an inflation value that rises with every eviction, and is
+    refreshed when the entry is used. Large entries that are cheap to recreate therefore go first,
+    and entries that have not been used for a while eventually go regardless of their cost.
+
+    Every registered cache keeps its data on disk (bar store, statement and info files, simulation
+    records) or can recompute it, so evicting an entry only drops the in-memory copy.
+    """
+
+    def __init__(self, budget=MEMORY_BUDGET_BYTES):
+        self.budget = budget  # Total bytes the tracked entries may hold
+        self.owners = {}  # Maps each registered owner to (label, eviction callback)
+        self.entries = {}  # Maps (owner, key) to its _Entry
+        self.total = 0  # Bytes held by all tracked entries
+        self.inflation = 0.0  # Priority of the last evicted entry, which ages the remaining ones
+        self.evictions = 0  # Number of entries evicted so far
+        self.lock = threading.Lock()  # Caches report their entries from worker threads
+
+    def register(self, owner, evict, label=None):
+        """Registers a cache whose entries are tracked.
+
+        Args:
+            owner (hashable): The cache (usually the cache object itself).
+            evict (callable): Called with an entry key to drop that entry from the cache. It may be called
+                from any thread, and must not call back into the manager.
+            label (str, optional): Name shown in the usage breakdown; caches with the same label are summed.
+        """
+        with self.lock:
+            self.owners[owner] = (label or type(owner).__name__, evict)
+
+    def unregister(self, owner):
+        """Forgets a cache and all of its entries (e.g. when its widget is closed)."""
+        with self.lock:
+            self.owners.pop(owner, None)
+            for entry_key in [k for k in self.entries if k[0] is owner]:
+                self.total -= self.entries.pop(entry_key).size
+
+    def track(self, owner, key, obj=None, size=None, cost=None):
+        """Records (or updates) the size of a cache entry, evicting other entries if over budget.
+
+        Owners must call this outside their own locks, since it may call their eviction callback.
+
+        Args:
+            owner (hashable): The registered cache holding the entry.
+            key (hashable): The entry's key within the cache.
+            obj (object, optional): The cached object, measured with estimate_size.
+            size (int, optional): The size in bytes, instead of measuring obj.
+            cost (float, optional): Seconds it took to create the entry. Defaults to the entry's previous
+                cost, or DEFAULT_RECREATE_COST for a new entry.
+
+        Returns:
+            int: The size recorded for the entry.
+        """
+        size = estimate_size(obj) if size is None else int(size)
+        with self.lock:
+            if owner not in self.owners:
+                return size
+            previous = self.entries.get((owner, key))
+            if cost is None:
+                cost = previous.cost if previous is not None else DEFAULT_RECREATE_COST
+            if previous is not None:
+                self.total -= previous.size
+            self.entries[(owner, key)] = _Entry(size, cost, self.inflation + cost / max(size, 1))
+            self.total += size
+        self._enforce()
+        return size
+
+    def touch(self, owner, key):
+        """Marks a cache entry as used, which protects it from eviction for a while."""
+        with self.lock:
+            entry = self.entries.get((owner, key))
+            if entry is not None:
+                entry.priority = self.inflation + entry.cost / max(entry.size, 1)
+
+    def forget(self, owner, key):
+        """Stops tracking an entry the cache has dropped by itself."""
+        with self.lock:
+            entry = self.entries.pop((owner, key), None)
+            if entry is not None:
+                self.total -= entry.size
+
+    def set_budget(self, budget):
+        """Changes the budget, evicting entries at once if the new one is exceeded."""
+        with self.lock:
+            self.budget = int(budget)
+        self._enforce()
+
+    def _enforce(self):
+        """Evicts the entries with the lowest priority until the total is within the budget."""
+        victims = []
+        with self.lock:
+            while self.total > self.budget and self.entries:
+                entry_key = min(self.entries, key=lambda k: self.entries[k].priority)
+                entry = self.entries.pop(entry_key)
+                self.total -= entry.size
+                self.inflation = entry.priority
+                self.evictions += 1
+                victims.append((self.owners[entry_key[0]][1], entry_key[1]))
+        # Callbacks run outside the lock, since they take the caches' own locks
+        for evict, key in victims:
+            try:
+                evict(key)
+            except Exception as e:
+                print(f"Failed to evict cache entry {key}: {e}")
+
+    def usage(self):
+        """Returns the bytes held per cache label, largest first."""
+        with self.lock:
+            by_label = {label: 0 for label, _ in self.owners.values()}
+            for (owner, _), entry in self.entries.items():
+                by_label[self.owners[owner][0]] += entry.size
+        return dict(sorted(by_label.items(), key=lambda item: -item[1]))
+
+    def describe(self):
+        """Returns a one-line summary of the usage for the status bar."""
+        return f"Cache memory: {format_bytes(self.total)} / {format_bytes(self.budget)}"
+
+# Shared memory manager every cache registers with
+memory_manager = MemoryManager()
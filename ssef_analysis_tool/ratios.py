@@ -0,0 +1,344 @@
+# ssef_analysis_tool/ratios.py
+
+# Import necessary PyQt5 classes for GUI components
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTableWidget, QTableWidgetItem
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Import additional modules from other files within the project
+from .data_fetching import statement_cache, fetch_ticker_info, STATEMENT_FETCH_WORKERS
+from .jobs import get_job_manager
+from .memory import memory_manager
+from .styles import TABLE_STYLE
+
+# Line items used by the ratios: canonical name -> (statement type, Yahoo labels in order of preference)
+LINE_ITEMS = {
+    'revenue': ('income', ['Total Revenue', 'Operating Revenue']),
+    'gross_profit': ('income', ['Gross Profit']),
+    'operating_income': ('income', ['Operating Income', 'EBIT']),
+    'ebitda': ('income', ['EBITDA', 'Normalized EBITDA']),
+    'net_income': ('income', ['Net Income', 'Net Income Common Stockholders']),
+    'interest_expense': ('income', ['Interest Expense', 'Interest Expense Non Operating']),
+    'total_assets': ('balance', ['Total Assets']),
+    'equity': ('balance', ['Stockholders Equity', 'Common Stock Equity', 'Total Stockholder Equity']),
+    'total_debt': ('balance', ['Total Debt']),
+    'cash': ('balance', ['Cash And Cash Equivalents', 'Cash Cash Equivalents And Short Term Investments']),
+    'current_assets': ('balance', ['Current Assets', 'Total Current Assets']),
+    'current_liabilities': ('balance', ['Current Liabilities', 'Total Current Liabilities']),
+    'operating_cash_flow': ('cash_flow', ['Operating Cash Flow', 'Total Cash From Operating Activities']),
+    'capital_expenditure': ('cash_flow', ['Capital Expenditure', 'Capital Expenditures']),
+    'free_cash_flow': ('cash_flow', ['Free Cash Flow']),
+}
+ITEM_NAMES = list(LINE_ITEMS)
+
+def _previous(x):
+    """Shifts a (tickers, years) array one year later, so each year sees the year before it."""
+    return np.concatenate([np.full((x.shape[0], 1), np.nan), x[:, :-1]], axis=1)
+
+def _average(x):
+    """Average of each year's value and the year before, or the year's value if there is no year before."""
+    previous = _previous(x)
+    return np.where(np.isnan(previous), x, (x + previous) / 2)
+
+def _growth(x):
+    """Year-on-year growth, measured against the absolute previous value so sign changes stay readable."""
+    previous = _previous(x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous != 0, (x - previous) / np.abs(previous), np.nan)
+
+def _free_cash_flow(i):
+    """Reported free cash flow, or operating cash flow plus (negative) capital expenditure where it is missing."""
+    return np.where(np.isnan(i['free_cash_flow']), i['operating_cash_flow'] + i['capital_expenditure'],
+                    i['free_cash_flow'])
+
+# Ratios: name -> (display format, vectorized function of the line items, each a (tickers, years) array)
+RATIOS = {
+    'Gross Margin': ('percent', lambda i: i['gross_profit'] / i['revenue']),
+    'Operating Margin': ('percent', lambda i: i['operating_income'] / i['revenue']),
+    'EBITDA Margin': ('percent', lambda i: i['ebitda'] / i['revenue']),
+    'Net Margin': ('percent', lambda i: i['net_income'] / i['revenue']),
+    'FCF Margin': ('percent', lambda i: _free_cash_flow(i) / i['revenue']),
+    'ROE': ('percent', lambda i: i['net_income'] / _average(i['equity'])),
+    'ROA': ('percent', lambda i: i['net_income'] / _average(i['total_assets'])),
+    'Asset Turnover': ('multiple', lambda i: i['revenue'] / _average(i['total_assets'])),
+    'Debt / Equity': ('multiple', lambda i: i['total_debt'] / i['equity']),
+    'Debt / Assets': ('percent', lambda i: i['total_debt'] / i['total_assets']),
+    'Net Debt / EBITDA': ('multiple', lambda i: (i['total_debt'] - i['cash']) / i['ebitda']),
+    'Current Ratio': ('multiple', lambda i: i['current_assets'] / i['current_liabilities']),
+    'Interest Coverage': ('multiple', lambda i: i['operating_income'] / np.abs(i['interest_expense'])),
+    'FCF Yield': ('percent', lambda i: _free_cash_flow(i) / i['market_cap']),
+    'Revenue Growth': ('percent', lambda i: _growth(i['revenue'])),
+    'Net Income Growth': ('percent', lambda i: _growth(i['net_income'])),
+    'FCF Growth': ('percent', lambda i: _growth(_free_cash_flow(i))),
+}
+RATIO_NAMES = list(RATIOS)
+
+def align_line_items(statements):
+    """Picks the line items out of one ticker's statements, aligned by fiscal year.
+
+    Args:
+        statements (dict): Maps each statement type to its DataFrame (rows are labels, columns period dates).
+
+    Returns:
+        tuple: (years, values) with an int array of fiscal years and a (years, len(ITEM_NAMES)) float array.
+    """
+    # Fiscal years reported by any of the statements
+    years = sorted({pd.Timestamp(column).year for frame in statements.values() if not frame.empty
+                    for column in frame.columns})
+    values = np.full((len(years), len(ITEM_NAMES)), np.nan)
+    year_index = {year: i for i, year in enumerate(years)}
+    for item, (statement_type, labels) in LINE_ITEMS.items():
+        frame = statements.get(statement_type)
+        if frame is None or frame.empty:
+            continue
+        label = next((label for label in labels if label in frame.index), None)
+        if label is None:
+            continue
+        # Columns run from oldest to newest, so a later period in the same year overwrites an earlier one
+        row = pd.to_numeric(frame.loc[label], errors='coerce')
+        for column, value in row.items():
+            values[year_index[pd.Timestamp(column).year], ITEM_NAMES.index(item)] = value
+    return np.array(years, dtype=np.int64), values
+
+def compute_ratio_block(items, market_caps):
+    """Computes every ratio for a batch of tickers in one vectorized pass.
+
+    Args:
+        items (np.ndarray): Line items of shape (tickers, years, len(ITEM_NAMES)).
+        market_caps (np.ndarray): Current market capitalization per ticker (NaN if unknown).
+
+    Returns:
+        np.ndarray: Ratios of shape (tickers, years, len(RATIO_NAMES)).
+    """
+    arrays = {name: items[:, :, i] for i, name in enumerate(ITEM_NAMES)}
+    # The FCF yield of every year is measured against today's market capitalization
+    arrays['market_cap'] = np.repeat(market_caps[:, None], items.shape[1], axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.stack([function(arrays) for _, function in RATIOS.values()], axis=-1)
+    # Divisions by zero give infinities, which are as meaningless as a missing value here
+    ratios[~np.isfinite(ratios)] = np.nan
+    return ratios
+
+class RatioTable:
+    """Ratios of several tickers over their fiscal years, as a (ticker x year x metric) array."""
+
+    def __init__(self, tickers, years, values):
+        self.tickers = tickers  # Ticker of each row
+        self.years = years  # Fiscal year of each column
+        self.values = values  # Ratios of shape (tickers, years, metrics)
+
+    def metric(self, name):
+        """Returns one ratio as a DataFrame of tickers x years."""
+        return pd.DataFrame(self.values[:, :, RATIO_NAMES.index(name)], index=self.tickers, columns=self.years)
+
+    def for_ticker(self, ticker):
+        """Returns one ticker's ratios as a DataFrame of metrics x years, leaving out years without data."""
+        block = self.values[self.tickers.index(ticker)]
+        reported = ~np.all(np.isnan(block), axis=1)
+        return pd.DataFrame(block[reported].T, index=RATIO_NAMES, columns=self.years[reported])
+
+    def latest(self):
+        """Returns each ticker's most recent value of every ratio as a DataFrame of tickers x metrics."""
+        # Index of the last non-missing year per ticker and metric
+        present = ~np.isnan(self.values)
+        last = self.values.shape[1] - 1 - np.argmax(present[:, ::-1, :], axis=1)
+        latest = np.take_along_axis(self.values, last[:, None, :], axis=1)[:, 0, :]
+        latest[~present.any(axis=1)] = np.nan
+        return pd.DataFrame(latest, index=self.tickers, columns=RATIO_NAMES)
+
+class RatioEngine:
+    """Computes ratios for many tickers at once, recomputing only tickers whose statements changed."""
+
+    def __init__(self):
+        self.entries = {}  # Maps each ticker to (signature, years, ratios of shape (years, metrics))
+        self.lock = threading.Lock()  # Ratios may be requested from several worker threads
+        # Evicted ratios are recomputed from the statements on the next request
+        memory_manager.register(self, self._evict, 'Ratios')
+
+    def _evict(self, ticker):
+        """Drops a ticker's ratios when the memory manager needs the space."""
+        with self.lock:
+            self.entries.pop(ticker, None)
+
+    @staticmethod
+    def _signature(statements, market_cap):
+        """Identifies the statement periods (and market cap) a ticker's cached ratios were computed from."""
+        periods = tuple((statement_type, tuple(str(column) for column in frame.columns))
+                        for statement_type, frame in sorted(statements.items()))
+        return periods, None if np.isnan(market_cap) else round(float(market_cap), -6)
+
+    def compute(self, statements_by_ticker, market_caps=None):
+        """Returns the ratios of all given tickers, reusing cached results for unchanged statements.
+
+        Args:
+            statements_by_ticker (dict): Maps each ticker to its statements (as returned by StatementCache.get_all).
+            market_caps (dict, optional): Maps tickers to their market capitalization, for the FCF yield.
+
+        Returns:
+            RatioTable: The ratios aligned on the union of the tickers' fiscal years.
+        """
+        market_caps = market_caps or {}
+        tickers = list(statements_by_ticker)
+        with self.lock:
+            # Only tickers with a new statement period (or a moved market cap) are recomputed
+            changed = []
+            for ticker in tickers:
+                cap = float(market_caps.get(ticker, np.nan))
+                signature = self._signature(statements_by_ticker[ticker], cap)
+                entry = self.entries.get(ticker)
+                if entry is None or entry[0] != signature:
+                    changed.append((ticker, signature, cap))
+
+            if changed:
+                # Align the changed tickers on their common years and compute their ratios in one pass
+                aligned = [align_line_items(statements_by_ticker[ticker]) for ticker, _, _ in changed]
+                years = np.unique(np.concatenate([ticker_years for ticker_years, _ in aligned]))
+                items = np.full((len(changed), len(years), len(ITEM_NAMES)), np.nan)
+                for row, (ticker_years, values) in enumerate(aligned):
+                    items[row, np.searchsorted(years, ticker_years)] = values
+                ratios = compute_ratio_block(items, np.array([cap for _, _, cap in changed]))
+                for row, ((ticker, signature, _), (ticker_years, _)) in enumerate(zip(changed, aligned)):
+                    self.entries[ticker] = (signature, ticker_years, ratios[row, np.searchsorted(years, ticker_years)])
+
+            # Place every ticker's cached ratios on the union of all years
+            entries = [self.entries[ticker] for ticker in tickers]
+        recomputed = {ticker for ticker, _, _ in changed}
+        for ticker, entry in zip(tickers, entries):
+            if ticker in recomputed:
+                memory_manager.track(self, ticker, entry)
+            else:
+                memory_manager.touch(self, ticker)
+        all_years = np.unique(np.concatenate([entry[1] for entry in entries])) if entries else np.array([], dtype=np.int64)
+        values = np.full((len(tickers), len(all_years), len(RATIO_NAMES)), np.nan)
+        for row, (_, ticker_years, ratios) in enumerate(entries):
+            values[row, np.searchsorted(all_years, ticker_years)] = ratios
+        return RatioTable(tickers, all_years, values)
+
+# Shared ratio engine used by the ratio view
+ratio_engine = RatioEngine()
+
+def fetch_market_caps(tickers, max_workers=STATEMENT_FETCH_WORKERS):
+    """Fetches the current market capitalization of many tickers in parallel.
+
+    Args:
+        tickers (list): The ticker symbols.
+        max_workers (int, optional): Number of parallel requests.
+
+    Returns:
+        dict: Maps each ticker to its market capitalization (NaN if unavailable).
+    """
+    def fetch(ticker):
+        try:
+            return ticker, float(fetch_ticker_info(ticker, ['marketCap'])['marketCap'])
+        except Exception:
+            return ticker, np.nan
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(fetch, tickers))
+
+def compare_tickers(tickers, progress=None):
+    """Fetches statements and market caps for many tickers and computes their ratios; meant to run as a job.
+
+    Args:
+        tickers (list): The ticker symbols.
+        progress (callable, optional): Called with the percentage done; may raise to cancel.
+
+    Returns:
+        RatioTable: The ratios of the tickers whose statements could be fetched.
+    """
+    statements = statement_cache.get_many(tickers)
+    if progress:
+        progress(60)
+    market_caps = fetch_market_caps(list(statements))
+    if progress:
+        progress(90)
+    return ratio_engine.compute(statements, market_caps)
+
+def format_ratio(name, value):
+    """Formats a ratio for display as a percentage or a multiple."""
+    if pd.isna(value):
+        return "N/A"
+    return f"{value:.1%}" if RATIOS[name][0] == 'percent' else f"{value:.2f}x"
+
+class RatioPanel(QWidget):
+    """Panel showing a ticker's ratios by year, or the latest ratios of the ticker and its peers."""
+
+    def __init__(self, parent=None):
+        # Initialize the QWidget superclass
+        super().__init__(parent)
+        self.ticker = None  # Ticker whose ratios are shown
+        self.job_key = None  # Key of the job computing the shown ratios
+        self.init_ui()
+
+        # Statements are fetched on the application's shared job pool
+        self.jobs = get_job_manager()
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.error.connect(self.on_job_error)
+
+    def init_ui(self):
+        """Initializes the panel UI."""
+        layout = QVBoxLayout(self)
+
+        # Optional peers for a comparable-company view
+        controls = QHBoxLayout()
+        self.peers_entry = QLineEdit()
+        self.peers_entry.setPlaceholderText("Peers, comma separated (e.g. MSFT, GOOGL) - leave empty for the ticker's history")
+        self.peers_entry.setStyleSheet("background-color: white; color: black; padding: 5px;")
+        self.peers_entry.returnPressed.connect(self.refresh)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: white;")
+        controls.addWidget(self.peers_entry)
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget()
+        self.table.setStyleSheet(TABLE_STYLE)
+        layout.addWidget(self.table)
+
+    def set_ticker(self, ticker):
+        """Shows the ratios of a ticker (and its peers)."""
+        self.ticker = ticker
+        self.refresh()
+
+    def refresh(self):
+        """Queues the ratio computation for the ticker and its peers."""
+        if not self.ticker:
+            return
+        peers = [peer.strip().upper() for peer in self.peers_entry.text().split(',') if peer.strip()]
+        tickers = [self.ticker] + [peer for peer in peers if peer != self.ticker]
+        self.job_key = ('ratios', tuple(tickers))
+        self.status_label.setText(f"Loading statements for {len(tickers)} tickers...")
+        self.jobs.submit(self.job_key, compare_tickers, tickers, tag=self.ticker)
+
+    def on_job_finished(self, key, table):
+        """Shows the ratios once they are computed."""
+        if key != self.job_key:
+            return
+        self.status_label.setText("")
+        if len(table.tickers) == 1:
+            # A single ticker is shown with one column per fiscal year
+            self.fill_table(table.for_ticker(table.tickers[0]), by_row=True)
+        else:
+            # Peers are compared on their latest reported year, one row per ticker
+            self.fill_table(table.latest(), by_row=False)
+
+    def on_job_error(self, key, error_message):
+        """Reports a failed ratio computation."""
+        if key == self.job_key:
+            self.status_label.setText(f"Failed to load ratios: {error_message}")
+
+    def fill_table(self, frame, by_row):
+        """Fills the table with a frame of ratios, formatting each cell by its metric."""
+        self.table.clear()
+        self.table.setRowCount(len(frame.index))
+        self.table.setColumnCount(len(frame.columns))
+        self.table.setHorizontalHeaderLabels([str(column) for column in frame.columns])
+        self.table.setVerticalHeaderLabels([str(index) for index in frame.index])
+        for row, index in enumerate(frame.index):
+            for col, column in enumerate(frame.columns):
+                # Metrics are the rows of a single ticker's view and the columns of the peer view
+                name = index if by_row else column
+                self.table.setItem(row, col, QTableWidgetItem(format_ratio(name, frame.iat[row, col])))
+        self.table.resizeColumnsToContents()
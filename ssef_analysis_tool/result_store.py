@@ -0,0 +1,210 @@
+# ssef_analysis_tool/result_store.py
+
+# Import necessary libraries for memoizing simulation results in memory and on disk
+import os
+import json
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Import additional modules from other files within the project
+from .utils import DATA_DIR
+from .memory import memory_manager
+
+# Number of simulation results kept in memory
+MAX_MEMORY_ENTRIES = 32
+# Number of histogram bins stored with each result, fine enough for the kernel density estimate
+SUMMARY_BINS = 500
+# Quantile levels stored with each result
+QUANTILE_LEVELS = (0.01, 0.05, 0.10, 0.25, 0.50, 0.75, 0.90, 0.95, 0.99)
+# Confidence levels whose expected shortfall is stored with each result
+SHORTFALL_LEVELS = (0.95, 0.99)
+# Whether the raw terminal prices are written to disk along with the summaries
+STORE_TERMINAL_PRICES = True
+# Seed used by the application's simulations so repeat views are reproducible
+DEFAULT_SIMULATION_SEED = 42
+
+def simulation_key(ticker, as_of, model, parameters, num_paths, horizon, seed):
+    """Builds the key identifying a simulation by all of its inputs.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        as_of (str): The date of the last bar the parameters were estimated from (e.g. '2024-05-31').
+        model (str): The simulation model (e.g. 'gbm').
+        parameters (dict): The model parameters (e.g. S0, mu, sigma, sampler).
+        num_paths (int): Number of simulated paths.
+        horizon (int): Simulation horizon in trading days.
+        seed (int): The random seed.
+
+    Returns:
+        tuple: A hashable key.
+    """
+    return (ticker.upper(), str(as_of), model, tuple(sorted(parameters.items())), int(num_paths), int(horizon), seed)
+
+def coarsen_histogram(counts, edges, bins=SUMMARY_BINS):
+    """Trims the empty outer bins of a fine histogram and merges neighbouring bins down to about `bins` bins.
+
+    Args:
+        counts (np.ndarray): Counts of the fine histogram.
+        edges (np.ndarray): Edges of the fine histogram.
+        bins (int, optional): Approximate number of bins to keep. Defaults to SUMMARY_BINS.
+
+    Returns:
+        tuple: The (counts, edges) of the coarse histogram.
+    """
+    filled = np.flatnonzero(counts)
+    if len(filled) == 0:
+        return counts, edges
+    counts = counts[filled[0]:filled[-1] + 1]
+    edges = edges[filled[0]:filled[-1] + 2]
+    group = int(np.ceil(len(counts) / bins))
+    # Pad with empty bins so every coarse bin merges the same number of fine bins
+    padding = -len(counts) % group
+    counts = np.concatenate([counts, np.zeros(padding, dtype=counts.dtype)]).reshape(-1, group).sum(axis=1)
+    width = edges[1] - edges[0]
+    edges = np.concatenate([edges, edges[-1] + width * np.arange(1, padding + 1)])[::group]
+    return counts, edges
+
+class SimulationRecord:
+    """Summary of a simulation run: histogram, quantiles, estimate and optionally the terminal prices."""
+
+    def __init__(self, S0, histogram, bin_edges, quantiles, estimate, stderr, num_paths, final_prices=None,
+                 shortfalls=None):
+        self.S0 = S0  # Starting price of the simulation
+        self.histogram = histogram  # Counts of terminal prices per bin
+        self.bin_edges = bin_edges  # Edges of the histogram bins
+        self.quantiles = quantiles  # Maps each level in QUANTILE_LEVELS to its terminal price quantile
+        self.estimate = estimate  # Mean terminal price estimate
+        self.stderr = stderr  # Standard error of the estimate
+        self.num_paths = num_paths  # Number of simulated paths
+        self.final_prices = final_prices  # Raw terminal prices, or None if not kept
+        self.shortfalls = shortfalls or {}  # Maps each level in SHORTFALL_LEVELS to its expected shortfall
+        self.key = None  # Key of the record in the result store, set once it is stored or loaded
+
+    @classmethod
+    def from_result(cls, result, S0):
+        """Summarizes a SimulationResult started from price S0."""
+        prices = np.asarray(result.final_prices)
+        histogram, bin_edges = np.histogram(prices, bins=SUMMARY_BINS)
+        quantiles = dict(zip(QUANTILE_LEVELS, np.quantile(prices, QUANTILE_LEVELS).tolist()))
+        return cls(S0, histogram, bin_edges, quantiles, result.estimate, result.stderr, len(prices), prices)
+
+    @classmethod
+    def from_sketch(cls, sketch, S0):
+        """Summarizes a SimulationSketch started from price S0, without any raw prices."""
+        histogram, bin_edges = coarsen_histogram(sketch.histogram.counts, sketch.histogram.edges)
+        quantiles = dict(zip(QUANTILE_LEVELS, np.atleast_1d(sketch.quantile(QUANTILE_LEVELS)).tolist()))
+        shortfalls = {level: sketch.expected_shortfall(S0, level) for level in SHORTFALL_LEVELS}
+        return cls(S0, histogram, bin_edges, quantiles, sketch.estimate, sketch.stderr, sketch.count,
+                   shortfalls=shortfalls)
+
+    def value_at_risk(self, level=0.95):
+        """Returns the loss per share not exceeded with the given confidence over the horizon."""
+        return self.S0 - self.quantiles[round(1 - level, 2)]
+
+    def expected_shortfall(self, level=0.95):
+        """Returns the mean loss per share in the worst (1 - level) of outcomes, or None if it is unknown."""
+        if level in self.shortfalls:
+            return self.shortfalls[level]
+        if self.final_prices is None:
+            return None
+        cutoff = self.quantiles[round(1 - level, 2)]
+        tail = self.final_prices[self.final_prices <= cutoff]
+        return self.S0 - float(tail.mean()) if len(tail) else None
+
+class SimulationResultStore:
+    """Two-tier store of simulation records: an in-memory LRU and compressed files on disk."""
+
+    def __init__(self, folder=None, max_entries=MAX_MEMORY_ENTRIES):
+        self.folder = folder or os.path.join(DATA_DIR, 'simulations')  # Folder of the on-disk tier
+        self.max_entries = max_entries  # Capacity of the in-memory tier
+        self.memory = OrderedDict()  # Most recently used records last
+        self.lock = threading.Lock()  # Records may be stored from worker threads
+        # Records evicted for memory stay available from the on-disk tier
+        memory_manager.register(self, self._evict, 'Simulation results')
+
+    def _path(self, key):
+        """Returns the file holding a record on disk."""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, f"{digest}.npz")
+
+    def get(self, key):
+        """Returns the record for a key from memory or disk, or None if it was never stored."""
+        with self.lock:
+            record = self.memory.get(key)
+            if record is not None:
+                self.memory.move_to_end(key)
+        if record is not None:
+            memory_manager.touch(self, key)
+            return record
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        start = time.perf_counter()
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                record = SimulationRecord(
+                    meta['S0'], data['histogram'], data['bin_edges'],
+                    {float(level): value for level, value in meta['quantiles'].items()},
+                    meta['estimate'], meta['stderr'], meta['num_paths'],
+                    data['final_prices'] if 'final_prices' in data.files else None,
+                    {float(level): value for level, value in meta.get('shortfalls', {}).items()},
+                )
+        except Exception as e:
+            # An unreadable file is treated as a miss and rewritten on the next run
+            print(f"Discarding unreadable simulation file {path}: {e}")
+            return None
+
+        record.key = key
+        self._remember(key, record, time.perf_counter() - start)
+        return record
+
+    def put(self, key, record):
+        """Stores a record in memory and on disk and returns it."""
+        record.key = key
+        self._remember(key, record)
+
+        os.makedirs(self.folder, exist_ok=True)
+        meta = {
+            'key': repr(key),
+            'S0': record.S0,
+            'quantiles': {str(level): value for level, value in record.quantiles.items()},
+            'estimate': record.estimate,
+            'stderr': record.stderr,
+            'num_paths': record.num_paths,
+            'shortfalls': {str(level): value for level, value in record.shortfalls.items()},
+        }
+        arrays = {'histogram': record.histogram, 'bin_edges': record.bin_edges, 'meta': np.array(json.dumps(meta))}
+        if STORE_TERMINAL_PRICES and record.final_prices is not None:
+            arrays['final_prices'] = record.final_prices
+
+        # Write to a temporary file first so an interrupted save never leaves a corrupt record
+        path = self._path(key)
+        temp_path = f"{path[:-4]}.tmp.npz"
+        np.savez_compressed(temp_path, **arrays)
+        os.replace(temp_path, path)
+        return record
+
+    def _remember(self, key, record, cost=None):
+        """Adds a record to the in-memory LRU, evicting the least recently used one if full."""
+        dropped = []
+        with self.lock:
+            self.memory[key] = record
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                dropped.append(self.memory.popitem(last=False)[0])
+        for old_key in dropped:
+            memory_manager.forget(self, old_key)
+        memory_manager.track(self, key, record, cost=cost)
+
+    def _evict(self, key):
+        """Drops a record from the in-memory tier when the memory manager needs the space."""
+        with self.lock:
+            self.memory.pop(key, None)
+
+# Shared result store used by the simulation views and the risk report
+simulation_store = SimulationResultStore()
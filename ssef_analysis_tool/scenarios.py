@@ -0,0 +1,379 @@
+# ssef_analysis_tool/scenarios.py
+
+# Import necessary PyQt5 classes for GUI components
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox,
+    QTableWidget, QTableWidgetItem, QMessageBox
+)
+from PyQt5.QtGui import QColor
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Import additional modules from other files within the project
+from .estimators import estimator_service
+from .jobs import get_job_manager
+from .memory import memory_manager
+from .result_store import DEFAULT_SIMULATION_SEED
+from .simulations import (
+    draw_normals, sketch_edges, run_tasks, _chunk_sizes, DEFAULT_SAMPLER, SKETCH_CHUNK_SIZE, SKETCH_CHUNKS_PER_TASK,
+    PARALLEL_MIN_PATHS
+)
+from .sketches import SimulationSketch
+from .styles import TABLE_STYLE, BUTTON_STYLE
+
+# Trading days per year, used to convert between annual and daily drift and volatility
+TRADING_DAYS = 252
+# Default annual drift assumptions; None stands for the drift estimated from history
+SWEEP_DRIFTS = (None, -0.20, 0.0, 0.10)
+# Default multipliers applied to the estimated volatility
+SWEEP_VOL_MULTIPLIERS = (0.5, 1.0, 1.5, 2.0)
+# Default horizons in trading days (one month, one quarter, half a year, one year)
+SWEEP_HORIZONS = (21, 63, 126, 252)
+# Default number of paths shared by every scenario
+SWEEP_PATHS = 100000
+# Quantile levels reported per scenario
+SWEEP_LEVELS = (0.01, 0.05, 0.25, 0.50, 0.75, 0.95, 0.99)
+
+def _sweep_task(S0, mus, sigmas, horizons, sizes, sampler, edges, seed):
+    """Simulates chunks of paths once and prices every scenario off the same draws; runs in a worker process.
+
+    Args:
+        S0 (float): The initial stock price.
+        mus (np.ndarray): Daily drift of each (drift, volatility) scenario.
+        sigmas (np.ndarray): Daily volatility of each (drift, volatility) scenario.
+        horizons (np.ndarray): Horizons in trading days, ascending.
+        sizes (list): Number of paths in each chunk.
+        sampler (str): The sampler used to draw the normals.
+        edges (list): Histogram edges per horizon and scenario.
+        seed (np.random.SeedSequence): Seed of this task.
+
+    Returns:
+        list: One list of SimulationSketch per horizon, one sketch per scenario.
+    """
+    rng = np.random.default_rng(seed)
+    sketch_seed = int(rng.integers(2 ** 63))
+    sketches = [[SimulationSketch(e, seed=sketch_seed) for e in row] for row in edges]
+    steps = np.sqrt(np.diff(np.concatenate([[0], horizons])))
+    drifts = np.outer(mus - 0.5 * sigmas ** 2, horizons)  # (scenarios, horizons)
+    for size in sizes:
+        # Common random numbers: the Brownian values at every horizon are shared by all scenarios
+        W = np.cumsum(draw_normals(sampler, size, len(horizons), rng) * steps, axis=1)
+        for h in range(len(horizons)):
+            prices = S0 * np.exp(drifts[:, h, None] + sigmas[:, None] * W[None, :, h])
+            for s, sketch in enumerate(sketches[h]):
+                sketch.update(prices[s])
+    return sketches
+
+class ScenarioSweep:
+    """Quantiles and risk figures of simulated prices for a grid of drift, volatility and horizon scenarios."""
+
+    def __init__(self, S0, drifts, vol_multipliers, horizons, sigma, sketches):
+        self.S0 = S0  # Starting price of every scenario
+        self.drifts = drifts  # Annual drift of each drift scenario
+        self.vol_multipliers = vol_multipliers  # Volatility multiplier of each volatility scenario
+        self.horizons = horizons  # Horizons in trading days
+        self.sigma = sigma  # Estimated annual volatility the multipliers apply to
+        self.sketches = sketches  # SimulationSketch per (drift, volatility, horizon)
+
+        # Summaries of shape (drifts, vols, horizons[, levels]) for quick display
+        shape = (len(drifts), len(vol_multipliers), len(horizons))
+        self.quantiles = np.empty(shape + (len(SWEEP_LEVELS),))
+        self.mean = np.empty(shape)
+        self.loss_probability = np.empty(shape)
+        self.shortfall = np.empty(shape)
+        for index in np.ndindex(shape):
+            sketch = sketches[index]
+            self.quantiles[index] = sketch.quantile(SWEEP_LEVELS)
+            self.mean[index] = sketch.estimate
+            self.loss_probability[index] = sketch.fraction_below(S0)
+            self.shortfall[index] = sketch.expected_shortfall(S0, 0.95)
+
+    def statistic(self, name):
+        """Returns the (drifts, vols, horizons) array of a statistic listed in statistic_names()."""
+        if name == 'Mean':
+            return self.mean
+        if name == 'P(loss)':
+            return self.loss_probability
+        if name == 'ES 95%':
+            return self.shortfall
+        return self.quantiles[..., SWEEP_LEVELS.index(float(name.rstrip('%')) / 100)]
+
+    @staticmethod
+    def statistic_names():
+        """Returns the names of the statistics available per scenario."""
+        return [f"{level:.0%}" for level in SWEEP_LEVELS] + ['Mean', 'P(loss)', 'ES 95%']
+
+    def table(self):
+        """Returns one row per scenario with its quantiles, mean, loss probability and expected shortfall."""
+        rows = []
+        for d, v, h in np.ndindex(self.mean.shape):
+            row = {
+                'Drift': self.drifts[d],
+                'Volatility': self.sigma * self.vol_multipliers[v],
+                'Horizon': self.horizons[h],
+            }
+            row.update({name: self.statistic(name)[d, v, h] for name in self.statistic_names()})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+def run_scenario_sweep(S0, mu, sigma, drifts=SWEEP_DRIFTS, vol_multipliers=SWEEP_VOL_MULTIPLIERS,
+                       horizons=SWEEP_HORIZONS, num_paths=SWEEP_PATHS, sampler=DEFAULT_SAMPLER,
+                       seed=DEFAULT_SIMULATION_SEED, workers=None, progress=None):
+    """Simulates every combination of drift, volatility and horizon as one batched job.
+
+    All scenarios are priced off the same Brownian draws (common random numbers), so differences
+    between scenarios reflect the assumptions rather than sampling noise.
+
+    Args:
+        S0 (float): The initial stock price.
+        mu (float): The estimated daily drift, used where a drift assumption is None.
+        sigma (float): The estimated daily volatility the multipliers apply to.
+        drifts (tuple, optional): Annual drift assumptions (None for the estimate).
+        vol_multipliers (tuple, optional): Multipliers of the estimated volatility.
+        horizons (tuple, optional): Horizons in trading days.
+        num_paths (int, optional): Number of paths shared by every scenario.
+        sampler (str, optional): 'pseudo', 'antithetic' or 'sobol' (default is DEFAULT_SAMPLER).
+        seed (int, optional): Seed for reproducible results.
+        workers (int, optional): Number of worker processes. Defaults to all cores for large sweeps.
+        progress (callable, optional): Called with the percentage of work done as tasks finish (see run_tasks).
+
+    Returns:
+        ScenarioSweep: The per-scenario sketches and their summaries.
+    """
+    annual_drifts = [mu * TRADING_DAYS if drift is None else drift for drift in drifts]
+    horizons = sorted(set(int(h) for h in horizons))
+
+    # Flatten the (drift, volatility) grid; the horizons are handled inside each task
+    grid = [(drift / TRADING_DAYS, sigma * multiplier) for drift in annual_drifts for multiplier in vol_multipliers]
+    mus = np.array([m for m, _ in grid])
+    sigmas = np.array([s for _, s in grid])
+    edges = [[sketch_edges(S0, m, s, h) for m, s in grid] for h in horizons]
+
+    # Smaller chunks keep the (scenarios x chunk) price array within the memory of one simulation chunk
+    chunk_size = max(SKETCH_CHUNK_SIZE // len(grid), 1024)
+    sizes = _chunk_sizes(sampler, num_paths, chunk_size)
+    tasks = [sizes[i:i + SKETCH_CHUNKS_PER_TASK] for i in range(0, len(sizes), SKETCH_CHUNKS_PER_TASK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    if workers is None:
+        workers = (os.cpu_count() or 1) if num_paths * len(grid) * len(horizons) >= PARALLEL_MIN_PATHS else 1
+    workers = min(workers, len(tasks))
+
+    arguments = [(S0, mus, sigmas, np.array(horizons, dtype=np.float64), task, sampler, edges, task_seed)
+                 for task, task_seed in zip(tasks, seeds)]
+    results = run_tasks(_sweep_task, arguments, workers, progress)
+
+    # Merge the partial sketches in task order so the result does not depend on the number of workers
+    merged = results[0]
+    for partial in results[1:]:
+        for h, row in enumerate(partial):
+            for s, sketch in enumerate(row):
+                merged[h][s].merge(sketch)
+
+    # Arrange the sketches by (drift, volatility, horizon)
+    sketches = np.empty((len(annual_drifts), len(vol_multipliers), len(horizons)), dtype=object)
+    for h in range(len(horizons)):
+        for s, sketch in enumerate(merged[h]):
+            sketches[s // len(vol_multipliers), s % len(vol_multipliers), h] = sketch
+    return ScenarioSweep(S0, annual_drifts, list(vol_multipliers), horizons, sigma * np.sqrt(TRADING_DAYS), sketches)
+
+def sweep_ticker(ticker, drifts, vol_multipliers, horizons, num_paths, progress=None):
+    """Runs a scenario sweep for a ticker with parameters from the estimator service; meant to run as a job.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        drifts (list): Annual drift assumptions (None for the estimate).
+        vol_multipliers (list): Multipliers of the estimated volatility.
+        horizons (list): Horizons in trading days.
+        num_paths (int): Number of paths shared by every scenario.
+        progress (callable, optional): Called with the percentage done; may raise to cancel the sweep.
+
+    Returns:
+        ScenarioSweep: The completed sweep.
+    """
+    params = estimator_service.get_gbm_parameters(ticker)
+    return run_scenario_sweep(params['S0'], params['mu'], params['sigma'], drifts, vol_multipliers,
+                              horizons, num_paths, progress=progress)
+
+def parse_grid(text, allow_estimate=False):
+    """Parses a comma-separated list of numbers, with 'est' standing for None if allowed.
+
+    Args:
+        text (str): The text typed by the user (e.g. "est, -20, 0, 10").
+        allow_estimate (bool, optional): Whether 'est' is accepted. Defaults to False.
+
+    Returns:
+        list: The parsed values.
+
+    Raises:
+        ValueError: If a value is not a number or the list is empty.
+    """
+    values = []
+    for part in text.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        values.append(None if allow_estimate and part == 'est' else float(part))
+    if not values:
+        raise ValueError("Enter at least one value")
+    return values
+
+class ScenarioSweepPanel(QWidget):
+    """Panel for running scenario sweeps and showing one statistic per scenario as a heatmap table."""
+
+    def __init__(self, parent=None):
+        # Initialize the QWidget superclass
+        super().__init__(parent)
+        self.ticker = None  # Ticker the sweep runs for
+        self.currency = ''  # Currency symbol of the ticker
+        self.sweep = None  # Last completed sweep
+        self.sweep_key = None  # Job key of the sweep being run or last run
+        self.submitted_at = None  # When the current sweep was queued, to weigh its cost against its memory
+        self.init_ui()
+
+        # The completed sweep's sketches count towards the memory budget; an evicted sweep has to be rerun
+        memory_manager.register(self, self.evict_sweep, 'Scenario sweep')
+
+        # Sweeps run on the application's shared job pool
+        self.jobs = get_job_manager()
+        self.jobs.progress.connect(self.on_job_progress)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.error.connect(self.on_job_error)
+        self.jobs.cancelled.connect(self.on_job_cancelled)
+
+    def init_ui(self):
+        """Initializes the panel UI."""
+        layout = QVBoxLayout(self)
+
+        # Scenario grids: annual drifts in percent, volatility multipliers and horizons in trading days
+        inputs = QHBoxLayout()
+        self.drift_entry = QLineEdit("est, -20, 0, 10")
+        self.vol_entry = QLineEdit(", ".join(f"{m:g}" for m in SWEEP_VOL_MULTIPLIERS))
+        self.horizon_entry = QLineEdit(", ".join(str(h) for h in SWEEP_HORIZONS))
+        self.paths_entry = QLineEdit(str(SWEEP_PATHS))
+        for label, entry in (("Drift % p.a.", self.drift_entry), ("Vol x", self.vol_entry),
+                             ("Horizons (days)", self.horizon_entry), ("Paths", self.paths_entry)):
+            caption = QLabel(label)
+            caption.setStyleSheet("color: white;")
+            entry.setStyleSheet("background-color: white; color: black; padding: 3px;")
+            inputs.addWidget(caption)
+            inputs.addWidget(entry)
+        self.run_button = QPushButton("Run Sweep")
+        self.run_button.setStyleSheet(BUTTON_STYLE)
+        self.run_button.clicked.connect(self.run_sweep)
+        inputs.addWidget(self.run_button)
+        layout.addLayout(inputs)
+
+        # Statistic shown in the heatmap, and the sweep status
+        controls = QHBoxLayout()
+        self.statistic_box = QComboBox()
+        self.statistic_box.addItems(ScenarioSweep.statistic_names())
+        self.statistic_box.setCurrentText("5%")
+        self.statistic_box.currentTextChanged.connect(self.show_sweep)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: white;")
+        controls.addWidget(self.statistic_box)
+        controls.addWidget(self.status_label)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        # Heatmap: one row per (drift, volatility) scenario and one column per horizon
+        self.table = QTableWidget()
+        self.table.setStyleSheet(TABLE_STYLE)
+        layout.addWidget(self.table)
+
+    def set_ticker(self, ticker, currency):
+        """Sets the ticker the next sweep runs for."""
+        self.ticker = ticker
+        self.currency = currency
+
+    def run_sweep(self):
+        """Parses the grids and queues the sweep on the job pool."""
+        if not self.ticker:
+            QMessageBox.warning(self, "Warning", "Please enter a valid ticker symbol.")
+            return
+        try:
+            drifts = [None if d is None else d / 100 for d in parse_grid(self.drift_entry.text(), allow_estimate=True)]
+            vol_multipliers = parse_grid(self.vol_entry.text())
+            horizons = [int(h) for h in parse_grid(self.horizon_entry.text())]
+            num_paths = int(self.paths_entry.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", f"Invalid scenario grid: {e}")
+            return
+
+        # Repeated clicks with the same grids join the sweep already queued or running
+        key = ('sweep', self.ticker, tuple(drifts), tuple(vol_multipliers), tuple(horizons), num_paths)
+        if self.sweep_key is not None and self.sweep_key != key:
+            self.jobs.cancel(key=self.sweep_key)
+        self.sweep_key = key
+        self.submitted_at = time.perf_counter()
+        self.status_label.setText(f"Queued {len(drifts) * len(vol_multipliers) * len(horizons)} scenarios...")
+        self.jobs.submit(key, sweep_ticker, self.ticker, drifts, vol_multipliers, horizons, num_paths, tag=self.ticker)
+
+    def on_job_progress(self, key, percent):
+        """Shows the progress of the current sweep."""
+        if key == self.sweep_key:
+            self.status_label.setText(f"Running... {percent}%")
+
+    def on_job_finished(self, key, result):
+        """Shows the result of the current sweep; results of superseded sweeps are ignored."""
+        if key == self.sweep_key:
+            self.on_sweep_complete(result)
+
+    def on_job_error(self, key, error_message):
+        """Reports a failure of the current sweep."""
+        if key == self.sweep_key:
+            self.on_sweep_error(error_message)
+
+    def on_job_cancelled(self, key):
+        """Clears the status of a cancelled sweep."""
+        if key == self.sweep_key:
+            self.status_label.setText("Sweep cancelled.")
+
+    def on_sweep_complete(self, sweep):
+        """Stores and shows a completed sweep."""
+        self.sweep = sweep
+        memory_manager.track(self, 'sweep', sweep, cost=time.perf_counter() - self.submitted_at)
+        self.status_label.setText(f"{self.ticker}: start {self.currency}{sweep.S0:.2f}, "
+                                  f"estimated volatility {sweep.sigma:.1%} p.a.")
+        self.show_sweep()
+
+    def on_sweep_error(self, error_message):
+        """Reports a failed sweep."""
+        self.status_label.setText("")
+        QMessageBox.critical(self, "Error", f"Scenario sweep failed: {error_message}")
+
+    def evict_sweep(self, key):
+        """Drops the completed sweep when the memory manager needs the space; the table keeps showing it."""
+        self.sweep = None
+
+    def show_sweep(self):
+        """Fills the heatmap with the selected statistic of every scenario."""
+        # The sweep may be evicted by the memory manager from another thread
+        sweep = self.sweep
+        if sweep is None:
+            return
+        name = self.statistic_box.currentText()
+        values = sweep.statistic(name)
+        drifts, vols, horizons = values.shape
+
+        self.table.setRowCount(drifts * vols)
+        self.table.setColumnCount(horizons)
+        self.table.setHorizontalHeaderLabels([f"{h}d" for h in sweep.horizons])
+        self.table.setVerticalHeaderLabels([f"μ {sweep.drifts[d]:+.0%}, σ {sweep.sigma * sweep.vol_multipliers[v]:.0%}"
+                                            for d in range(drifts) for v in range(vols)])
+
+        # Colour from red (worst) to green (best); for loss figures a higher value is worse
+        low, high = np.nanmin(values), np.nanmax(values)
+        span = (high - low) or 1.0
+        higher_is_worse = name in ('P(loss)', 'ES 95%')
+        for d, v, h in np.ndindex(values.shape):
+            value = values[d, v, h]
+            text = f"{value:.1%}" if name == 'P(loss)' else f"{self.currency}{value:,.2f}"
+            item = QTableWidgetItem(text)
+            score = (value - low) / span
+            if higher_is_worse:
+                score = 1 - score
+            item.setBackground(QColor(int(200 * (1 - score)), int(160 * score), 40))
+            self.table.setItem(d * vols + v, h, item)
@@ -0,0 +1,96 @@
+# ssef_analysis_tool/session.py
+
+# Import necessary libraries for saving and restoring the application session
+import os
+import json
+import time
+
+# Import additional modules from other files within the project
+from .utils import DATA_DIR
+from .data_fetching import fetch_ticker_info, statement_cache, STATEMENT_TYPES
+from .history import history_assembler
+
+# File holding the snapshot of the last session
+SESSION_FILE = os.path.join(DATA_DIR, 'session.json')
+# Format version of the snapshot; snapshots of another version are ignored
+# (version 2 holds a list of workspaces instead of a single view)
+SESSION_VERSION = 2
+
+def _to_json(value):
+    """Converts tuples (e.g. simulation keys) to lists, recursively, so they can be written as JSON."""
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+def _from_json(value):
+    """Converts lists back to tuples, recursively, restoring keys written by _to_json."""
+    if isinstance(value, list):
+        return tuple(_from_json(item) for item in value)
+    return value
+
+def save_snapshot(state, path=SESSION_FILE):
+    """Writes a snapshot of the session: the view state plus references into the on-disk data stores.
+
+    Only small references are written (ticker symbols, the chart's bar series, simulation keys); the
+    data itself stays in the bar store, the statement and info files and the simulation store.
+
+    Args:
+        state (dict): The session state (see MainWindow.session_state).
+        path (str, optional): The snapshot file. Defaults to SESSION_FILE.
+    """
+    snapshot = {'version': SESSION_VERSION, 'saved_at': time.time(), **state}
+    snapshot['simulations'] = {ticker: _to_json(key) for ticker, key in state.get('simulations', {}).items()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so a crash while closing never leaves a corrupt snapshot
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(snapshot, file, indent=1)
+    os.replace(temp_path, path)
+
+def load_snapshot(path=SESSION_FILE):
+    """Reads the snapshot of the last session.
+
+    Returns:
+        dict: The session state with simulation keys restored, or None if there is no usable snapshot.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as file:
+            snapshot = json.load(file)
+    except Exception as e:
+        print(f"Discarding unreadable session file {path}: {e}")
+        return None
+    if snapshot.get('version') != SESSION_VERSION:
+        return None
+    snapshot['simulations'] = {ticker: _from_json(key) for ticker, key in snapshot.get('simulations', {}).items()}
+    return snapshot
+
+def revalidate_ticker(ticker, timeframe, progress=None):
+    """Refreshes the stale parts of a restored ticker's data; meant to run as a background job.
+
+    Every cache involved only goes to the network for what is missing or past its TTL, so a
+    recent session costs little more than a few file reads.
+
+    Args:
+        ticker (str): The restored ticker.
+        timeframe (str): The restored chart timeframe.
+        progress (callable, optional): Called with the percentage done; may raise to cancel.
+
+    Returns:
+        dict: The refreshed 'info' (TickerInfo) and chart 'bars' (DataFrame) of the ticker.
+    """
+    info = fetch_ticker_info(ticker)
+    if progress:
+        progress(30)
+    bars = history_assembler.get_bars(ticker, timeframe)
+    if progress:
+        progress(70)
+    # Statements are only refreshed if the ticker's statements were fetched before
+    for statement_type in STATEMENT_TYPES:
+        if os.path.exists(statement_cache._path(ticker, statement_type)):
+            try:
+                statement_cache.get(ticker, statement_type)
+            except Exception as e:
+                print(f"Failed to revalidate {statement_type} statement for {ticker}: {e}")
+    return {'info': info, 'bars': bars}
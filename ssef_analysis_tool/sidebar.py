@@ -2,13 +2,14 @@
 
 # Import necessary PyQt5 classes for GUI components
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QPushButton, QLineEdit, QMessageBox, QSizePolicy, QLayout
+    QWidget, QVBoxLayout, QPushButton, QLineEdit, QMessageBox, QSizePolicy, QLayout, QCompleter
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QStringListModel
 from functools import partial
 
 # Import styles used in the sidebar from other files within the project
 from .styles import SIDEBAR_STYLE, BUTTON_STYLE, ACTIVE_BUTTON_STYLE
+from .symbols import symbol_index
 
 class Sidebar(QWidget):
     """Sidebar widget containing navigation buttons and search functionality."""
@@ -41,11 +42,20 @@ class Sidebar(QWidget):
         self.ticker_entry.returnPressed.connect(self.confirm_ticker)  # Connect enter key press to confirm_ticker method
         self.layout.addWidget(self.ticker_entry)
 
+        # Ticker Completer: Suggestions come from the local symbol index, which does its own prefix
+        # search, so the completer shows them as they are instead of filtering them again
+        self.suggestions = QStringListModel(self)
+        self.completer = QCompleter(self.suggestions, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setWidget(self.ticker_entry)
+        self.completer.activated[str].connect(self.select_suggestion)
+        self.ticker_entry.textEdited.connect(self.update_suggestions)
+
         # Navigation Buttons: Buttons for navigating different sections of the application
         self.buttons = []
         labels = [
             'Information', 'Graphs', 'Income Statement', 'Balance Sheet',
-            'Cash Flow', 'Risk Statistics', 'Simulate Prices'
+            'Cash Flow', 'Ratios', 'Risk Statistics', 'Simulate Prices', 'Scenario Sweep', 'Backtest', 'Watchlist'
         ]
         for label in labels:
             button = QPushButton(label)  # Create a button for each label
@@ -103,10 +113,27 @@ class Sidebar(QWidget):
         # Update the expanded state
         self.is_expanded = not self.is_expanded
 
+    def update_suggestions(self, text):
+        """Shows the symbols whose ticker or company name starts with the text typed so far."""
+        matches = symbol_index.search(text)
+        self.suggestions.setStringList([
+            f"{match['symbol']}  {match['name']}" + (f" ({match['exchange']})" if match['exchange'] else "")
+            for match in matches
+        ])
+        if matches:
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def select_suggestion(self, suggestion):
+        """Puts the symbol of the chosen suggestion in the ticker entry and confirms it."""
+        self.ticker_entry.setText(suggestion.split()[0])
+        self.confirm_ticker()
+
     def confirm_ticker(self):
         """Handles ticker confirmation and delegates to MainWindow."""
-        # Get the ticker symbol entered by the user
-        ticker = self.ticker_entry.text().strip().upper()
+        # Get the ticker symbol entered by the user (the first word, in case a suggestion was pasted in)
+        ticker = (self.ticker_entry.text().split() or [''])[0].upper()
         if not ticker:
             # Show error message if the ticker input is empty
             QMessageBox.critical(self, "Error", "Ticker box is empty")
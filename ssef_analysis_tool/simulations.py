@@ -1,47 +1,403 @@
 # ssef_analysis_tool/simulations.py
 
 # Import necessary libraries for simulation and threading
+import os
 import numpy as np
-import yfinance as yf
 import threading
-from PyQt5.QtCore import QTimer, QObject, pyqtSignal, QThread
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scipy.stats import qmc
+from scipy.special import ndtri
+from PyQt5.QtCore import QTimer
 
-class SimulationWorker(QObject):
-    """Worker class to perform simulation in a separate thread."""
-    # Define signals for when the simulation is finished or encounters an error
-    finished = pyqtSignal(list)  # Emits a list of final prices
-    error = pyqtSignal(str)  # Emits an error message
+# Import additional modules from other files within the project
+from .estimators import estimator_service
+from .result_store import simulation_store, simulation_key, SimulationRecord, DEFAULT_SIMULATION_SEED
+from .sketches import SimulationSketch
 
-    def __init__(self, ticker):
-        # Initialize the QObject superclass
-        super().__init__()
-        self.ticker = ticker  # Store the stock ticker symbol
+def simulate_ticker(ticker, num_simulations=10000, horizon=252, seed=DEFAULT_SIMULATION_SEED, progress=None):
+    """Simulates a ticker's price with parameters from the estimator service, reusing stored runs.
 
-    def run(self):
-        """Performs the simulation and emits the result."""
-        try:
-            # Download historical prices for the past year with daily intervals
-            hist_prices = yf.download(self.ticker, period='1y', interval='1d')
-            if hist_prices.empty:
-                # Emit an error if no historical data is found for the ticker
-                self.error.emit(f"No historical data found for {self.ticker}")
-                return
-
-            # Calculate log returns based on closing prices
-            log_returns = np.log(hist_prices['Close'] / hist_prices['Close'].shift(1)).dropna()
-            # Get the latest closing price as the starting price for the simulation
-            S0 = hist_prices['Close'].iloc[-1]
-            # Calculate volatility (sigma) and mean return (mu) of the stock
-            sigma = log_returns.std()
-            mu = log_returns.mean() + sigma**2 / 2
-
-            # Perform Geometric Brownian Motion (GBM) simulations
-            final_prices = GBM(S0, mu, sigma)
-            # Emit the simulation results
-            self.finished.emit(final_prices)
-        except Exception as e:
-            # Emit an error message if an exception occurs during simulation
-            self.error.emit(str(e))
+    Meant to run as a background job (see jobs.JobManager).
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        num_simulations (int, optional): Number of paths to simulate (default is 10,000).
+        horizon (int, optional): Simulation horizon in trading days (default is 252).
+        seed (int, optional): Random seed, fixed so repeat views give the same answer.
+        progress (callable, optional): Called with the percentage done; may raise to cancel the run.
+
+    Returns:
+        SimulationRecord: The summary of the simulation.
+
+    Raises:
+        ValueError: If no historical data is found for the ticker.
+    """
+    key, params = prepare_simulation(ticker, num_simulations, horizon, seed)
+    if progress:
+        progress(5)
+
+    # Reuse a stored run if this exact simulation has been done before
+    record = simulation_store.get(key)
+    if record is None:
+        # Perform Geometric Brownian Motion (GBM) simulations, keeping only a fixed-size sketch of the prices
+        simulation_progress = (lambda percent: progress(5 + percent * 0.95)) if progress else None
+        sketch = simulate_gbm_sketch(params['S0'], params['mu'], params['sigma'], T=horizon,
+                                     num_simulations=num_simulations, seed=seed, progress=simulation_progress)
+        record = simulation_store.put(key, SimulationRecord.from_sketch(sketch, params['S0']))
+    return record
+
+def prepare_simulation(ticker, num_simulations=10000, horizon=252, seed=DEFAULT_SIMULATION_SEED):
+    """Returns the result store key of a ticker simulation and the GBM parameters it runs with.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+        num_simulations (int, optional): Number of paths to simulate (default is 10,000).
+        horizon (int, optional): Simulation horizon in trading days (default is 252).
+        seed (int, optional): Random seed.
+
+    Returns:
+        tuple: The key (see result_store.simulation_key) and the parameters from the estimator service.
+
+    Raises:
+        ValueError: If no historical data is found for the ticker.
+    """
+    # Get the starting price, drift and volatility from the rolling estimator service
+    params = estimator_service.get_gbm_parameters(ticker)
+
+    # Identify the run by all of its inputs, including the date of the data it was estimated from
+    as_of = str(np.datetime64(params['as_of_time'], 'ns').astype('datetime64[D]'))
+    model_parameters = {'S0': params['S0'], 'mu': params['mu'], 'sigma': params['sigma'], 'sampler': DEFAULT_SAMPLER}
+    return simulation_key(ticker, as_of, 'gbm', model_parameters, num_simulations, horizon, seed), params
+
+# Samplers available for drawing the normal variates of a simulation
+SAMPLERS = ('pseudo', 'antithetic', 'sobol')
+# Sampler used by the application's simulations
+DEFAULT_SAMPLER = 'sobol'
+# Number of independently randomized Sobol batches used to estimate the standard error
+SOBOL_REPLICATES = 8
+# Largest number of paths drawn at once when streaming into a sketch (a power of two suits Sobol)
+SKETCH_CHUNK_SIZE = 2 ** 18
+# Number of chunks handled by one task of a parallel sketch run
+SKETCH_CHUNKS_PER_TASK = 8
+# Number of histogram bins of a simulation sketch
+SKETCH_BINS = 2000
+# Standard deviations of log price covered by the sketch histogram on each side of the median
+SKETCH_TAIL_STDS = 6
+# Path count from which sketch runs are spread over worker processes
+PARALLEL_MIN_PATHS = 4000000
+
+class SimulationResult:
+    """Terminal prices of a simulation together with the precision of its estimate."""
+
+    def __init__(self, final_prices, estimate, stderr, sampler, control_variate):
+        self.final_prices = final_prices  # Array of simulated terminal prices
+        self.estimate = estimate  # Monte Carlo estimate of E[statistic(S_T)]
+        self.stderr = stderr  # Standard error of the estimate
+        self.sampler = sampler  # Sampler used to draw the normals
+        self.control_variate = control_variate  # Whether the control variate was applied
+
+    @property
+    def num_paths(self):
+        return len(self.final_prices)
+
+def brownian_bridge(z, T):
+    """Builds Brownian paths from normals using Brownian-bridge ordering.
+
+    The first column fixes the terminal value, the next the midpoint, and so on, so the first
+    (best distributed) quasi-random dimensions drive the largest-scale features of each path.
+
+    Args:
+        z (np.ndarray): Standard normals of shape (num_paths, N).
+        T (float): Total time of the paths.
+
+    Returns:
+        np.ndarray: Brownian motion values at times T/N, 2T/N, ..., T, of shape (num_paths, N).
+    """
+    num_paths, N = z.shape
+    times = np.linspace(0, T, N + 1)
+    W = np.zeros((num_paths, N + 1))
+    W[:, N] = np.sqrt(T) * z[:, 0]
+
+    # Fill the grid breadth-first, each point conditioned on its already-known neighbours
+    column = 1
+    intervals = [(0, N)]
+    while intervals:
+        next_intervals = []
+        for left, right in intervals:
+            if right - left < 2:
+                continue
+            middle = (left + right) // 2
+            t_l, t_m, t_r = times[left], times[middle], times[right]
+            mean = ((t_r - t_m) * W[:, left] + (t_m - t_l) * W[:, right]) / (t_r - t_l)
+            std = np.sqrt((t_m - t_l) * (t_r - t_m) / (t_r - t_l))
+            W[:, middle] = mean + std * z[:, column]
+            column += 1
+            next_intervals += [(left, middle), (middle, right)]
+        intervals = next_intervals
+    return W[:, 1:]
+
+def draw_normals(sampler, num_paths, dimensions, rng):
+    """Draws standard normals for a batch of paths.
+
+    Args:
+        sampler (str): 'pseudo', 'antithetic' (second half mirrors the first) or 'sobol' (scrambled Sobol points).
+        num_paths (int): Number of rows to draw; must be even for 'antithetic'.
+        dimensions (int): Number of normals per path.
+        rng (np.random.Generator): The random generator to draw from (also seeds the Sobol scrambling).
+
+    Returns:
+        np.ndarray: The normals, of shape (num_paths, dimensions).
+    """
+    if sampler == 'pseudo':
+        return rng.standard_normal((num_paths, dimensions))
+    if sampler == 'antithetic':
+        half = rng.standard_normal((num_paths // 2, dimensions))
+        return np.concatenate([half, -half])
+    if sampler == 'sobol':
+        # Each call uses a freshly scrambled engine, so batches are independent randomizations. Points are
+        # drawn in a power-of-two block (which keeps them balanced) and cut down to the paths asked for.
+        engine = qmc.Sobol(d=dimensions, scramble=True, seed=rng)
+        points = engine.random_base2(int(np.ceil(np.log2(max(num_paths, 1)))))[:num_paths]
+        # Keep the points strictly inside (0, 1) before mapping them through the inverse normal CDF
+        return ndtri(np.clip(points, 1e-12, 1 - 1e-12))
+    raise ValueError(f"Unknown sampler: {sampler}")
+
+def generate_brownian_paths(num_paths, N, T, sampler=DEFAULT_SAMPLER, seed=None):
+    """Generates Brownian motion paths for path-dependent simulations.
+
+    Args:
+        num_paths (int): Number of paths to generate.
+        N (int): Number of time steps per path.
+        T (float): Total time of the paths.
+        sampler (str, optional): The sampler to draw the normals with. Defaults to DEFAULT_SAMPLER.
+        seed (int, optional): Seed for reproducible paths.
+
+    Returns:
+        np.ndarray: Brownian motion values at each step, of shape (num_paths, N).
+    """
+    rng = np.random.default_rng(seed)
+    z = draw_normals(sampler, num_paths, N, rng)
+    if sampler == 'sobol':
+        return brownian_bridge(z, T)
+    # Pseudo-random increments are simply summed up
+    return np.cumsum(np.sqrt(T / N) * z, axis=1)
+
+def _sobol_sizes(num_simulations, size):
+    """Splits a path count into power-of-two Sobol batches, the last one cut short to give exactly num_simulations."""
+    sizes = [size] * (num_simulations // size)
+    if num_simulations % size:
+        sizes.append(num_simulations % size)
+    return sizes
+
+def _batch_sizes(sampler, num_simulations, batch_size):
+    """Splits a path count into batches suited to the sampler, adding up to exactly num_simulations
+    (antithetic batches excepted, which are rounded up to an even size)."""
+    if sampler == 'sobol':
+        # Powers of two keep the Sobol points balanced; use several batches so the error can be estimated
+        size = 2 ** max(int(np.log2(max(num_simulations // SOBOL_REPLICATES, 1))), 6)
+        return _sobol_sizes(num_simulations, size)
+    sizes = [batch_size] * (num_simulations // batch_size)
+    if num_simulations % batch_size:
+        sizes.append(num_simulations % batch_size)
+    # Antithetic pairs need an even number of paths in every batch
+    return [size + size % 2 for size in sizes] if sampler == 'antithetic' else sizes
+
+def _estimate(batches, sampler, control_mean):
+    """Returns the estimate and standard error from per-batch (statistic, terminal price) arrays."""
+    def to_units(arrays):
+        # Reduce each batch to the units that are independent of each other
+        if sampler == 'pseudo':
+            return np.concatenate(arrays)
+        if sampler == 'antithetic':
+            return np.concatenate([(a[:len(a) // 2] + a[len(a) // 2:]) / 2 for a in arrays])
+        return np.array([a.mean() for a in arrays])
+
+    values = [y for y, _ in batches]
+    controls = [x for _, x in batches]
+    units = to_units(values)
+    # Sobol batch means are weighted by their size, since the last batch may be cut short
+    weights = np.array([len(y) for y in values], dtype=np.float64) if sampler == 'sobol' else None
+
+    if control_mean is not None:
+        # Control variate: regress the statistic on the terminal price, whose mean is known analytically.
+        # The coefficient is fitted on the independent units, except for Sobol where there are too few of them.
+        fit_y, fit_x = (np.concatenate(values), np.concatenate(controls)) if sampler == 'sobol' else (units, to_units(controls))
+        variance = fit_x.var()
+        beta = np.mean((fit_y - fit_y.mean()) * (fit_x - fit_x.mean())) / variance if variance > 0 else 0.0
+        units = units - beta * (to_units(controls) - control_mean)
+
+    estimate = float(np.average(units, weights=weights))
+    if weights is not None and (weights == weights[0]).sum() > 1 and weights[-1] != weights[0]:
+        # The spread of a short last Sobol batch is not comparable, so the error comes from the full batches
+        units = units[weights == weights[0]]
+    stderr = float(units.std(ddof=1) / np.sqrt(len(units))) if len(units) > 1 else float('nan')
+    return estimate, stderr
+
+def simulate_gbm(S0, mu, sigma, T=252, num_simulations=10000, sampler=DEFAULT_SAMPLER, control_variate=False,
+                 statistic=None, target_precision=None, max_simulations=1000000, batch_size=10000, seed=None):
+    """Simulates terminal GBM prices with optional variance reduction.
+
+    Args:
+        S0 (float): The initial stock price.
+        mu (float): The expected return of the stock per time unit.
+        sigma (float): The volatility of the stock per time unit.
+        T (int, optional): Total time period for the simulation (default is 252, one trading year).
+        num_simulations (int, optional): Number of paths to simulate (default is 10,000).
+        sampler (str, optional): 'pseudo', 'antithetic' or 'sobol' (default is DEFAULT_SAMPLER).
+        control_variate (bool, optional): Use the terminal price, whose mean S0 * exp(mu * T) is known,
+            as a control variate. With the default statistic this recovers the analytic mean exactly;
+            it pays off for nonlinear statistics such as loss probabilities.
+        statistic (callable, optional): Vectorized function of the terminal prices whose mean is estimated.
+            Defaults to the terminal price itself.
+        target_precision (float, optional): If given, keep adding batches until the standard error is
+            at most this fraction of the estimate (or max_simulations is reached).
+        max_simulations (int, optional): Upper bound on paths in target precision mode.
+        batch_size (int, optional): Number of paths drawn at once.
+        seed (int, optional): Seed for reproducible results.
+
+    Returns:
+        SimulationResult: The terminal prices, the estimate and its standard error.
+    """
+    rng = np.random.default_rng(seed)
+    statistic = statistic or (lambda prices: prices)
+    control_mean = S0 * np.exp(mu * T) if control_variate else None
+    drift = (mu - 0.5 * sigma ** 2) * T
+
+    # In target precision mode, start from num_simulations and keep adding batches
+    limit = max_simulations if target_precision is not None else num_simulations
+    sizes = _batch_sizes(sampler, num_simulations, batch_size)
+    batches, prices, total = [], [], 0
+    while True:
+        for size in sizes:
+            # Only the terminal value of the Brownian path matters (the first Brownian-bridge dimension)
+            z = draw_normals(sampler, size, 1, rng)[:, 0]
+            final = S0 * np.exp(drift + sigma * np.sqrt(T) * z)
+            prices.append(final)
+            batches.append((np.asarray(statistic(final), dtype=np.float64), final))
+            total += size
+        estimate, stderr = _estimate(batches, sampler, control_mean)
+
+        if target_precision is None or total >= limit:
+            break
+        if stderr <= target_precision * abs(estimate):
+            break
+        # Grow by another round of batches of the same shape
+        sizes = _batch_sizes(sampler, min(num_simulations, limit - total), batch_size)
+
+    return SimulationResult(np.concatenate(prices), estimate, stderr, sampler, control_variate)
+
+def sketch_edges(S0, mu, sigma, T, bins=SKETCH_BINS):
+    """Returns fixed histogram edges covering the analytic GBM terminal price distribution.
+
+    Args:
+        S0 (float): The initial stock price.
+        mu (float): The expected return of the stock per time unit.
+        sigma (float): The volatility of the stock per time unit.
+        T (int): The simulation horizon.
+        bins (int, optional): Number of bins. Defaults to SKETCH_BINS.
+
+    Returns:
+        np.ndarray: The bin edges; prices outside them are kept in the histogram's tail counts.
+    """
+    # Terminal log prices are normal, so SKETCH_TAIL_STDS standard deviations either side hold all but a sliver
+    median = np.log(S0) + (mu - 0.5 * sigma ** 2) * T
+    spread = SKETCH_TAIL_STDS * sigma * np.sqrt(T)
+    return np.linspace(np.exp(median - spread), np.exp(median + spread), bins + 1)
+
+def _chunk_sizes(sampler, num_simulations, chunk_size):
+    """Splits a path count into at least SOBOL_REPLICATES chunks of at most chunk_size paths."""
+    if sampler == 'sobol':
+        sizes = _batch_sizes('sobol', num_simulations, chunk_size)
+        if sizes[0] <= chunk_size:
+            return sizes
+        # Large Sobol runs use more, smaller power-of-two batches
+        return _sobol_sizes(num_simulations, 2 ** int(np.log2(chunk_size)))
+    size = min(chunk_size, int(np.ceil(num_simulations / SOBOL_REPLICATES)))
+    return _batch_sizes(sampler, num_simulations, max(size, 2))
+
+def run_tasks(function, arguments, workers=1, progress=None):
+    """Runs function(*args) for every argument tuple, in worker processes if workers > 1.
+
+    Args:
+        function (callable): A module-level function (so it can be sent to worker processes).
+        arguments (list): One tuple of arguments per task.
+        workers (int, optional): Number of worker processes; 1 runs the tasks in this thread.
+        progress (callable, optional): Called with the percentage of tasks done. If it raises (e.g. to
+            cancel), tasks that have not started are dropped and the exception propagates.
+
+    Returns:
+        list: The results, in the order of the arguments.
+    """
+    results = [None] * len(arguments)
+    if workers <= 1:
+        for i, args in enumerate(arguments):
+            results[i] = function(*args)
+            if progress:
+                progress(int(100 * (i + 1) / len(arguments)))
+        return results
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = {executor.submit(function, *args): i for i, args in enumerate(arguments)}
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(int(100 * done / len(arguments)))
+    finally:
+        # After an error or a cancellation, drop the tasks still waiting before shutting the pool down
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+    return results
+
+def _sketch_task(S0, mu, sigma, T, sizes, sampler, edges, seed):
+    """Simulates chunks of terminal prices into one sketch; runs in a worker process for large runs."""
+    rng = np.random.default_rng(seed)
+    sketch = SimulationSketch(edges, seed=rng.integers(2 ** 63))
+    drift = (mu - 0.5 * sigma ** 2) * T
+    for size in sizes:
+        z = draw_normals(sampler, size, 1, rng)[:, 0]
+        sketch.update(S0 * np.exp(drift + sigma * np.sqrt(T) * z))
+    return sketch
+
+def simulate_gbm_sketch(S0, mu, sigma, T=252, num_simulations=10000, sampler=DEFAULT_SAMPLER, seed=None,
+                        chunk_size=SKETCH_CHUNK_SIZE, workers=None, progress=None):
+    """Simulates terminal GBM prices into a mergeable sketch, so memory stays constant in the path count.
+
+    Args:
+        S0 (float): The initial stock price.
+        mu (float): The expected return of the stock per time unit.
+        sigma (float): The volatility of the stock per time unit.
+        T (int, optional): Total time period for the simulation (default is 252, one trading year).
+        num_simulations (int, optional): Number of paths to simulate (default is 10,000).
+        sampler (str, optional): 'pseudo', 'antithetic' or 'sobol' (default is DEFAULT_SAMPLER).
+        seed (int, optional): Seed for reproducible results; the result does not depend on the number of workers.
+        chunk_size (int, optional): Largest number of paths held in memory at once per process.
+        workers (int, optional): Number of worker processes. Defaults to all cores for runs of at least
+            PARALLEL_MIN_PATHS paths and to in-process simulation below that.
+        progress (callable, optional): Called with the percentage done as tasks finish (see run_tasks).
+
+    Returns:
+        SimulationSketch: The merged histogram, quantile sketch and moments of the terminal prices.
+    """
+    edges = sketch_edges(S0, mu, sigma, T)
+    sizes = _chunk_sizes(sampler, num_simulations, chunk_size)
+
+    # Group the chunks into tasks, each with its own seed, so the merged result is the same however they are run
+    tasks = [sizes[i:i + SKETCH_CHUNKS_PER_TASK] for i in range(0, len(sizes), SKETCH_CHUNKS_PER_TASK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    if workers is None:
+        workers = (os.cpu_count() or 1) if num_simulations >= PARALLEL_MIN_PATHS else 1
+    workers = min(workers, len(tasks))
+
+    arguments = [(S0, mu, sigma, T, task, sampler, edges, task_seed) for task, task_seed in zip(tasks, seeds)]
+    sketches = run_tasks(_sketch_task, arguments, workers, progress)
+
+    # Merge the partial sketches in task order
+    sketch = sketches[0]
+    for other in sketches[1:]:
+        sketch.merge(other)
+    return sketch
 
 def GBM(S0, mu, sigma, T=252, N=252, num_simulations=10000):
     """Performs Geometric Brownian Motion simulations.
@@ -57,17 +413,8 @@ def GBM(S0, mu, sigma, T=252, N=252, num_simulations=10000):
     Returns:
         list: A list of final stock prices for each simulation.
     """
-    dt = T / N  # Time step size
-    final_prices = []
-    # Generate the simulations
-    for _ in range(num_simulations):
-        dW = np.sqrt(dt) * np.random.randn(N)  # Brownian increments
-        W = np.cumsum(dW)  # Cumulative sum to simulate Brownian path
-        t = np.linspace(0, T, N)  # Time steps
-        # Calculate the stock price path using GBM formula
-        stock_price = S0 * np.exp((mu - 0.5 * sigma**2) * t + sigma * W)
-        final_prices.append(stock_price[-1])  # Store the final price from the path
-    return final_prices
+    # Only the terminal prices are returned, so the paths are not built step by step (N does not change them)
+    return simulate_gbm(S0, mu, sigma, T=T, num_simulations=num_simulations).final_prices.tolist()
 
 class SimulationThread(threading.Thread):
     """Thread for running simulations without blocking the UI."""
@@ -95,18 +442,11 @@ def start_simulation(ticker, on_complete):
     """
     def run_simulation():
         """Nested function to run the simulation and ensure callback on the main thread."""
-        # Download historical prices for the past year with daily intervals
-        hist_prices = yf.download(ticker, period='1y', interval='1d')
-        # Calculate log returns
-        log_returns = np.log(hist_prices['Close'] / hist_prices['Close'].shift(1)).dropna()
-        # Get the latest closing price as the starting price
-        S0 = hist_prices['Close'].iloc[-1]
-        # Calculate volatility (sigma) and mean return (mu)
-        sigma = log_returns.std()
-        mu = log_returns.mean() + sigma**2 / 2
+        # Get the starting price, drift and volatility from the rolling estimator service
+        params = estimator_service.get_gbm_parameters(ticker)
 
         # Perform Geometric Brownian Motion (GBM) simulations
-        final_prices = GBM(S0, mu, sigma)
+        final_prices = GBM(params['S0'], params['mu'], params['sigma'])
         # Ensure callback is called on the main thread using QTimer
         QTimer.singleShot(0, lambda: on_complete(final_prices))
 
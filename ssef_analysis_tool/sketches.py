@@ -0,0 +1,276 @@
+# ssef_analysis_tool/sketches.py
+
+# Import necessary libraries for mergeable streaming summaries of simulated prices
+import numpy as np
+
+# Import additional modules from other files within the project
+from .estimators import merge_moments, batch_moments
+
+# Default accuracy parameter of the KLL quantile sketch (rank error around 1.7 / k)
+KLL_K = 200
+
+class RunningMoments:
+    """Count, mean, variance, minimum and maximum of a stream of values."""
+
+    def __init__(self):
+        self.moments = (0, 0.0, 0.0)  # (count, mean, M2)
+        self.minimum = np.inf  # Smallest value seen
+        self.maximum = -np.inf  # Largest value seen
+
+    def update(self, values):
+        """Folds a chunk of values into the moments."""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.moments = merge_moments(self.moments, batch_moments(values))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    def merge(self, other):
+        """Folds another RunningMoments into this one."""
+        self.moments = merge_moments(self.moments, other.moments)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def count(self):
+        return self.moments[0]
+
+    @property
+    def mean(self):
+        return self.moments[1]
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1) of the values."""
+        n, _, m2 = self.moments
+        return m2 / (n - 1) if n > 1 else float('nan')
+
+class FixedEdgeHistogram:
+    """Histogram over fixed bin edges that keeps per-bin counts and sums, plus both tails."""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)  # Bin edges, shared by every histogram that is merged
+        bins = len(self.edges) - 1
+        self.counts = np.zeros(bins, dtype=np.int64)  # Number of values per bin
+        self.sums = np.zeros(bins, dtype=np.float64)  # Sum of the values per bin
+        self.under_count, self.under_sum = 0, 0.0  # Values below the first edge
+        self.over_count, self.over_sum = 0, 0.0  # Values at or above the last edge
+
+    def update(self, values):
+        """Adds a chunk of values to the histogram."""
+        values = np.asarray(values, dtype=np.float64)
+        bins = len(self.counts)
+        index = np.searchsorted(self.edges, values, side='right') - 1
+        under, over = index < 0, index >= bins
+        self.under_count += int(under.sum())
+        self.under_sum += float(values[under].sum())
+        self.over_count += int(over.sum())
+        self.over_sum += float(values[over].sum())
+        inside = ~(under | over)
+        self.counts += np.bincount(index[inside], minlength=bins)
+        self.sums += np.bincount(index[inside], weights=values[inside], minlength=bins)
+
+    def merge(self, other):
+        """Adds another histogram with the same edges to this one."""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Histograms can only be merged if they share the same edges")
+        self.counts += other.counts
+        self.sums += other.sums
+        self.under_count += other.under_count
+        self.under_sum += other.under_sum
+        self.over_count += other.over_count
+        self.over_sum += other.over_sum
+
+    @property
+    def total(self):
+        return int(self.counts.sum()) + self.under_count + self.over_count
+
+    def quantile(self, q):
+        """Returns the value at quantile(s) q by interpolating within bins, or NaN where q falls in a tail."""
+        q = np.asarray(q, dtype=np.float64)
+        target = q * self.total
+        cumulative = self.under_count + np.cumsum(self.counts)
+        b = np.minimum(np.searchsorted(cumulative, target, side='left'), len(self.counts) - 1)
+        # Place the target linearly within its bin, assuming the values are spread evenly across it
+        previous = cumulative[b] - self.counts[b]
+        fraction = np.clip((target - previous) / np.maximum(self.counts[b], 1), 0.0, 1.0)
+        values = self.edges[b] + fraction * (self.edges[b + 1] - self.edges[b])
+        return np.where((target <= self.under_count) | (target > cumulative[-1]), np.nan, values)
+
+    def fraction_below(self, x):
+        """Returns the fraction of values at or below x, or NaN if x lies outside the edges."""
+        if not self.edges[0] <= x <= self.edges[-1]:
+            return float('nan')
+        b = min(int(np.searchsorted(self.edges, x, side='right')) - 1, len(self.counts) - 1)
+        fraction = (x - self.edges[b]) / (self.edges[b + 1] - self.edges[b])
+        return (self.under_count + self.counts[:b].sum() + self.counts[b] * fraction) / max(self.total, 1)
+
+    def tail_mean(self, cutoff):
+        """Returns the mean of the values at or below a cutoff, interpolating inside the cutoff's bin."""
+        count, total = float(self.under_count), self.under_sum
+        if cutoff >= self.edges[0]:
+            b = min(int(np.searchsorted(self.edges, cutoff, side='right')) - 1, len(self.counts) - 1)
+            count += self.counts[:b].sum()
+            total += self.sums[:b].sum()
+            # Assume the values are spread evenly across the bin containing the cutoff
+            fraction = min((cutoff - self.edges[b]) / (self.edges[b + 1] - self.edges[b]), 1.0)
+            count += self.counts[b] * fraction
+            total += self.sums[b] * fraction
+        return total / count if count > 0 else float('nan')
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch using a fixed amount of memory regardless of the stream length."""
+
+    def __init__(self, k=KLL_K, seed=None):
+        self.k = k  # Accuracy parameter: capacity of the top level
+        self.levels = [np.empty(0)]  # Items per level; an item at level h stands for 2**h values
+        self.count = 0  # Exact number of values added
+        self.rng = np.random.default_rng(seed)  # Chooses which half of each compaction survives
+
+    def _capacity(self, level):
+        """Returns how many items a level may hold before it is compacted."""
+        depth = len(self.levels) - 1 - level
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        """Compacts every over-full level, promoting half of its items to the level above."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # With an odd number of items one stays behind at this level
+                keep = items[:len(items) % 2]
+                pairs = items[len(items) % 2:]
+                promoted = pairs[self.rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Adds a chunk of values to the sketch."""
+        values = np.asarray(values, dtype=np.float64)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other):
+        """Adds the items of another sketch to this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def rank(self, x):
+        """Returns the approximate fraction of values at or below x."""
+        weights = sum(2.0 ** h * np.count_nonzero(level <= x) for h, level in enumerate(self.levels))
+        total = sum(2.0 ** h * len(level) for h, level in enumerate(self.levels))
+        return weights / total if total else float('nan')
+
+    def quantile(self, q):
+        """Returns the approximate value at quantile(s) q.
+
+        Args:
+            q (float or array-like): Quantile level(s) between 0 and 1.
+
+        Returns:
+            float or np.ndarray: The approximate quantile value(s).
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, weights = items[order], weights[order]
+        ranks = np.cumsum(weights) / weights.sum()
+        positions = np.minimum(np.searchsorted(ranks, np.asarray(q, dtype=np.float64), side='left'), len(items) - 1)
+        return items[positions]
+
+class SimulationSketch:
+    """Streaming summary of simulated terminal prices: histogram, quantile sketch and moments."""
+
+    def __init__(self, edges, k=KLL_K, seed=None):
+        self.histogram = FixedEdgeHistogram(edges)  # Fixed-edge histogram for densities and tail means
+        self.quantiles = KLLSketch(k, seed)  # Quantile sketch for percentiles and VaR
+        self.moments = RunningMoments()  # Mean, variance and range
+        self.chunk_means = []  # Mean of every independent chunk, for the standard error
+        self.chunk_sizes = []  # Number of values in every chunk, in the same order
+
+    def update(self, values):
+        """Adds one independent chunk of simulated prices."""
+        values = np.asarray(values, dtype=np.float64)
+        self.histogram.update(values)
+        self.quantiles.update(values)
+        self.moments.update(values)
+        self.chunk_means.append(float(values.mean()))
+        self.chunk_sizes.append(len(values))
+
+    def merge(self, other):
+        """Combines a sketch built from other chunks (e.g. in another process) into this one."""
+        self.histogram.merge(other.histogram)
+        self.quantiles.merge(other.quantiles)
+        self.moments.merge(other.moments)
+        self.chunk_means.extend(other.chunk_means)
+        self.chunk_sizes.extend(other.chunk_sizes)
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    @property
+    def estimate(self):
+        """Mean of the simulated prices."""
+        return self.moments.mean
+
+    @property
+    def stderr(self):
+        """Standard error of the mean, from the spread of the independent chunk means.
+
+        The mean of a short chunk (the remainder of a run) spreads more than the others, so as in
+        simulations._estimate only the full-size chunks are used when there are at least two of them.
+        """
+        means, sizes = np.asarray(self.chunk_means), np.asarray(self.chunk_sizes)
+        full = sizes == sizes.max() if len(sizes) else sizes
+        if full.sum() > 1:
+            means = means[full]
+        if len(means) > 1:
+            return float(np.std(means, ddof=1) / np.sqrt(len(means)))
+        return float(np.sqrt(self.moments.variance / self.count)) if self.count > 1 else float('nan')
+
+    def quantile(self, q):
+        """Returns the approximate price at quantile(s) q.
+
+        Quantiles inside the histogram's range are interpolated from its fine bins; the far tails
+        outside it come from the KLL sketch.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        values = self.histogram.quantile(q)
+        values = np.where(np.isnan(values), self.quantiles.quantile(q), values)
+        # The exact extremes are known from the moments
+        values = np.where(q <= 0, self.moments.minimum, np.where(q >= 1, self.moments.maximum, values))
+        return np.clip(values, self.moments.minimum, self.moments.maximum)
+
+    def fraction_below(self, x):
+        """Returns the approximate fraction of prices at or below x (e.g. the probability of a loss)."""
+        fraction = self.histogram.fraction_below(x)
+        return self.quantiles.rank(x) if np.isnan(fraction) else fraction
+
+    def value_at_risk(self, S0, level=0.95):
+        """Returns the loss per share not exceeded with the given confidence."""
+        return S0 - float(self.quantile(1 - level))
+
+    def expected_shortfall(self, S0, level=0.95):
+        """Returns the mean loss per share in the worst (1 - level) of outcomes."""
+        return S0 - self.histogram.tail_mean(float(self.quantile(1 - level)))
+
+    def pdf(self):
+        """Returns (bin left edges, probability per bin) from the histogram."""
+        return self.histogram.edges[:-1], self.histogram.counts / max(self.count, 1)
+
+    def cdf(self):
+        """Returns (bin right edges, cumulative probability) from the histogram, including the lower tail."""
+        cumulative = self.histogram.under_count + np.cumsum(self.histogram.counts)
+        return self.histogram.edges[1:], cumulative / max(self.count, 1)
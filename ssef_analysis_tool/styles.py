@@ -111,6 +111,24 @@ QWidget {
 """
 # CONTENT_AREA_STYLE is used for the content area widgets to ensure they have the same dark background color as the rest of the application.
 
+# Workspace tab style settings
+WORKSPACE_TABS_STYLE = """
+QTabWidget::pane {
+    border: none;
+}
+QTabBar::tab {
+    color: white;
+    background-color: #001933;
+    padding: 5px 12px;
+    margin-right: 2px;
+}
+QTabBar::tab:selected {
+    background-color: #002d4d;
+}
+"""
+# WORKSPACE_TABS_STYLE styles the workspace tabs like the sidebar buttons, with the visible
+# workspace's tab in the active button color (#002d4d).
+
 # Simulation chart styles
 CHART_BACKGROUND_COLOR = "#00111a"  # Background color for charts
 CHART_TITLE_COLOR = "#ffffff"  # White color for chart titles
@@ -0,0 +1,193 @@
+# ssef_analysis_tool/symbols.py
+
+# Import necessary libraries for the local symbol index
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+# Import additional modules from other files within the project
+from .utils import DATA_DIR
+
+# Compiled index file, rebuilt from a listing file with: python -m ssef_analysis_tool.symbols <listing file>
+SYMBOL_INDEX_FILE = os.path.join(DATA_DIR, 'symbols.npz')
+# Maximum number of suggestions returned for a prefix
+MAX_SUGGESTIONS = 20
+# Column names accepted in listing files for each field (compared case-insensitively)
+LISTING_COLUMNS = {
+    'symbol': ('symbol', 'ticker', 'act symbol', 'nasdaq symbol'),
+    'name': ('name', 'security name', 'company name', 'description'),
+    'exchange': ('exchange', 'market', 'listing exchange'),
+    'currency': ('currency', 'ccy'),
+}
+# Separators recognised in listing files
+LISTING_SEPARATORS = (',', '|', '\t', ';')
+# Character that sorts after any character used in symbols or names, closing a prefix range
+PREFIX_END = '￿'
+
+def _prefix_range(keys, prefix):
+    """Returns the (start, end) slice of a sorted string array whose entries start with prefix."""
+    start = int(np.searchsorted(keys, prefix, side='left'))
+    end = int(np.searchsorted(keys, prefix + PREFIX_END, side='left'))
+    return start, end
+
+def read_listing(path):
+    """Reads a listing file (CSV or pipe/tab separated, with a header row) into symbol, name, exchange and currency.
+
+    Args:
+        path (str): Path to the listing file (e.g. an exchange's symbol directory export).
+
+    Returns:
+        pd.DataFrame: One row per symbol with the four columns, missing ones filled with ''.
+
+    Raises:
+        ValueError: If the file has no symbol column.
+    """
+    # Exchange listings use commas, pipes or tabs; take whichever appears most in the header row
+    with open(path, encoding='utf-8-sig') as file:
+        header = file.readline()
+    separator = max(LISTING_SEPARATORS, key=header.count)
+    frame = pd.read_csv(path, sep=separator, dtype=str, encoding='utf-8-sig', on_bad_lines='skip').fillna('')
+    lower = {column.strip().lower(): column for column in frame.columns}
+    listing = pd.DataFrame()
+    for field, names in LISTING_COLUMNS.items():
+        column = next((lower[name] for name in names if name in lower), None)
+        if column is None and field == 'symbol':
+            raise ValueError(f"No symbol column found in {path}")
+        listing[field] = frame[column].str.strip() if column is not None else ''
+    listing['symbol'] = listing['symbol'].str.upper()
+    # Drop blank rows and footer lines such as "File Creation Time: ..."
+    listing = listing[listing['symbol'].str.fullmatch(r'[A-Z0-9.\-^=]+', na=False)]
+    return listing.drop_duplicates('symbol')
+
+class SymbolIndex:
+    """Sorted-array index of known symbols supporting prefix search by symbol or name in O(log n)."""
+
+    def __init__(self, path=SYMBOL_INDEX_FILE):
+        self.path = path  # Compiled index file
+        self.symbols = None  # Sorted symbols, None until an index is loaded
+        self.names = None  # Company name of each symbol
+        self.exchanges = None  # Exchange of each symbol
+        self.currencies = None  # Currency code of each symbol
+        self.name_keys = None  # Sorted upper-case names, for searching by company name
+        self.name_order = None  # Position in `symbols` of each entry of `name_keys`
+        self.lock = threading.Lock()  # The index may be rebuilt while it is being searched
+        self.load()
+
+    @property
+    def is_available(self):
+        """True if an index has been built; without one, symbols cannot be validated offline."""
+        return self.symbols is not None and len(self.symbols) > 0
+
+    def load(self):
+        """Loads the compiled index from disk, if it exists."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                arrays = {key: data[key] for key in ('symbols', 'names', 'exchanges', 'currencies', 'name_keys', 'name_order')}
+        except Exception as e:
+            print(f"Discarding unreadable symbol index {self.path}: {e}")
+            return
+        with self.lock:
+            for key, value in arrays.items():
+                setattr(self, key, value)
+
+    def build(self, listing_path):
+        """Rebuilds the index from a listing file and saves it.
+
+        Args:
+            listing_path (str): Path to a listing file (see read_listing).
+
+        Returns:
+            int: The number of symbols indexed.
+        """
+        listing = read_listing(listing_path).sort_values('symbol')
+        names = listing['name'].to_numpy(dtype=str)
+        name_keys = np.char.upper(names)
+        name_order = np.argsort(name_keys, kind='stable')
+        arrays = {
+            'symbols': listing['symbol'].to_numpy(dtype=str),
+            'names': names,
+            'exchanges': listing['exchange'].to_numpy(dtype=str),
+            'currencies': listing['currency'].str.upper().to_numpy(dtype=str),
+            'name_keys': name_keys[name_order],
+            'name_order': name_order,
+        }
+
+        # Write to a temporary file first so an interrupted rebuild keeps the old index
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path[:-4]}.tmp.npz"
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, self.path)
+        with self.lock:
+            for key, value in arrays.items():
+                setattr(self, key, value)
+        return len(listing)
+
+    def _entry(self, position):
+        """Returns the details of the symbol at a position of the sorted arrays."""
+        return {
+            'symbol': str(self.symbols[position]),
+            'name': str(self.names[position]),
+            'exchange': str(self.exchanges[position]),
+            'currency': str(self.currencies[position]) or None,
+        }
+
+    def lookup(self, symbol):
+        """Returns the details of a symbol, or None if it is not in the index.
+
+        Args:
+            symbol (str): The ticker symbol.
+
+        Returns:
+            dict: 'symbol', 'name', 'exchange' and 'currency' (None if the listing has no currency).
+        """
+        if not self.is_available:
+            return None
+        symbol = symbol.strip().upper()
+        with self.lock:
+            position = int(np.searchsorted(self.symbols, symbol))
+            if position < len(self.symbols) and self.symbols[position] == symbol:
+                return self._entry(position)
+        return None
+
+    def search(self, prefix, limit=MAX_SUGGESTIONS):
+        """Returns symbols starting with prefix, followed by symbols whose name starts with it.
+
+        Args:
+            prefix (str): The text typed so far.
+            limit (int, optional): Maximum number of results. Defaults to MAX_SUGGESTIONS.
+
+        Returns:
+            list: Entries as returned by lookup, best matches first.
+        """
+        prefix = prefix.strip().upper()
+        if not prefix or not self.is_available:
+            return []
+        with self.lock:
+            # Symbol matches first, in alphabetical order (so exact and short symbols lead)
+            start, end = _prefix_range(self.symbols, prefix)
+            positions = list(range(start, min(end, start + limit)))
+            # Then company names, skipping symbols already listed
+            if len(positions) < limit:
+                start, end = _prefix_range(self.name_keys, prefix)
+                seen = set(positions)
+                for position in self.name_order[start:end]:
+                    if len(positions) >= limit:
+                        break
+                    if int(position) not in seen:
+                        positions.append(int(position))
+            return [self._entry(position) for position in positions]
+
+# Shared symbol index used by the ticker entry and ticker validation
+symbol_index = SymbolIndex()
+
+if __name__ == "__main__":
+    # Run with: python -m ssef_analysis_tool.symbols <listing file>
+    if len(sys.argv) != 2:
+        print("Usage: python -m ssef_analysis_tool.symbols <listing file>")
+        sys.exit(1)
+    count = symbol_index.build(sys.argv[1])
+    print(f"Indexed {count} symbols into {symbol_index.path}")
@@ -2,6 +2,53 @@
 
 # Import necessary library for handling missing values in data
 import pandas as pd
+import os
+import threading
+from contextlib import contextmanager
+
+# Root directory for everything the tool persists between sessions (bar history, caches, etc.)
+DATA_DIR = os.environ.get('SSEF_DATA_DIR', os.path.join(os.path.expanduser('~'), '.ssef_analysis_tool'))
+
+def get_data_path(*parts):
+    """Returns a path inside the tool's data directory, creating parent folders as needed.
+    
+    Args:
+        *parts (str): Path components relative to the data directory.
+    
+    Returns:
+        str: The absolute path to the requested location.
+    """
+    # Join the requested components onto the data directory
+    path = os.path.join(DATA_DIR, *parts)
+    # Make sure the containing folder exists so callers can write straight away
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+class KeyedLock:
+    """Hands out one lock per key, so work on the same key runs once at a time while other keys run in parallel.
+
+    The caches use it around their downloads: when several views (or workspaces) ask for the same data at
+    once, the first one downloads it and the others wait and then find it in the cache.
+    """
+
+    def __init__(self):
+        self.locks = {}  # Maps each key in use to [lock, number of holders and waiters]
+        self.lock = threading.Lock()  # Guards the map itself
+
+    @contextmanager
+    def __call__(self, key):
+        with self.lock:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            # Forget the lock once nobody holds or waits for it, so the map does not grow with every key
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.locks[key]
 
 def format_number(num, currency="$"):
     """Formats a number with appropriate units and currency symbol.
@@ -13,6 +60,10 @@ def format_number(num, currency="$"):
     Returns:
         str: The formatted number as a string with currency symbol and units (B for billion, M for million, K for thousand).
     """
+    # Placeholders for missing fields (e.g. "N/A") are shown as they are
+    if isinstance(num, str):
+        return num
+
     # Check if the number is NaN (Not a Number) and return "N/A" if true
     if pd.isna(num):
         return "N/A"
@@ -37,6 +88,23 @@ def format_number(num, currency="$"):
     else:
         return formatted_num
 
+def format_age(seconds):
+    """Formats the age of a value for display, or returns an empty string if it is fresh.
+    
+    Args:
+        seconds (float or None): How many seconds ago the value was fetched.
+    
+    Returns:
+        str: A note such as " (as of 12 min ago)", or "" for values less than a minute old.
+    """
+    if seconds is None or seconds < 60:
+        return ""
+    if seconds < 3600:
+        return f" (as of {seconds / 60:.0f} min ago)"
+    if seconds < 86400:
+        return f" (as of {seconds / 3600:.0f} h ago)"
+    return f" (as of {seconds / 86400:.0f} days ago)"
+
 # Dictionary mapping currency codes to symbols for use in formatting
 currency_symbols = {
     'USD': '$',  # US Dollar
@@ -0,0 +1,293 @@
+# ssef_analysis_tool/watchlist.py
+
+# Import necessary PyQt5 classes for GUI components
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLineEdit, QLabel, QScrollArea
+from PyQt5.QtCore import Qt, QTimer, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Import additional modules from other files within the project
+from .bar_store import index_to_epoch_ns
+from .jobs import get_job_manager
+from .live_quotes import get_quote_poller
+from .styles import CHART_BACKGROUND_COLOR, CHART_SERIES_COLOR, CHART_AXIS_LINE_COLOR
+
+# Number of bars kept per ticker in the dashboard
+WATCHLIST_BUFFER_SIZE = 390
+# Timeframe of the bars shown on each tile
+WATCHLIST_TIMEFRAME = '5m'
+# How often dirty tiles are repainted (milliseconds)
+WATCHLIST_RENDER_INTERVAL_MS = 1000
+
+class BarRingBuffer:
+    """Fixed-size, array-backed buffer of the most recent OHLCV bars of one ticker."""
+
+    def __init__(self, capacity=WATCHLIST_BUFFER_SIZE):
+        self.capacity = capacity  # Maximum number of bars held
+        self.times = np.zeros(capacity, dtype=np.int64)  # Bar opening times in nanoseconds since the epoch
+        self.ohlcv = np.zeros((capacity, 5), dtype=np.float64)  # Open, high, low, close and volume columns
+        self.start = 0  # Index of the oldest bar
+        self.size = 0  # Number of bars currently held
+
+    def __len__(self):
+        return self.size
+
+    def _last_index(self):
+        """Returns the array index of the newest bar."""
+        return (self.start + self.size - 1) % self.capacity
+
+    def push(self, time_ns, open_, high, low, close, volume):
+        """Appends a bar, or replaces the newest bar if it has the same opening time.
+
+        Args:
+            time_ns (int): The bar's opening time in nanoseconds since the epoch.
+            open_ (float): The opening price.
+            high (float): The highest price.
+            low (float): The lowest price.
+            close (float): The closing price.
+            volume (float): The traded volume.
+        """
+        if self.size and self.times[self._last_index()] == time_ns:
+            # Update the bar that is still forming
+            index = self._last_index()
+        elif self.size and time_ns < self.times[self._last_index()]:
+            # Ignore bars older than the newest one held
+            return
+        elif self.size < self.capacity:
+            # Grow into free space
+            self.size += 1
+            index = self._last_index()
+        else:
+            # Overwrite the oldest bar
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[index] = time_ns
+        self.ohlcv[index] = (open_, high, low, close, volume)
+
+    def extend(self, data):
+        """Appends every bar of an OHLCV frame indexed by timestamp."""
+        # Only the newest bars fit, so skip the rest before touching the buffer
+        data = data.iloc[-self.capacity:]
+        times = index_to_epoch_ns(data.index)
+        values = data[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64)
+        for time_ns, row in zip(times, values):
+            self.push(int(time_ns), *row)
+
+    def closes(self):
+        """Returns the held closing prices in chronological order."""
+        order = (self.start + np.arange(self.size)) % self.capacity
+        return self.ohlcv[order, 3]
+
+class SparklineTile(QWidget):
+    """Small tile showing a ticker's last price, change and a sparkline of recent closes."""
+
+    def __init__(self, ticker, parent=None):
+        # Initialize the QWidget superclass
+        super().__init__(parent)
+        self.ticker = ticker  # Ticker shown on the tile
+        self.buffer = BarRingBuffer()  # Recent bars of the ticker
+        self.dirty = False  # Whether the buffer changed since the last repaint
+        self.setMinimumSize(180, 90)
+
+        # Label with the ticker, last price and change over the buffered bars
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.label = QLabel(ticker)
+        self.label.setStyleSheet("color: white; font-size: 9pt;")
+        layout.addWidget(self.label, alignment=Qt.AlignTop)
+
+    def add_bar(self, bar):
+        """Adds or updates a bar from the live poller and marks the tile for repainting."""
+        self.buffer.push(pd.Timestamp(bar['time']).value, bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'])
+        self.dirty = True
+
+    def is_on_screen(self):
+        """Returns True if any part of the tile is currently visible."""
+        return self.isVisible() and not self.visibleRegion().isEmpty()
+
+    def render_if_needed(self):
+        """Repaints the tile only if its data changed and it is visible."""
+        if self.dirty and self.is_on_screen():
+            self.dirty = False
+            closes = self.buffer.closes()
+            if len(closes):
+                change = (closes[-1] / closes[0] - 1) * 100 if closes[0] else 0.0
+                self.label.setText(f"{self.ticker}  {closes[-1]:.2f}  ({change:+.2f}%)")
+            self.update()
+
+    def showEvent(self, event):
+        """Catches up on updates that arrived while the tile was hidden."""
+        super().showEvent(event)
+        self.render_if_needed()
+
+    def paintEvent(self, event):
+        """Draws the sparkline of buffered closing prices."""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(CHART_BACKGROUND_COLOR))
+        painter.setPen(QPen(QColor(CHART_AXIS_LINE_COLOR)))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        closes = self.buffer.closes()
+        if len(closes) < 2:
+            return
+
+        # Scale the closes into the area below the label
+        top = self.label.geometry().bottom() + 4
+        width, height = self.width() - 8, self.height() - top - 4
+        low, high = closes.min(), closes.max()
+        span = (high - low) or 1.0
+        xs = 4 + np.linspace(0, width, len(closes))
+        ys = top + height - (closes - low) / span * height
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(CHART_SERIES_COLOR), 1))
+        painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, ys)]))
+
+def fetch_history(tickers, progress=None):
+    """Downloads recent bars for many tickers with one grouped request.
+
+    Meant to run as a background job (see jobs.JobManager).
+
+    Args:
+        tickers (list): The ticker symbols to download.
+        progress (callable, optional): Called with the percentage done; may raise to cancel the download.
+
+    Returns:
+        dict: Maps each ticker to its OHLCV frame.
+    """
+    if not tickers:
+        return {}
+    data = yf.download(tickers, period='5d', interval=WATCHLIST_TIMEFRAME, group_by='ticker', progress=False)
+    if progress:
+        progress(90)
+    history = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            frame = data[ticker]
+        else:
+            frame = data
+        history[ticker] = frame.dropna(subset=['Close'])
+    return history
+
+class WatchlistDashboard(QWidget):
+    """Dashboard of sparkline tiles for many tickers sharing one update loop."""
+
+    def __init__(self, parent=None):
+        # Initialize the QWidget superclass
+        super().__init__(parent)
+        self.tiles = {}  # Maps each ticker to its tile
+        self.subscribed = set()  # Tickers whose tiles are seeded and fed by the quote poller
+        self.init_ui()
+
+        # Seed bars are downloaded on the application's shared job pool
+        self.jobs = get_job_manager()
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.error.connect(self.on_job_error)
+
+        # Single render timer repainting the tiles that changed and are on screen
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.render_tiles)
+        self.render_timer.start(WATCHLIST_RENDER_INTERVAL_MS)
+
+        # All tiles are fed by the application's shared quote poller
+        get_quote_poller().bar_updated.connect(self.on_live_bar)
+
+    def init_ui(self):
+        """Initializes the dashboard UI."""
+        layout = QVBoxLayout(self)
+
+        # Comma-separated list of tickers to watch
+        self.ticker_entry = QLineEdit()
+        self.ticker_entry.setPlaceholderText("Watchlist tickers, comma separated (e.g. AAPL, MSFT, VOD.L)")
+        self.ticker_entry.setStyleSheet("background-color: white; color: black; padding: 5px;")
+        self.ticker_entry.returnPressed.connect(self.on_tickers_entered)
+        layout.addWidget(self.ticker_entry)
+
+        # Scrollable grid holding the tiles
+        self.grid_container = QWidget()
+        self.grid = QGridLayout(self.grid_container)
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.grid_container)
+        layout.addWidget(scroll)
+
+    def on_tickers_entered(self):
+        """Replaces the watchlist with the tickers typed into the entry box."""
+        tickers = [ticker.strip().upper() for ticker in self.ticker_entry.text().split(',') if ticker.strip()]
+        self.set_tickers(tickers)
+
+    def set_tickers(self, tickers):
+        """Shows tiles for the given tickers, seeding new ones from one grouped history download.
+
+        The download runs as a background job; new tiles are subscribed to live bars once it is done.
+
+        Args:
+            tickers (list): The ticker symbols to watch.
+        """
+        poller = get_quote_poller()
+        # Each ticker gets one tile and one subscription, however often it is listed
+        tickers = list(dict.fromkeys(tickers))
+
+        # Remove tiles that are no longer on the watchlist
+        for ticker in list(self.tiles):
+            if ticker not in tickers:
+                if ticker in self.subscribed:
+                    self.subscribed.discard(ticker)
+                    poller.unsubscribe(ticker, WATCHLIST_TIMEFRAME)
+                self.tiles.pop(ticker).deleteLater()
+
+        # New tiles are shown empty straight away and filled when their bars arrive
+        new_tickers = [ticker for ticker in tickers if ticker not in self.tiles]
+        for ticker in new_tickers:
+            self.tiles[ticker] = SparklineTile(ticker)
+
+        # Lay the tiles out in watchlist order, four per row
+        for position, ticker in enumerate(tickers):
+            self.grid.addWidget(self.tiles[ticker], position // 4, position % 4)
+
+        # Seed all new tiles with one grouped download instead of one request each
+        if new_tickers:
+            self.jobs.submit(('watchlist', id(self), tuple(new_tickers)), fetch_history, new_tickers)
+
+    def on_job_finished(self, key, history):
+        """Seeds the tiles of a finished download and subscribes them to live bars."""
+        if not (isinstance(key, tuple) and key[:2] == ('watchlist', id(self))):
+            return
+        for ticker in key[2]:
+            tile = self.tiles.get(ticker)
+            # Tiles removed while their bars were downloading are skipped
+            if tile is None or ticker in self.subscribed:
+                continue
+            frame = history.get(ticker)
+            last_bar = None
+            if frame is not None and not frame.empty:
+                tile.buffer.extend(frame)
+                tile.dirty = True
+                last = frame.iloc[-1]
+                last_bar = {'time': frame.index[-1], 'open': float(last['Open']), 'high': float(last['High']),
+                            'low': float(last['Low']), 'close': float(last['Close']), 'volume': float(last['Volume'])}
+            self.subscribed.add(ticker)
+            get_quote_poller().subscribe(ticker, WATCHLIST_TIMEFRAME, last_bar)
+
+    def on_job_error(self, key, error_message):
+        """Subscribes the tiles of a failed download without seed bars, so they still fill with live bars."""
+        if not (isinstance(key, tuple) and key[:2] == ('watchlist', id(self))):
+            return
+        print(f"Error downloading watchlist bars: {error_message}")
+        self.on_job_finished(key, {})
+
+    def on_live_bar(self, ticker, timeframe, bar):
+        """Stores a live bar in the matching tile; repainting is left to the render timer."""
+        if timeframe == WATCHLIST_TIMEFRAME and ticker in self.tiles:
+            self.tiles[ticker].add_bar(bar)
+
+    def render_tiles(self):
+        """Repaints the tiles that changed and are visible; off-screen tiles wait until shown."""
+        if not self.isVisible():
+            return
+        for tile in self.tiles.values():
+            tile.render_if_needed()